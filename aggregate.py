@@ -0,0 +1,457 @@
+"""
+One-pass population statistics over ``taxes.Budget.calculate_batch`` outputs.
+
+Households are evaluated chunk by chunk and folded into fixed-size accumulators: grouped counts
+and sums, quantile sketches, and sums by income bin. Nothing per household is kept, so memory
+does not grow with the number of rows, and accumulators built on separate shards merge into the
+same result as a single pass.
+
+Usage:
+    python aggregate.py households.csv [--by state] [--compare-states NY PA] [--workers N]
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from typing import NamedTuple
+
+import batch
+import taxes
+
+DEFAULT_COMPRESSION = 500
+DEFAULT_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9, 0.99)
+REVENUE = ("federal_tax", "state_tax", "local_tax", "social_sec_tax", "medicare_tax", "total_tax")
+
+
+class QuantileSketch:
+    """
+    A mergeable t-digest: streaming quantiles in memory bounded by the compression.
+
+    Values are summarized by at most about ``compression / 2`` weighted centroids, small near
+    both tails (where quantiles need to be sharp) and large in the middle. Each update sorts the
+    new values together with the current centroids and regroups them in one vectorized pass.
+    """
+    __slots__ = ("compression", "means", "weights", "min", "max")
+
+    def __init__(self, compression: float = DEFAULT_COMPRESSION):
+        import numpy as np
+
+        if compression <= 0:
+            raise ValueError("Compression must be positive.")
+        self.compression = compression
+        self.means = np.zeros(0)
+        self.weights = np.zeros(0)
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(count={self.count:g}, centroids={self.means.shape[0]})"
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum())
+
+    def update(self, values, weights=None) -> QuantileSketch:
+        """
+        Add values, optionally weighted; NaN values are ignored.
+        """
+        import numpy as np
+
+        values = np.ravel(np.asarray(values, dtype=np.float64))
+        weights = np.ones(values.shape) if weights is None else \
+            np.broadcast_to(np.asarray(weights, dtype=np.float64), values.shape)
+        keep = ~np.isnan(values)
+        if not keep.all():
+            values, weights = values[keep], weights[keep]
+        if values.size:
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+            self._compress(np.concatenate([self.means, values]), np.concatenate([self.weights, weights]))
+        return self
+
+    def merge(self, other: QuantileSketch) -> QuantileSketch:
+        """
+        Fold another sketch into this one, as if its values had been added here.
+        """
+        import numpy as np
+
+        if other.weights.size:
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self._compress(np.concatenate([self.means, other.means]), np.concatenate([self.weights, other.weights]))
+        return self
+
+    def _compress(self, means, weights):
+        import numpy as np
+
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        cumulative = np.cumsum(weights)
+        total = cumulative[-1]
+        # Centroids are grouped by whole steps of the k1 scale function, which grows fastest at
+        # the tails, so clusters hold many values in the middle and few at the extremes.
+        q = (cumulative - weights / 2) / total
+        k = self.compression / (2 * math.pi) * np.arcsin(2 * q - 1)
+        cluster = (np.floor(k) - math.floor(k[0])).astype(np.int64)
+        cluster_weights = np.bincount(cluster, weights)
+        used = cluster_weights > 0
+        self.weights = cluster_weights[used]
+        self.means = np.bincount(cluster, weights * means)[used] / self.weights
+
+    def quantile(self, q):
+        """
+        Estimate the ``q`` quantile (a float or an array of floats in [0, 1]); NaN while empty.
+        """
+        import numpy as np
+
+        q = np.asarray(q, dtype=np.float64)
+        if ((q < 0) | (q > 1)).any():
+            raise ValueError("Quantiles must be between 0 and 1.")
+        if not self.weights.size:
+            return np.full(q.shape, np.nan) if q.ndim else math.nan
+        cumulative = np.cumsum(self.weights)
+        total = cumulative[-1]
+        ranks = np.concatenate([[0.0], cumulative - self.weights / 2, [total]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        result = np.interp(q * total, ranks, values)
+        return result if q.ndim else float(result)
+
+
+class GroupSummary(NamedTuple):
+    """
+    The aggregates of one group of households.
+    """
+    count: int
+    sums: dict  # name -> sum over the group
+    sketches: dict  # name -> QuantileSketch
+
+    @property
+    def means(self) -> dict:
+        return {name: total / self.count if self.count else math.nan for name, total in self.sums.items()}
+
+    def quantiles(self, name: str, q=DEFAULT_QUANTILES):
+        return self.sketches[name].quantile(q)
+
+
+class GroupedStats:
+    """
+    Counts, sums and quantile sketches of household values, grouped by one or more columns.
+
+    Sums of every group are accumulated with one ``bincount`` per column; only the sketches are
+    updated group by group.
+    """
+
+    def __init__(self, by=(), sums=REVENUE + ("total_income",), quantiles=("eff_tax_rate",),
+                 compression: float = DEFAULT_COMPRESSION):
+        """
+        Args:
+            by (tuple[str], optional): Columns whose distinct values form the groups, such as ``("state",)``.
+            sums (tuple[str], optional): Columns to sum (and average) per group.
+            quantiles (tuple[str], optional): Columns to sketch per group for quantiles.
+            compression (float, optional): The accuracy of each sketch; see ``QuantileSketch``.
+        """
+        self.by = tuple(by)
+        self.sums = tuple(sums)
+        self.quantiles = tuple(quantiles)
+        self.compression = compression
+        self._groups = {}  # key tuple -> [count, {name: sum}, {name: sketch}]
+
+    def _group(self, key):
+        if key not in self._groups:
+            self._groups[key] = [0, dict.fromkeys(self.sums, 0.0),
+                                 {name: QuantileSketch(self.compression) for name in self.quantiles}]
+        return self._groups[key]
+
+    def update(self, values: dict) -> GroupedStats:
+        """
+        Add a chunk of households, given as equal-length columns such as the inputs and outputs of
+        ``Budget.calculate_batch``.
+        """
+        import numpy as np
+
+        size = len(next(iter(values.values())))
+        codes = np.zeros(size, dtype=np.int64)
+        keys = [()]
+        for name in self.by:
+            uniques, inverse = np.unique(np.asarray(values[name]), return_inverse=True)
+            codes = codes * len(uniques) + inverse.ravel()
+            keys = [key + (value,) for key in keys for value in uniques.tolist()]
+        counts = np.bincount(codes, minlength=len(keys))
+        present = np.flatnonzero(counts)
+        sums = {name: np.bincount(codes, np.asarray(values[name], dtype=np.float64), minlength=len(keys))
+                for name in self.sums}
+
+        if self.quantiles and len(present) > 1:
+            order = np.argsort(codes, kind="stable")
+            bounds = np.concatenate([[0], np.cumsum(counts)])
+        for code in present.tolist():
+            group = self._group(keys[code])
+            group[0] += int(counts[code])
+            for name in self.sums:
+                group[1][name] += float(sums[name][code])
+            if self.quantiles:
+                rows = ... if len(present) == 1 else order[bounds[code]:bounds[code + 1]]
+                for name in self.quantiles:
+                    group[2][name].update(np.asarray(values[name], dtype=np.float64)[rows])
+        return self
+
+    def merge(self, other: GroupedStats) -> GroupedStats:
+        """
+        Fold in the groups of another accumulator with the same configuration, such as one per shard.
+        """
+        if (other.by, other.sums, other.quantiles) != (self.by, self.sums, self.quantiles):
+            raise ValueError("Only statistics grouped and accumulated the same way can be merged.")
+        for key, (count, sums, sketches) in other._groups.items():
+            group = self._group(key)
+            group[0] += count
+            for name, total in sums.items():
+                group[1][name] += total
+            for name, sketch in sketches.items():
+                group[2][name].merge(sketch)
+        return self
+
+    def summaries(self) -> dict:
+        """
+        Returns:
+            dict[tuple, GroupSummary]: The aggregates of every group, keyed by its values of ``by``,
+            in sorted order.
+        """
+        return {key: GroupSummary(count, dict(sums), sketches)
+                for key, (count, sums, sketches) in sorted(self._groups.items())}
+
+    def total(self) -> GroupSummary:
+        """
+        The aggregates of all households together.
+        """
+        total = GroupedStats((), self.sums, self.quantiles, self.compression)
+        group = total._group(())  # present even without households, with empty sketches
+        for count, sums, sketches in self._groups.values():
+            group[0] += count
+            for name, value in sums.items():
+                group[1][name] += value
+            for name, sketch in sketches.items():
+                group[2][name].merge(sketch)
+        return total.summaries()[()]
+
+
+@lru_cache(maxsize=1)
+def income_bin_edges():
+    """
+    Lower edges of the fine income bins: $0, then 100 geometric bins per tenfold from $1,000 to $1B.
+    """
+    import numpy as np
+
+    edges = np.concatenate([[0.0], np.geomspace(1e3, 1e9, 601)])
+    edges.flags.writeable = False
+    return edges
+
+
+class IncomeBin(NamedTuple):
+    """
+    The aggregates of the households in one income range.
+    """
+    lower: float  # income range, lower bound inclusive
+    upper: float
+    count: int
+    sums: dict
+
+    @property
+    def means(self) -> dict:
+        return {name: total / self.count if self.count else math.nan for name, total in self.sums.items()}
+
+
+class IncomeBins:
+    """
+    Counts and sums of household values by fine income bins, regrouped into population quantile
+    groups such as deciles when read.
+
+    The fine bins are fixed in advance, so a single pass suffices and shards merge by addition.
+    A quantile group is made of whole fine bins, so its boundaries are exact to within one fine
+    bin (about 2.3% of income) rather than one household.
+    """
+
+    def __init__(self, sums=("total_tax",), income: str = "total_income"):
+        import numpy as np
+
+        self.income = income
+        self.sums = tuple(sums)
+        size = income_bin_edges().shape[0]
+        self.counts = np.zeros(size, dtype=np.int64)
+        self.totals = {name: np.zeros(size) for name in self.sums}
+
+    def update(self, values: dict) -> IncomeBins:
+        """
+        Add a chunk of households, given as equal-length columns including the income column.
+        """
+        import numpy as np
+
+        edges = income_bin_edges()
+        bins = np.searchsorted(edges, np.asarray(values[self.income], dtype=np.float64), side="right") - 1
+        bins = np.maximum(bins, 0)
+        self.counts += np.bincount(bins, minlength=edges.shape[0])
+        for name in self.sums:
+            self.totals[name] += np.bincount(bins, np.asarray(values[name], dtype=np.float64),
+                                             minlength=edges.shape[0])
+        return self
+
+    def merge(self, other: IncomeBins) -> IncomeBins:
+        if (other.income, other.sums) != (self.income, self.sums):
+            raise ValueError("Only income bins of the same columns can be merged.")
+        self.counts += other.counts
+        for name in self.sums:
+            self.totals[name] += other.totals[name]
+        return self
+
+    def quantile_groups(self, groups: int = 10) -> list[IncomeBin]:
+        """
+        Regroup the households into ``groups`` groups of about equal size by income (deciles by default).
+
+        Each fine bin goes to the group its midpoint household falls in.
+        """
+        import numpy as np
+
+        if groups <= 0:
+            raise ValueError("The number of groups must be positive.")
+        edges = income_bin_edges()
+        total = self.counts.sum()
+        if total == 0:
+            return []
+        midpoints = np.cumsum(self.counts) - self.counts / 2
+        assignment = np.minimum((midpoints * groups / total).astype(np.int64), groups - 1)
+        upper_edges = np.append(edges[1:], math.inf)
+        result = []
+        for group in range(groups):
+            members = (assignment == group) & (self.counts > 0)
+            if not members.any():
+                continue
+            first, last = np.flatnonzero(members)[[0, -1]]
+            result.append(IncomeBin(float(edges[first]), float(upper_edges[last]), int(self.counts[members].sum()),
+                                    {name: float(self.totals[name][members].sum()) for name in self.sums}))
+        return result
+
+
+class PopulationStats(NamedTuple):
+    """
+    The accumulators of one pass over a population of households.
+    """
+    grouped: GroupedStats
+    income_bins: IncomeBins
+
+    def merge(self, other: PopulationStats) -> PopulationStats:
+        self.grouped.merge(other.grouped)
+        self.income_bins.merge(other.income_bins)
+        return self
+
+
+def new_population_stats(by=("state",), compare_states=(), compression: float = DEFAULT_COMPRESSION) -> PopulationStats:
+    """
+    Empty accumulators for ``summarize_chunk``.
+
+    With ``compare_states``, the income bins also sum the total tax every household would pay in
+    each of those states, as ``total_tax_<state>``.
+    """
+    sums = ("total_tax",) + tuple(f"total_tax_{state}" for state in compare_states)
+    return PopulationStats(GroupedStats(by, compression=compression), IncomeBins(sums))
+
+
+def summarize_chunk(columns: dict, stats: PopulationStats = None, by=("state",), compare_states=(),
+                    compression: float = DEFAULT_COMPRESSION) -> PopulationStats:
+    """
+    Evaluate one chunk of households and fold it into ``stats`` (new accumulators if None).
+    """
+    if stats is None:
+        stats = new_population_stats(by, compare_states, compression)
+    results = taxes.Budget.calculate_batch(**columns)
+    values = {**columns, **results}
+    for state in compare_states:
+        values[f"total_tax_{state}"] = taxes.Budget.calculate_batch(**{**columns, "state": state})["total_tax"]
+    stats.grouped.update(values)
+    stats.income_bins.update(values)
+    return stats
+
+
+def _summarize_shard(chunk, by, compare_states, compression) -> PopulationStats:
+    columns = chunk.columns() if isinstance(chunk, batch.CsvRows) else chunk
+    return summarize_chunk(columns, None, by, compare_states, compression)
+
+
+def summarize_file(input_path: str, by=("state",), compare_states=(), chunk_size: int = batch.DEFAULT_CHUNK_SIZE,
+                   workers: int = 1, compression: float = DEFAULT_COMPRESSION) -> PopulationStats:
+    """
+    Aggregate every household of a CSV or Parquet input (see ``batch``) in one pass.
+
+    With ``workers`` > 1 the chunks are summarized in a process pool and the shard accumulators
+    merged, so only fixed-size accumulators cross process boundaries.
+    """
+    if chunk_size <= 0:
+        raise ValueError("Chunk size must be positive.")
+    if workers <= 0:
+        raise ValueError("Workers must be positive.")
+
+    stats = new_population_stats(by, compare_states, compression)
+    chunks = batch.read_chunks(input_path, chunk_size)
+    task = partial(_summarize_shard, by=by, compare_states=compare_states, compression=compression)
+    if workers == 1:
+        for chunk in chunks:
+            stats.merge(task(chunk))
+        return stats
+    with ProcessPoolExecutor(max_workers=workers, initializer=batch.init_worker) as executor:
+        for shard in batch.map_ordered(executor, task, chunks, max_pending=2 * workers):
+            stats.merge(shard)
+    return stats
+
+
+def format_summary(stats: PopulationStats, compare_states=(), quantiles=DEFAULT_QUANTILES) -> str:
+    """
+    A plain-text table of revenue and effective rate percentiles by group, and totals by income decile.
+    """
+    lines = []
+    percentiles = "".join(f"{f'p{q * 100:g}':>8}" for q in quantiles)
+    lines.append(f"{'group':<16}{'households':>12}{'revenue':>18}{'mean rate':>10}{percentiles}")
+    groups = dict(stats.grouped.summaries())
+    groups[("all",)] = stats.grouped.total()
+    for key, summary in groups.items():
+        label = "/".join(str(value) for value in key) or "all"
+        if summary.count:
+            rates = "".join(f"{rate:8.2f}" for rate in summary.quantiles("eff_tax_rate", quantiles))
+            income = summary.sums["total_income"]
+            mean_rate = f"{summary.sums['total_tax'] / income * 100 if income else 0:>10.2f}"
+        else:  # no households, so no rates
+            rates = f"{'n/a':>8}" * len(quantiles)
+            mean_rate = f"{'n/a':>10}"
+        lines.append(f"{label:<16}{summary.count:>12}{summary.sums['total_tax']:>18,.0f}{mean_rate}{rates}")
+
+    lines.append("")
+    header = f"{'decile':<8}{'income from':>14}{'households':>12}{'mean tax':>12}"
+    pairs = list(zip(compare_states, compare_states[1:]))
+    header += "".join(f"{f'{a} - {b}':>14}" for a, b in pairs)
+    lines.append(header)
+    for number, group in enumerate(stats.income_bins.quantile_groups(10), start=1):
+        means = group.means
+        row = f"{number:<8}{group.lower:>14,.0f}{group.count:>12}{means['total_tax']:>12,.0f}"
+        row += "".join(f"{means[f'total_tax_{a}'] - means[f'total_tax_{b}']:>14,.0f}" for a, b in pairs)
+        lines.append(row)
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Summarize the tax distribution of a population of households.")
+    parser.add_argument("input", help="input CSV or Parquet file of households")
+    parser.add_argument("--by", nargs="*", default=["state"], help="input columns to group by (default: state)")
+    parser.add_argument("--compare-states", nargs="*", default=[],
+                        help="states to evaluate every household in, compared by income decile")
+    parser.add_argument("--chunk-size", type=int, default=batch.DEFAULT_CHUNK_SIZE,
+                        help=f"households evaluated per chunk (default: {batch.DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (default: 1)")
+    args = parser.parse_args(argv)
+
+    stats = summarize_file(args.input, tuple(args.by), tuple(args.compare_states), args.chunk_size, args.workers)
+    print(format_summary(stats, tuple(args.compare_states)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
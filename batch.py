@@ -0,0 +1,351 @@
+"""
+Streaming batch evaluation of households with the vectorized Budget engine.
+
+Reads household rows from CSV or Parquet in fixed-size chunks, evaluates each chunk with
+``taxes.Budget.calculate_batch`` and appends the results to the output file, so memory stays
+bounded by the chunk size regardless of the input length.
+
+Usage:
+    python -m taxes batch households.csv results.csv [--chunk-size N] [--workers N] [--cents]
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import NamedTuple
+
+import taxes
+
+NUMERIC_INPUTS = ("income1", "income2", "other_income", "contr401k1", "contr401k2")
+INPUTS = taxes.Budget.ARGUMENTS  # NUMERIC_INPUTS, state, the *_paid amounts, year and filing_status
+OUTPUT_COLUMNS = INPUTS + taxes.Budget.OUTPUTS
+# Outputs written as integer cents in --cents mode; the effective rate stays a percentage.
+CENTS_COLUMNS = frozenset(taxes.Budget.OUTPUTS) - {"eff_tax_rate"}
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def is_parquet(path: str) -> bool:
+    return path.lower().endswith((".parquet", ".pq"))
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet input and output require the 'pyarrow' package.") from e
+    return pyarrow
+
+
+class CsvColumn(NamedTuple):
+    """
+    How one CSV column is read: stripped cells are converted with ``type`` (float, int or str),
+    and empty cells, or every cell when an optional column is absent, take ``default``.
+    """
+    type: type
+    default: object = None  # None: an empty cell is converted like any other
+    required: bool = False
+
+
+# The household inputs: numeric amounts and state are required, empty amounts read as 0.
+HOUSEHOLD_COLUMNS = {name: CsvColumn(float, 0.0, required=name in NUMERIC_INPUTS) for name in INPUTS}
+HOUSEHOLD_COLUMNS.update(state=CsvColumn(str, required=True), year=CsvColumn(int, taxes.DEFAULT_YEAR),
+                         filing_status=CsvColumn(str, taxes.DEFAULT_FILING_STATUS))
+_DTYPES = {float: "float64", int: "int64", str: None}
+
+
+class CsvRows(NamedTuple):
+    """
+    A chunk of raw CSV rows, parsed into columns only where it is evaluated.
+
+    Shipping unparsed rows lets worker processes share the parsing cost in sharded runs.
+    """
+    positions: dict
+    rows: list
+    spec: dict = HOUSEHOLD_COLUMNS  # name -> CsvColumn
+
+    def columns(self) -> dict:
+        """
+        One array per column of ``spec``, in its order.
+        """
+        import numpy as np
+
+        columns = {}
+        for name, column in self.spec.items():
+            dtype = _DTYPES[column.type]
+            if name not in self.positions:
+                columns[name] = np.full(len(self.rows), column.default, dtype=dtype)
+                continue
+            position, parse, default = self.positions[name], column.type, column.default
+            if parse is str:
+                values = [row[position].strip() for row in self.rows]
+                if default is not None:
+                    values = [value or default for value in values]
+            else:
+                try:  # numbers convert with surrounding spaces; only empty cells need the default
+                    values = [parse(row[position]) for row in self.rows]
+                except ValueError:
+                    if default is None:
+                        raise
+                    values = [parse(cell) if cell.strip() else default for cell in (row[position] for row in self.rows)]
+            columns[name] = np.array(values, dtype=dtype)
+        return columns
+
+
+def read_csv_rows(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, spec: dict = HOUSEHOLD_COLUMNS):
+    """
+    Yield unparsed CSV rows, ``chunk_size`` rows at a time; blank lines are skipped.
+
+    Args:
+        spec (dict, optional): The ``CsvColumn`` of each column to read, by name; households by default.
+
+    Yields:
+        CsvRows: The raw rows of one chunk and the position of each column of ``spec``.
+
+    Raises:
+        ValueError: If the file is empty, lacks a required column, or has a row with a different
+            number of columns than the header.
+    """
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            raise ValueError(f"Input {path} is empty.")
+        header = [name.strip() for name in header]
+        missing = [name for name, column in spec.items() if column.required and name not in header]
+        if missing:
+            raise ValueError(f"Input is missing required columns: {', '.join(missing)}")
+        positions = {name: header.index(name) for name in spec if name in header}
+
+        width = len(header)
+        number = 0  # rows read after the header
+        while True:
+            rows = list(islice(reader, chunk_size))
+            if not rows:
+                return
+            if any(len(row) != width for row in rows):
+                for index, row in enumerate(rows, start=number + 1):
+                    if row and len(row) != width:
+                        raise ValueError(f"Row {index} of {path} has {len(row)} columns; expected {width}.")
+                rows = [row for row in rows if row]
+            number += chunk_size
+            yield CsvRows(positions, rows, spec)
+
+
+def read_csv_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Yield household columns from a CSV file, ``chunk_size`` rows at a time.
+
+    Missing ``*_paid`` columns and empty numeric cells are read as 0, a missing ``year`` as
+    ``taxes.DEFAULT_YEAR`` and a missing ``filing_status`` as ``taxes.DEFAULT_FILING_STATUS``.
+
+    Yields:
+        dict[str, numpy.ndarray]: One array per name in ``INPUTS``.
+    """
+    for chunk in read_csv_rows(path, chunk_size):
+        yield chunk.columns()
+
+
+def read_parquet_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Yield household columns from a Parquet file, ``chunk_size`` rows at a time.
+
+    Yields:
+        dict[str, numpy.ndarray]: One array per name in ``INPUTS``.
+    """
+    import numpy as np
+    pyarrow = _require_pyarrow()
+
+    parquet_file = pyarrow.parquet.ParquetFile(path)
+    available = set(parquet_file.schema_arrow.names)
+    missing = [name for name in NUMERIC_INPUTS + ("state",) if name not in available]
+    if missing:
+        raise ValueError(f"Input is missing required columns: {', '.join(missing)}")
+
+    columns_to_read = [name for name in INPUTS if name in available]
+    for record_batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns_to_read):
+        columns = {}
+        for name in INPUTS:
+            if name not in available:
+                column = HOUSEHOLD_COLUMNS[name]
+                columns[name] = np.full(record_batch.num_rows, column.default, dtype=_DTYPES[column.type])
+            elif name == "state":
+                columns[name] = np.array(record_batch.column(name).to_pylist())
+            elif name == "filing_status":
+                column = record_batch.column(name).fill_null(taxes.DEFAULT_FILING_STATUS)
+                columns[name] = np.array(column.to_pylist())
+            elif name == "year":
+                column = record_batch.column(name).fill_null(taxes.DEFAULT_YEAR)
+                columns[name] = column.to_numpy(zero_copy_only=False).astype(np.int64)
+            else:
+                column = record_batch.column(name).fill_null(0)
+                columns[name] = column.to_numpy(zero_copy_only=False).astype(np.float64)
+        yield columns
+
+
+def read_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Yield input chunks: column dicts for Parquet, unparsed ``CsvRows`` for CSV.
+    """
+    if is_parquet(path):
+        return read_parquet_chunks(path, chunk_size)
+    return read_csv_rows(path, chunk_size)
+
+
+def evaluate_chunk(columns: dict, cents: bool = False) -> dict:
+    """
+    Evaluate one chunk of households and return the inputs followed by every ``Budget`` output.
+
+    With ``cents``, amounts are exact integer cents (see ``Budget.calculate_batch``).
+    """
+    results = taxes.Budget.calculate_batch(**columns, cents=cents)
+    return {**columns, **results}
+
+
+class CsvResultWriter:
+    def __init__(self, path: str):
+        self.file = open(path, "w", newline="")
+        self.file.write(self.encode_header())
+
+    @staticmethod
+    def encode_header() -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(OUTPUT_COLUMNS)
+        return buffer.getvalue()
+
+    @staticmethod
+    def encode(results: dict) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(zip(*(results[name].tolist() for name in OUTPUT_COLUMNS)))
+        return buffer.getvalue()
+
+    def write_encoded(self, text: str):
+        self.file.write(text)
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetResultWriter:
+    def __init__(self, path: str, cents: bool = False):
+        self.pyarrow = _require_pyarrow()
+        fields = [(name, self.pyarrow.string() if name in taxes.Budget.TEXT_INPUTS else
+                   self.pyarrow.int64() if name == "year" or (cents and name in CENTS_COLUMNS) else
+                   self.pyarrow.float64())
+                  for name in OUTPUT_COLUMNS]
+        self.writer = self.pyarrow.parquet.ParquetWriter(path, self.pyarrow.schema(fields))
+
+    @staticmethod
+    def encode(results: dict) -> dict:
+        return {name: results[name] for name in OUTPUT_COLUMNS}
+
+    def write_encoded(self, columns: dict):
+        self.writer.write_table(self.pyarrow.table(columns, schema=self.writer.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def open_writer(path: str, cents: bool = False):
+    return ParquetResultWriter(path, cents) if is_parquet(path) else CsvResultWriter(path)
+
+
+def process_chunk(chunk, writer, cents: bool = False) -> tuple:
+    """
+    Parse, evaluate and encode one input chunk; this is the unit of work sent to each worker.
+
+    Returns:
+        tuple: The encoded results and the number of households in the chunk.
+    """
+    columns = chunk.columns() if isinstance(chunk, CsvRows) else chunk
+    return writer.encode(evaluate_chunk(columns, cents)), len(columns["state"])
+
+
+def init_worker():
+    """
+    Build the NumPy tables of every bracket schedule once per worker process.
+
+    Only the default year is warmed; other years are compiled on first use and cached.
+    """
+    for level in ("federal", "state", "local", "payroll"):
+        for code in taxes.JURISDICTIONS.codes(level):
+            taxes.JURISDICTIONS.get(level, code).schedule.arrays()
+
+
+def map_ordered(executor, function, items, max_pending: int):
+    """
+    Like ``executor.map``, but keeps at most ``max_pending`` items in flight so memory stays bounded.
+    """
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(function, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def run_batch(input_path: str, output_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 1,
+              cents: bool = False) -> int:
+    """
+    Evaluate every household in ``input_path`` and stream the results to ``output_path``.
+
+    With ``workers`` > 1 the chunks are sharded across a process pool and written back in input
+    order, so the output is byte-identical to a single-process run. With ``cents``, every amount
+    is written as exact integer cents.
+
+    Returns:
+        int: The number of households processed.
+    """
+    if chunk_size <= 0:
+        raise ValueError("Chunk size must be positive.")
+    if workers <= 0:
+        raise ValueError("Workers must be positive.")
+
+    chunks = read_chunks(input_path, chunk_size)
+    writer = open_writer(output_path, cents)
+    # Workers get the writer's class, whose static encode needs no open file.
+    task = partial(process_chunk, writer=type(writer), cents=cents)
+
+    count = 0
+    try:
+        if workers == 1:
+            for encoded, size in map(task, chunks):
+                writer.write_encoded(encoded)
+                count += size
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+                for encoded, size in map_ordered(executor, task, chunks, max_pending=2 * workers):
+                    writer.write_encoded(encoded)
+                    count += size
+    finally:
+        writer.close()
+    return count
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m taxes batch",
+                                     description="Evaluate household budgets from a CSV or Parquet file.")
+    parser.add_argument("input", help="input CSV or Parquet file")
+    parser.add_argument("output", help="output CSV or Parquet file")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"households evaluated per chunk (default: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes; output is identical for any value (default: 1)")
+    parser.add_argument("--cents", action="store_true",
+                        help="compute and write amounts as exact integer cents")
+    args = parser.parse_args(argv)
+
+    count = run_batch(args.input, args.output, args.chunk_size, args.workers, args.cents)
+    print(f"Processed {count} households.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+"""
+Benchmarks for the Tax, Budget and report generation hot paths.
+
+Usage:
+    python benchmarks.py run [--output results.json] [--sizes 1 1000 1000000 10000000]
+    python benchmarks.py compare baseline.json results.json [--threshold 0.1]
+
+``run`` times every benchmark and stores the results as JSON together with environment
+metadata. ``compare`` reports the change of each benchmark against a saved baseline and exits
+with status 1 if any got slower by more than the threshold.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import taxes
+
+DEFAULT_SIZES = (1, 1000, 1000000, 10000000)
+DEFAULT_MAX_SCALAR = 1000000  # the scalar loop at 10^7 households takes minutes
+DEFAULT_THRESHOLD = 0.1
+HOUSEHOLD = (100000, 80000, 5000, 20000, 15000, "NY", 15000, 5000, 1000, 11000, 2600)
+
+
+def measure(function, repeat: int = 5, min_time: float = 0.2) -> dict:
+    """
+    Time ``function`` and return per-call statistics in seconds.
+
+    Calls are grouped into loops long enough to take about ``min_time`` each, and the loop is
+    repeated ``repeat`` times; the minimum is the most stable figure to compare across runs.
+    """
+    function()  # warm caches and lazy imports
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    timings = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        timings.append((time.perf_counter() - start) / loops)
+    return {"seconds": min(timings), "median": statistics.median(timings), "loops": loops, "repeat": repeat}
+
+
+def household_arrays(n: int, seed: int = 0) -> dict:
+    """
+    Random household inputs for ``n`` households, as ``Budget.calculate_batch`` arguments.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    return {
+        "income1": rng.uniform(0, 400000, n).round(2),
+        "income2": rng.uniform(0, 400000, n).round(2),
+        "other_income": rng.uniform(0, 10000, n).round(2),
+        "contr401k1": rng.uniform(0, 23000, n).round(2),
+        "contr401k2": rng.uniform(0, 23000, n).round(2),
+        "state": rng.choice(sorted(taxes.JURISDICTIONS.codes("state")), n),
+    }
+
+
+def bracket_benchmarks(sizes, max_scalar: int) -> dict:
+    """
+    Benchmarks of federal bracket evaluation, scalar loop vs vectorized batch.
+    """
+    def federal_inputs(n):
+        households = household_arrays(n)
+        return households["income1"] + households["income2"], households["contr401k1"] + households["contr401k2"]
+
+    def scalar_factory(n):
+        incomes, contr401k = (values.tolist() for values in federal_inputs(n))
+
+        def scalar():
+            for income, contr in zip(incomes, contr401k):
+                taxes.FederalTax(income, contr).calculate_tax()
+        return scalar
+
+    def batch_factory(n):
+        incomes, contr401k = federal_inputs(n)
+        return lambda: taxes.FederalTax.calculate_tax_batch(incomes, contr401k)
+
+    benchmarks = {}
+    for n in sizes:
+        if n <= max_scalar:
+            benchmarks[f"bracket_scalar[{n}]"] = (lambda n=n: scalar_factory(n), n)
+        benchmarks[f"bracket_batch[{n}]"] = (lambda n=n: batch_factory(n), n)
+    return benchmarks
+
+
+def budget_benchmarks() -> dict:
+    """
+    Benchmarks of the Budget accessors: with and without the cached breakdown, and for new budgets
+    served from a warm ResultCache.
+    """
+    def uncached():
+        budget = taxes.Budget(*HOUSEHOLD)
+        budget.total_tax()
+        budget.federal_tax_owed()
+        budget.eff_tax_rate()
+
+    def cached_factory():
+        budget = taxes.Budget(*HOUSEHOLD)
+
+        def cached():
+            budget.total_tax()
+            budget.federal_tax_owed()
+            budget.eff_tax_rate()
+        return cached
+
+    def result_cache_factory():
+        result_cache = taxes.ResultCache()
+
+        def result_cached():
+            previous, taxes.Budget.result_cache = taxes.Budget.result_cache, result_cache
+            try:
+                uncached()
+            finally:
+                taxes.Budget.result_cache = previous
+        return result_cached
+
+    return {"budget_total_tax_uncached": (lambda: uncached, 1), "budget_total_tax_cached": (cached_factory, 1),
+            "budget_total_tax_result_cache": (result_cache_factory, 1)}
+
+
+def sweep_benchmarks() -> dict:
+    """
+    Benchmarks of multi-state what-if sweeps.
+    """
+    states = sorted(taxes.JURISDICTIONS.codes("state"))
+    contributions = range(0, 23001, 500)
+    size = len(states) * len(contributions) ** 2
+
+    def factory():
+        budget = taxes.Budget(*HOUSEHOLD)
+        return lambda: budget.sweep(state=states, contr401k1=contributions, contr401k2=contributions)
+
+    return {f"sweep_states_401k[{size}]": (factory, size)}
+
+
+def simulation_benchmarks() -> dict:
+    """
+    Benchmarks of Monte Carlo income simulations for one client.
+    """
+    draws = 100_000
+
+    def factory():
+        budget = taxes.Budget(*HOUSEHOLD)
+        income1 = (HOUSEHOLD[0], taxes.NormalIncome(30000, 10000), taxes.LogNormalIncome(60000, 0.35))
+        return lambda: budget.simulate(draws=draws, seed=0, income1=income1)
+
+    return {f"simulate_incomes[{draws}]": (factory, draws)}
+
+
+def report_benchmarks() -> dict:
+    """
+    Benchmarks of report rendering, for one budget and for a batch of statements.
+    """
+    import io
+
+    import reports
+
+    statements = 1000
+
+    def cached_factory():
+        budget = taxes.Budget(*HOUSEHOLD)
+        return lambda: reports.render(budget)
+
+    def statements_factory(output_format):
+        budgets = [taxes.Budget(*HOUSEHOLD) for _ in range(statements)]
+        renderer = reports.ReportRenderer(output_format)
+        return lambda: renderer.write_statements(budgets, io.StringIO())
+
+    benchmarks = {
+        "report_cached_budget": (cached_factory, 1),
+        "report_new_budget": (lambda: lambda: reports.render(taxes.Budget(*HOUSEHOLD)), 1),
+    }
+    for output_format in reports.FORMATS:
+        benchmarks[f"report_statements_{output_format}[{statements}]"] = (
+            lambda output_format=output_format: statements_factory(output_format), statements)
+    return benchmarks
+
+
+def environment() -> dict:
+    metadata = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+    try:
+        import numpy
+        metadata["numpy"] = numpy.__version__
+    except ImportError:
+        metadata["numpy"] = None
+    try:
+        metadata["commit"] = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        metadata["commit"] = None
+    return metadata
+
+
+def run(sizes=DEFAULT_SIZES, max_scalar: int = DEFAULT_MAX_SCALAR, repeat: int = 5, pattern: str = None) -> dict:
+    """
+    Run every benchmark whose name contains ``pattern`` and return the results document.
+
+    Each benchmark is registered as a factory of the function to time, so inputs are only built
+    for the benchmarks selected, one at a time, and freed after each measurement.
+    """
+    benchmarks = {}
+    benchmarks.update(bracket_benchmarks(sizes, max_scalar))
+    benchmarks.update(budget_benchmarks())
+    benchmarks.update(sweep_benchmarks())
+    benchmarks.update(simulation_benchmarks())
+    benchmarks.update(report_benchmarks())
+
+    results = {}
+    for name, (factory, households) in benchmarks.items():
+        if pattern and pattern not in name:
+            continue
+        function = factory()
+        result = measure(function, repeat=repeat)
+        del function
+        result["households"] = households
+        result["per_household"] = result["seconds"] / households
+        results[name] = result
+        print(f"{name:<40} {result['seconds'] * 1e3:12.4f} ms  ({result['per_household'] * 1e9:10.1f} ns/household)",
+              file=sys.stderr)
+    return {"metadata": environment(), "results": results}
+
+
+def compare(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> list:
+    """
+    Compare two results documents.
+
+    Returns:
+        list[tuple]: (name, baseline seconds, current seconds, relative change, regressed) for every
+        benchmark present in both.
+    """
+    rows = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        before = baseline["results"][name]["seconds"]
+        after = result["seconds"]
+        change = after / before - 1 if before else 0.0
+        rows.append((name, before, after, change, change > threshold))
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the tax calculation hot paths.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--output", help="write results as JSON to this file")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                            help="household counts for bracket benchmarks")
+    run_parser.add_argument("--max-scalar", type=int, default=DEFAULT_MAX_SCALAR,
+                            help="largest household count to time with the scalar loop")
+    run_parser.add_argument("--repeat", type=int, default=5, help="timing repetitions per benchmark")
+    run_parser.add_argument("-k", dest="pattern", help="only run benchmarks whose name contains this")
+
+    compare_parser = commands.add_parser("compare", help="compare results against a baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                                help="relative slowdown flagged as a regression (default: 0.1)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        document = run(args.sizes, args.max_scalar, args.repeat, args.pattern)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(document, f, indent=2)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.threshold)
+    for name, before, after, change, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        print(f"{name:<40} {before * 1e3:12.4f} ms -> {after * 1e3:12.4f} ms  {change:+8.1%}  {flag}")
+    return 1 if any(row[-1] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
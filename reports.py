@@ -0,0 +1,341 @@
+"""
+Tax report rendering for household budgets, independent of the Tk interface.
+
+Every format is a set of section templates parsed once, at import, so rendering never
+re-parses a template. Rendering a budget reads its cached breakdowns into one
+dict of values and evaluates each section once, writing into a buffer that is reused from one
+household to the next, or straight to a file with ``write_statements``.
+
+Formats:
+    text: The calculator's plain-text report.
+    html: An HTML document with one ``<section>`` per household.
+    json: One JSON object per household, one per line in batches.
+"""
+from __future__ import annotations
+
+import html
+import io
+import json
+import threading
+from string import Formatter
+
+import taxes
+
+FORMATS = ("text", "html", "json")
+BRACKET_COMPONENTS = (("federal", "Federal"), ("state", "{state} State"))
+
+
+# str.format conversions allowed in templates.
+_CONVERSIONS = {"s": str, "r": repr, "a": ascii}
+
+
+class Template:
+    """
+    A ``str.format`` template parsed once into literal text and fields.
+
+    Fields must be plain names, looked up in the dict passed to ``render``, so rendering is one
+    ``format`` call per field with no re-parsing.
+    """
+    __slots__ = ("text", "segments")
+
+    def __init__(self, text: str):
+        segments = []  # (literal, field, spec, conversion); field is None after the last one
+        for literal, field, spec, conversion in Formatter().parse(text):
+            if field is not None and (not field.isidentifier() or "{" in spec or "}" in spec):
+                raise ValueError(f"Unsupported template field {field!r}.")
+            segments.append((literal, field, spec, _CONVERSIONS[conversion] if conversion else None))
+        self.text = text
+        self.segments = tuple(segments)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.text!r})"
+
+    def render(self, values: dict) -> str:
+        return "".join([literal if field is None else
+                        literal + format(values[field] if conversion is None else conversion(values[field]), spec)
+                        for literal, field, spec, conversion in self.segments])
+
+
+_RULE = "=" * 70
+_LINE = "-" * 50
+
+TEXT = {
+    "head": Template(f"""\
+{_RULE}
+                    TAX CALCULATION REPORT
+{_RULE}
+
+INCOME SUMMARY:
+{_LINE}
+Person 1 Income:              ${{income1:,.2f}}
+Person 2 Income:              ${{income2:,.2f}}
+Other Income:                 ${{other_income:,.2f}}
+Total Income:                 ${{total_income:,.2f}}
+
+DEDUCTIONS:
+{_LINE}
+Person 1 401k Contribution:   ${{contr401k1:,.2f}}
+Person 2 401k Contribution:   ${{contr401k2:,.2f}}
+Total 401k Contributions:     ${{contr401k:,.2f}}
+
+TAX CALCULATIONS:
+{_LINE}
+Federal Tax:                  ${{federal_tax:,.2f}}
+{{state}} State Tax:                  ${{state_tax:,.2f}}
+Local Tax ({{state}}):               ${{local_tax:,.2f}}
+Social Security Tax:          ${{social_sec_tax:,.2f}}
+Medicare Tax:                 ${{medicare_tax:,.2f}}
+Total Tax Liability:          ${{total_tax:,.2f}}
+
+TAX BY BRACKET:
+{_LINE}
+"""),
+    "bracket": Template("{label_rate:<30}${tax:,.2f} on ${income:,.2f}\n"),
+    "rate": Template("""
+Effective Tax Rate:           {eff_tax_rate}%
+
+"""),
+    "paid": Template(f"""\
+TAXES ALREADY PAID:
+{_LINE}
+Federal Tax Paid:             ${{fed_tax_paid:,.2f}}
+State Tax Paid:               ${{state_tax_paid:,.2f}}
+Local Tax Paid:               ${{local_tax_paid:,.2f}}
+Social Security Tax Paid:     ${{social_sec_tax_paid:,.2f}}
+Medicare Tax Paid:            ${{medicare_tax_paid:,.2f}}
+Total Taxes Paid:             ${{total_paid:,.2f}}
+
+AMOUNT OWED/REFUND:
+{_LINE}
+Federal Tax Owed:             ${{federal_tax_owed:,.2f}}
+State Tax Owed:               ${{state_tax_owed:,.2f}}
+Local Tax Owed:               ${{local_tax_owed:,.2f}}
+Total Amount Owed:            ${{total_owed:,.2f}}
+
+"""),
+    "refund": Template("🎉 REFUND EXPECTED!\n*** You may be due a refund of ${refund:,.2f} ***\n"),
+    "owed": Template("💰 AMOUNT OWED:\n*** You owe ${total_owed:,.2f} in taxes ***\n"),
+    "settled": Template("✅ TAXES FULLY PAID:\n*** Your tax liability is fully paid ***\n"),
+    "foot": Template(f"""
+{_RULE}
+Note: This is an estimate. Please consult a tax professional
+for official tax advice.
+{_RULE}"""),
+}
+
+HTML_PROLOGUE = """\
+<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Tax Calculation Report</title>
+</head>
+<body>
+"""
+HTML_EPILOGUE = "</body>\n</html>\n"
+
+HTML = {
+    "head": Template("""\
+<section class="statement">
+<h1>Tax Calculation Report</h1>
+<h2>Income Summary</h2>
+<table>
+<tr><th>Person 1 Income</th><td>${income1:,.2f}</td></tr>
+<tr><th>Person 2 Income</th><td>${income2:,.2f}</td></tr>
+<tr><th>Other Income</th><td>${other_income:,.2f}</td></tr>
+<tr><th>Total Income</th><td>${total_income:,.2f}</td></tr>
+</table>
+<h2>Deductions</h2>
+<table>
+<tr><th>Person 1 401k Contribution</th><td>${contr401k1:,.2f}</td></tr>
+<tr><th>Person 2 401k Contribution</th><td>${contr401k2:,.2f}</td></tr>
+<tr><th>Total 401k Contributions</th><td>${contr401k:,.2f}</td></tr>
+</table>
+<h2>Tax Calculations</h2>
+<table>
+<tr><th>Federal Tax</th><td>${federal_tax:,.2f}</td></tr>
+<tr><th>{state} State Tax</th><td>${state_tax:,.2f}</td></tr>
+<tr><th>Local Tax</th><td>${local_tax:,.2f}</td></tr>
+<tr><th>Social Security Tax</th><td>${social_sec_tax:,.2f}</td></tr>
+<tr><th>Medicare Tax</th><td>${medicare_tax:,.2f}</td></tr>
+<tr><th>Total Tax Liability</th><td>${total_tax:,.2f}</td></tr>
+</table>
+<h2>Tax by Bracket</h2>
+<table>
+<tr><th>Bracket</th><th>Rate</th><th>Income</th><th>Tax</th></tr>
+"""),
+    "bracket": Template("<tr><td>{label}</td><td>{rate:.2%}</td><td>${income:,.2f}</td>"
+                        "<td>${tax:,.2f}</td></tr>\n"),
+    "rate": Template("""\
+</table>
+<p>Effective Tax Rate: {eff_tax_rate}%</p>
+"""),
+    "paid": Template("""\
+<h2>Taxes Already Paid</h2>
+<table>
+<tr><th>Federal Tax Paid</th><td>${fed_tax_paid:,.2f}</td></tr>
+<tr><th>State Tax Paid</th><td>${state_tax_paid:,.2f}</td></tr>
+<tr><th>Local Tax Paid</th><td>${local_tax_paid:,.2f}</td></tr>
+<tr><th>Social Security Tax Paid</th><td>${social_sec_tax_paid:,.2f}</td></tr>
+<tr><th>Medicare Tax Paid</th><td>${medicare_tax_paid:,.2f}</td></tr>
+<tr><th>Total Taxes Paid</th><td>${total_paid:,.2f}</td></tr>
+</table>
+<h2>Amount Owed/Refund</h2>
+<table>
+<tr><th>Federal Tax Owed</th><td>${federal_tax_owed:,.2f}</td></tr>
+<tr><th>State Tax Owed</th><td>${state_tax_owed:,.2f}</td></tr>
+<tr><th>Local Tax Owed</th><td>${local_tax_owed:,.2f}</td></tr>
+<tr><th>Total Amount Owed</th><td>${total_owed:,.2f}</td></tr>
+</table>
+"""),
+    "refund": Template("<p><strong>You may be due a refund of ${refund:,.2f}</strong></p>\n"),
+    "owed": Template("<p><strong>You owe ${total_owed:,.2f} in taxes</strong></p>\n"),
+    "settled": Template("<p><strong>Your tax liability is fully paid</strong></p>\n"),
+    "foot": Template("<p>Note: This is an estimate. Please consult a tax professional for official tax advice.</p>\n"
+                     "</section>\n"),
+}
+
+
+def report_values(budget: taxes.Budget) -> dict:
+    """
+    Every value a report shows, read from the budget's cached breakdowns.
+
+    Returns:
+        dict: The budget inputs, every name in ``Budget.OUTPUTS``, the totals paid and owed, and
+        ``brackets``: (label, rate, income, tax) for every federal and state bracket with income.
+    """
+    # The bracket breakdowns come first: they cache each component's liability from the same
+    # bracket walk, so breakdown() below does not search the federal and state brackets again.
+    bracket_breakdowns = [(component, name, budget.bracket_breakdown(component))
+                          for component, name in BRACKET_COMPONENTS]
+    values = budget.household()._asdict()
+    breakdown = budget.breakdown()
+    values.update(total_income=budget.total_income, federal_tax=breakdown.federal, state_tax=breakdown.state,
+                  local_tax=breakdown.local, social_sec_tax=breakdown.social_security,
+                  medicare_tax=breakdown.medicare, total_tax=breakdown.total, eff_tax_rate=budget.eff_tax_rate(),
+                  federal_tax_owed=budget.federal_tax_owed(), state_tax_owed=budget.state_tax_owed(),
+                  local_tax_owed=budget.local_tax_owed())
+    values["contr401k"] = budget.contr401k1 + budget.contr401k2
+    values["total_paid"] = sum(values[name] for name in taxes.Budget.PAID)
+    values["total_owed"] = values["federal_tax_owed"] + values["state_tax_owed"] + values["local_tax_owed"]
+    values["refund"] = abs(values["total_owed"])
+
+    brackets = []
+    for component, name, breakdowns in bracket_breakdowns:
+        name = name.format(state=budget.state)
+        for number, bracket_breakdown in enumerate(breakdowns, start=1):
+            label = f"{name} (return {number})" if len(breakdowns) > 1 else name
+            for income, tax in zip(bracket_breakdown.income, bracket_breakdown.tax):
+                if income > 0:
+                    brackets.append((label, tax / income, income, tax))
+    values["brackets"] = brackets
+    return values
+
+
+class ReportRenderer:
+    """
+    Renders budgets in one format, reusing a single buffer across households.
+    """
+
+    def __init__(self, output_format: str = "text"):
+        if output_format not in FORMATS:
+            raise ValueError(f"Unknown report format {output_format}; expected any of {', '.join(FORMATS)}.")
+        self.output_format = output_format
+        self._buffer = io.StringIO()
+        self._encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+    def render(self, budget: taxes.Budget) -> str:
+        """
+        The complete report of one budget; an HTML report is a whole document.
+        """
+        buffer = self._buffer
+        buffer.seek(0)
+        buffer.truncate()
+        if self.output_format == "html":
+            buffer.write(HTML_PROLOGUE)
+        self.write(budget, buffer)
+        if self.output_format == "html":
+            buffer.write(HTML_EPILOGUE)
+        return buffer.getvalue()
+
+    def write(self, budget: taxes.Budget, file):
+        """
+        Write the statement of one budget to ``file``; HTML is written without the document prologue.
+        """
+        values = report_values(budget)
+        brackets = values["brackets"]
+        if self.output_format == "json":
+            values["brackets"] = [dict(zip(("label", "rate", "income", "tax"), bracket)) for bracket in brackets]
+            file.write(self._encoder.encode(values))
+            return
+
+        write = file.write
+        if self.output_format == "text":
+            templates = TEXT
+            rows = ({"label_rate": f"{label} at {rate:.2%}:", "income": income, "tax": tax}
+                    for label, rate, income, tax in brackets)
+        else:
+            templates = HTML
+            values["state"] = html.escape(values["state"])
+            rows = ({"label": html.escape(label), "rate": rate, "income": income, "tax": tax}
+                    for label, rate, income, tax in brackets)
+        write(templates["head"].render(values))
+        bracket = templates["bracket"]
+        for row in rows:
+            write(bracket.render(row))
+        write(templates["rate"].render(values))
+        if any(values[name] for name in taxes.Budget.PAID):
+            write(templates["paid"].render(values))
+            total_owed = values["total_owed"]
+            write(templates["refund" if total_owed < 0 else "owed" if total_owed > 0 else "settled"].render(values))
+        write(templates["foot"].render(values))
+
+    def write_statements(self, budgets, file) -> int:
+        """
+        Stream the statements of many budgets to ``file``.
+
+        Text statements are separated by a form feed, HTML ones share one document, and JSON
+        statements are written one per line.
+
+        Returns:
+            int: The number of statements written.
+        """
+        count = 0
+        if self.output_format == "html":
+            file.write(HTML_PROLOGUE)
+        for budget in budgets:
+            if count and self.output_format == "text":
+                file.write("\n\f\n")
+            self.write(budget, file)
+            if self.output_format == "json":
+                file.write("\n")
+            count += 1
+        if self.output_format == "html":
+            file.write(HTML_EPILOGUE)
+        return count
+
+
+_renderers = threading.local()  # one renderer per format and thread, so buffers are never shared
+
+
+def render(budget: taxes.Budget, output_format: str = "text") -> str:
+    """
+    Render one budget, reusing this thread's renderer for the format.
+    """
+    renderers = _renderers.__dict__
+    if output_format not in renderers:
+        renderers[output_format] = ReportRenderer(output_format)
+    return renderers[output_format].render(budget)
+
+
+def write_statements(budgets, path: str, output_format: str = "text") -> int:
+    """
+    Write the statements of many budgets to the file at ``path``.
+
+    ``budgets`` may be any iterable of budgets, such as ``map(taxes.Budget.from_household, frame)``.
+
+    Returns:
+        int: The number of statements written.
+    """
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        return ReportRenderer(output_format).write_statements(budgets, f)
@@ -0,0 +1,385 @@
+"""
+A long-running calculation service that coalesces concurrent requests into vectorized batches.
+
+Every request becomes one or more household rows; rows of requests arriving within the batch
+window are evaluated together by a single ``taxes.Budget.calculate_batch`` call, and each request
+gets its own slice of the results back. A wider window or larger batches raise throughput under
+load at the cost of latency. Bracket schedules are compiled once at startup and stay warm.
+
+Endpoints (POST, JSON body of ``Budget`` constructor arguments, as for ``python -m taxes``):
+    /budget           every output for the household.
+    /compare-states   the household in each of ``states`` (default: every supported state).
+    /sweep            the household over the Cartesian product of ``axes`` ({input: [values]}).
+    /stats            (GET) requests, batches and rows evaluated so far.
+
+Usage:
+    python -m taxes serve [--host HOST] [--port PORT | --unix PATH] [--batch-window MS] [--max-batch-size N]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+from http import HTTPStatus
+
+import batch
+import taxes
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_BATCH_WINDOW = 0.002  # seconds to wait for more requests after the first of a batch
+DEFAULT_MAX_BATCH_SIZE = 8192  # rows; a full batch is evaluated without waiting for the window
+DEFAULT_MAX_REQUEST_ROWS = 100_000
+MAX_BODY_SIZE = 1 << 20
+# Errors raised by invalid inputs deep in the calculation, such as a year too far out to project.
+INPUT_ERRORS = (TypeError, ValueError, ArithmeticError)
+
+
+class RequestError(ValueError):
+    """
+    A request that cannot be served, answered with ``status`` and the error message.
+    """
+
+    def __init__(self, message: str, status: HTTPStatus = HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.status = status
+
+
+def request_error(error: Exception) -> RequestError:
+    """
+    The ``RequestError`` answering an exception raised while serving a request: 400 for invalid
+    inputs, 500 for anything else.
+    """
+    if isinstance(error, RequestError):
+        return error
+    if isinstance(error, INPUT_ERRORS):
+        return RequestError(str(error))
+    return RequestError(f"Internal error: {error!r}", HTTPStatus.INTERNAL_SERVER_ERROR)
+
+
+def check_input(name: str, value):
+    """
+    Reject values JSON allows but a household cannot have: non-string codes, non-integer years
+    and amounts that are not finite numbers (``null``, booleans, or out of float range).
+    """
+    if name in taxes.Budget.TEXT_INPUTS:
+        if not isinstance(value, str):
+            raise RequestError(f"{name} must be a string.")
+    elif name == "year":
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise RequestError("year must be an integer.")
+    else:
+        try:
+            finite = isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+        except OverflowError:  # an integer beyond float range
+            finite = False
+        if not finite:
+            raise RequestError(f"{name} must be a finite number.")
+
+
+def household_columns(household: taxes.Household, size: int, **overrides) -> dict:
+    """
+    ``calculate_batch`` columns of ``size`` rows: ``overrides`` (arrays of that size) where given,
+    this household's values elsewhere.
+    """
+    import numpy as np
+
+    columns = {}
+    for name, value in household._asdict().items():
+        if name in overrides:
+            columns[name] = overrides[name]
+        elif name in taxes.Budget.TEXT_INPUTS:
+            columns[name] = np.full(size, str(value))
+        else:
+            columns[name] = np.full(size, value, dtype=np.int64 if name == "year" else np.float64)
+    return columns
+
+
+def evaluate(requests: list[dict]) -> list[dict]:
+    """
+    Evaluate the columns of several requests in one ``calculate_batch`` call and split the outputs.
+    """
+    import numpy as np
+
+    columns = requests[0] if len(requests) == 1 else {
+        name: np.concatenate([request[name] for request in requests]) for name in taxes.Budget.ARGUMENTS}
+    results = taxes.Budget.calculate_batch(**columns)
+    split, start = [], 0
+    for request in requests:
+        stop = start + len(request["state"])
+        split.append({name: values[start:stop] for name, values in results.items()})
+        start = stop
+    return split
+
+
+class MicroBatcher:
+    """
+    Collects request columns and evaluates them together once the batch window has passed since
+    the first pending request, or as soon as the pending rows reach ``max_batch_size``.
+
+    If a batch fails, its requests are evaluated one by one so only the invalid ones fail.
+    """
+
+    def __init__(self, window: float = DEFAULT_BATCH_WINDOW, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE):
+        if window < 0:
+            raise ValueError("Batch window cannot be negative.")
+        if max_batch_size <= 0:
+            raise ValueError("Max batch size must be positive.")
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.stats = {"requests": 0, "batches": 0, "rows": 0}
+        self._pending = []  # (columns, future)
+        self._rows = 0
+        self._timer = None
+
+    async def submit(self, columns: dict) -> dict:
+        """
+        Queue one request's columns and wait for its slice of the ``calculate_batch`` outputs.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((columns, future))
+        self._rows += len(columns["state"])
+        if self._rows >= self.max_batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self.flush)
+        return await future
+
+    def flush(self):
+        """
+        Evaluate every pending request now.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending, self._rows = self._pending, [], 0
+        pending = [(columns, future) for columns, future in pending if not future.cancelled()]
+        if not pending:
+            return
+        self.stats["requests"] += len(pending)
+        self.stats["batches"] += 1
+        self.stats["rows"] += sum(len(columns["state"]) for columns, _ in pending)
+        # Every pending future must be resolved, whatever the calculation raises, or its request hangs.
+        try:
+            results = evaluate([columns for columns, _ in pending])
+        except Exception as error:
+            if len(pending) == 1:
+                pending[0][1].set_exception(request_error(error))
+                return
+            results = []
+            for columns, future in pending:
+                try:
+                    results.extend(evaluate([columns]))
+                except Exception as error:
+                    future.set_exception(request_error(error))
+                    results.append(None)
+        for (_, future), result in zip(pending, results):
+            if result is not None:
+                future.set_result(result)
+
+
+def _records(columns: dict, results: dict, names=()) -> list[dict]:
+    """
+    One dict per row: the input columns in ``names`` followed by every output.
+    """
+    values = {name: columns[name].tolist() for name in names}
+    values.update((name, results[name].tolist()) for name in taxes.Budget.OUTPUTS)
+    return [dict(zip(values, row)) for row in zip(*values.values())]
+
+
+class BudgetServer:
+    """
+    The HTTP front end: parses requests, turns them into household rows and submits them to the batcher.
+    """
+    ROUTES = {"/budget": "budget", "/compare-states": "compare_states", "/sweep": "sweep"}
+
+    def __init__(self, window: float = DEFAULT_BATCH_WINDOW, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_request_rows: int = DEFAULT_MAX_REQUEST_ROWS):
+        self.batcher = MicroBatcher(window, max_batch_size)
+        self.max_request_rows = max_request_rows
+        self._encoder = json.JSONEncoder(separators=(",", ":"), allow_nan=False)
+
+    @staticmethod
+    def _household(payload: dict, **defaults) -> taxes.Household:
+        try:
+            household = taxes.budget_from_dict({**defaults, **payload}).household()
+        except (TypeError, ValueError) as error:
+            raise RequestError(str(error)) from None
+        for name, value in household._asdict().items():
+            check_input(name, value)
+        return household
+
+    def _columns(self, household: taxes.Household, size: int, **overrides) -> dict:
+        if size > self.max_request_rows:
+            raise RequestError(f"Request has {size} rows; at most {self.max_request_rows} are allowed.",
+                               HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        try:
+            return household_columns(household, size, **overrides)
+        except INPUT_ERRORS as error:
+            raise RequestError(str(error)) from None
+
+    async def budget(self, payload: dict) -> dict:
+        household = self._household(payload)
+        columns = self._columns(household, 1)
+        return _records(columns, await self.batcher.submit(columns))[0]
+
+    async def compare_states(self, payload: dict) -> dict:
+        import numpy as np
+
+        states = payload.pop("states", None) or sorted(taxes.JURISDICTIONS.codes("state"))
+        if isinstance(states, str) or not isinstance(states, list):
+            raise RequestError("states must be a list of state codes.")
+        for state in states:
+            check_input("state", state)
+        household = self._household(payload, state=states[0])
+        columns = self._columns(household, len(states), state=np.array(states, dtype=str))
+        records = _records(columns, await self.batcher.submit(columns))
+        return dict(zip(states, records))
+
+    async def sweep(self, payload: dict) -> dict:
+        import math
+
+        axes = payload.pop("axes", None)
+        if not isinstance(axes, dict) or not axes:
+            raise RequestError("axes must map inputs to lists of values.")
+        if any(not isinstance(values, list) or not values for values in axes.values()):
+            raise RequestError("Sweep axes must be non-empty lists.")
+        for name, values in axes.items():
+            if name in taxes.Budget.ARGUMENTS:
+                for value in values:
+                    check_input(name, value)
+
+        shape = tuple(len(values) for values in axes.values())
+        size = math.prod(shape)
+        if size > self.max_request_rows:
+            raise RequestError(f"Sweep has {size} cells; at most {self.max_request_rows} are allowed.",
+                               HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        try:
+            shape, grid = taxes.Budget.sweep_grid(**axes)
+        except INPUT_ERRORS as error:
+            raise RequestError(str(error)) from None
+        household = self._household(payload, **{name: values[0] for name, values in axes.items()})
+        columns = self._columns(household, size, **grid)
+        records = _records(columns, await self.batcher.submit(columns), names=tuple(axes))
+        return {"axes": list(axes), "shape": list(shape), "results": records}
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> tuple[HTTPStatus, dict]:
+        """
+        Serve one request.
+
+        Returns:
+            tuple[HTTPStatus, dict]: The response status and JSON body.
+        """
+        if path == "/stats":
+            return HTTPStatus.OK, dict(self.batcher.stats)
+        if path not in self.ROUTES:
+            return HTTPStatus.NOT_FOUND, {
+                "error": f"Unknown endpoint {path}; expected any of {', '.join(self.ROUTES)}."}
+        if method != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": f"{path} only accepts POST."}
+        try:
+            payload = json.loads(body or b"{}")
+            if not isinstance(payload, dict):
+                raise RequestError("Request body must be a JSON object.")
+            return HTTPStatus.OK, await getattr(self, self.ROUTES[path])(payload)
+        except json.JSONDecodeError as error:
+            return HTTPStatus.BAD_REQUEST, {"error": f"Invalid JSON: {error.msg}"}
+        except Exception as error:
+            error = request_error(error)
+            return error.status, {"error": str(error)}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Serve HTTP/1.1 requests on one connection until the client closes it or asks to.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_SIZE:
+                    status, payload = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Request body is too large."}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.dispatch(method.upper(), target.split("?", 1)[0], body)
+                    keep_alive = headers.get("connection", "").lower() != "close" if version == "HTTP/1.1" else \
+                        headers.get("connection", "").lower() == "keep-alive"
+
+                try:
+                    content = self._encoder.encode(payload).encode()
+                except ValueError as error:
+                    status = HTTPStatus.INTERNAL_SERVER_ERROR
+                    content = self._encoder.encode({"error": f"Result is not valid JSON: {error}"}).encode()
+                head = (f"HTTP/1.1 {status.value} {status.phrase}\r\nContent-Type: application/json\r\n"
+                        f"Content-Length: {len(content)}\r\n"
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+                writer.write(head.encode("latin-1") + content)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, unix_path: str = None):
+        """
+        Start listening on a TCP port, or on a Unix socket if ``unix_path`` is given.
+
+        Returns:
+            asyncio.Server: The listening server.
+        """
+        batch.init_worker()  # compile every default-year schedule before the first request
+        if unix_path:
+            return await asyncio.start_unix_server(self.handle_connection, unix_path)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+async def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, unix_path: str = None,
+                window: float = DEFAULT_BATCH_WINDOW, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE):
+    """
+    Run the calculation service until cancelled.
+    """
+    server = await BudgetServer(window, max_batch_size).start(host, port, unix_path)
+    address = unix_path or "http://{}:{}".format(*server.sockets[0].getsockname()[:2])
+    print(f"Serving budgets on {address}", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m taxes serve",
+                                     description="Serve budget calculations over HTTP, batching concurrent requests.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"TCP port (default: {DEFAULT_PORT})")
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--batch-window", type=float, default=DEFAULT_BATCH_WINDOW * 1000,
+                        help=f"milliseconds to wait for more requests per batch "
+                             f"(default: {DEFAULT_BATCH_WINDOW * 1000:g})")
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help=f"rows per batch at most before evaluating early (default: {DEFAULT_MAX_BATCH_SIZE})")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.batch_window / 1000, args.max_batch_size))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
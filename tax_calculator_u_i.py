@@ -1,9 +1,15 @@
+import queue
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import ttk, messagebox
+import reports
 import taxes
 
 
 class TaxCalculatorUI:
+    LIVE_UPDATE_DELAY_MS = 300  # debounce for live updates while typing
+    POLL_INTERVAL_MS = 50  # how often finished background calculations are picked up
+
     def __init__(self, root):
         self.root = root
         self.root.title("Tax Calculator")
@@ -14,7 +20,20 @@ class TaxCalculatorUI:
         style = ttk.Style()
         style.theme_use('clam')
         
+        self.live_budget = None
+        self._pending_update = None
+        self._report_lines = []
+
+        # Calculations run on a single worker thread; results come back through a queue that
+        # the Tk main loop polls, since widgets may only be touched from the main thread.
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tax-calculator")
+        self.results_queue = queue.Queue()
+        self._request_id = 0
+        self._pending_future = None
+
         self.create_widgets()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+        self.root.after(self.POLL_INTERVAL_MS, self.poll_results)
         
     def create_widgets(self):
         # Create a main paned window for better layout control
@@ -61,7 +80,7 @@ class TaxCalculatorUI:
         
         ttk.Label(input_frame, text="State:").grid(row=5, column=0, sticky=tk.W, pady=3)
         self.state_var = tk.StringVar(value="PA")
-        state_combo = ttk.Combobox(input_frame, textvariable=self.state_var, values=["PA", "NY"], 
+        state_combo = ttk.Combobox(input_frame, textvariable=self.state_var, values=sorted(taxes.JURISDICTIONS.codes("state")), 
                                   state="readonly", width=17)
         state_combo.grid(row=5, column=1, sticky=tk.W, padx=5, pady=3)
         
@@ -101,6 +120,18 @@ class TaxCalculatorUI:
         # Clear button
         clear_button = ttk.Button(button_frame, text="Clear All", command=self.clear_all)
         clear_button.grid(row=0, column=1, padx=5)
+
+        # Live update toggle: recalculate as fields are edited
+        self.live_update_var = tk.BooleanVar(value=False)
+        live_check = ttk.Checkbutton(button_frame, text="Live update", variable=self.live_update_var,
+                                     command=self.toggle_live_update)
+        live_check.grid(row=1, column=0, columnspan=2, pady=(10, 0))
+
+        self.status_var = tk.StringVar(value="")
+        ttk.Label(left_frame, textvariable=self.status_var, foreground="red").grid(row=4, column=0, columnspan=2)
+
+        for var in self.input_vars().values():
+            var.trace_add("write", self.on_input_changed)
         
         # Results section (RIGHT SIDE)
         results_title = ttk.Label(right_frame, text="Tax Calculation Results", font=('Arial', 14, 'bold'))
@@ -136,139 +167,151 @@ class TaxCalculatorUI:
         except ValueError:
             return 0.0
     
+    def input_vars(self):
+        """Map each taxes.Budget argument to the variable holding its value."""
+        return {
+            "income1": self.income1_var,
+            "income2": self.income2_var,
+            "other_income": self.other_income_var,
+            "contr401k1": self.contrib401k1_var,
+            "contr401k2": self.contrib401k2_var,
+            "state": self.state_var,
+            "fed_tax_paid": self.fed_paid_var,
+            "state_tax_paid": self.state_paid_var,
+            "local_tax_paid": self.local_paid_var,
+            "social_sec_tax_paid": self.ss_paid_var,
+            "medicare_tax_paid": self.medicare_paid_var,
+        }
+
+    def read_inputs(self):
+        """Read every input field as a taxes.Budget keyword argument."""
+        return {name: var.get() if name == "state" else self.get_float_value(var)
+                for name, var in self.input_vars().items()}
+
+    def run_in_background(self, function, *args, on_result, on_error=None):
+        """
+        Run function(*args) on the worker thread and deliver its result on the Tk main loop.
+
+        Starting a new request cancels the previous one: if it has not started it never runs,
+        and if it is already running its result is discarded.
+        """
+        self.cancel_pending()
+        request_id = self._request_id
+
+        def task():
+            try:
+                outcome = (on_result, function(*args))
+            except Exception as e:
+                outcome = (on_error, e)
+            self.results_queue.put((request_id, *outcome))
+
+        self._pending_future = self.executor.submit(task)
+        self.status_var.set("Calculating...")
+
+    def cancel_pending(self):
+        """Cancel the outstanding background request, if any."""
+        self._request_id += 1
+        if self._pending_future is not None:
+            self._pending_future.cancel()
+            self._pending_future = None
+            self.status_var.set("")
+
+    def poll_results(self):
+        """Hand finished background results to their callbacks, dropping stale ones."""
+        try:
+            while True:
+                request_id, callback, value = self.results_queue.get_nowait()
+                if request_id != self._request_id:
+                    continue
+                self._pending_future = None
+                self.status_var.set("")
+                if callback is not None:
+                    callback(value)
+        except queue.Empty:
+            pass
+        self.root.after(self.POLL_INTERVAL_MS, self.poll_results)
+
+    def close(self):
+        """Stop the worker thread and close the window."""
+        self.cancel_pending()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+
+    def build_report(self, inputs, reuse_budget):
+        """
+        Build the tax report for the given inputs. Runs on the worker thread.
+
+        With reuse_budget, the previous budget is updated in place so only the tax components whose
+        inputs changed are recalculated.
+        """
+        if reuse_budget and self.live_budget is not None:
+            for name, value in inputs.items():
+                setattr(self.live_budget, name, value)
+        else:
+            self.live_budget = taxes.Budget(**inputs)
+        return self.generate_tax_report(self.live_budget)
+
     def calculate_taxes(self):
         """Calculate taxes and display results."""
-        try:
-            # Get input values
-            income1 = self.get_float_value(self.income1_var)
-            income2 = self.get_float_value(self.income2_var)
-            other_income = self.get_float_value(self.other_income_var)
-            contrib401k1 = self.get_float_value(self.contrib401k1_var)
-            contrib401k2 = self.get_float_value(self.contrib401k2_var)
-            state = self.state_var.get()
-            
-            # Get already paid taxes
-            fed_paid = self.get_float_value(self.fed_paid_var)
-            state_paid = self.get_float_value(self.state_paid_var)
-            local_paid = self.get_float_value(self.local_paid_var)
-            ss_paid = self.get_float_value(self.ss_paid_var)
-            medicare_paid = self.get_float_value(self.medicare_paid_var)
-            
-            # Create budget object
-            budget = taxes.Budget(
-                income1, income2, other_income, contrib401k1, contrib401k2, state,
-                fed_paid, state_paid, local_paid, ss_paid, medicare_paid
-            )
-            
-            # Clear previous results
-            self.results_text.config(state=tk.NORMAL)
-            self.results_text.delete(1.0, tk.END)
-            
-            # Generate detailed report
-            report = self.generate_tax_report(budget)
-            
-            # Display results
-            self.results_text.insert(tk.END, report)
-            self.results_text.config(state=tk.DISABLED)
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while calculating taxes:\n{str(e)}")
+        self.run_in_background(self.build_report, self.read_inputs(), False,
+                               on_result=self.show_report, on_error=self.show_error)
+
+    def show_error(self, error):
+        messagebox.showerror("Error", f"An error occurred while calculating taxes:\n{str(error)}")
+
+    def show_report(self, report):
+        """Replace the whole results text with the report."""
+        self.results_text.config(state=tk.NORMAL)
+        self.results_text.delete(1.0, tk.END)
+        self.results_text.insert(tk.END, report)
+        self.results_text.config(state=tk.DISABLED)
+        self._report_lines = report.split("\n")
+
+    def patch_report(self, report):
+        """Rewrite only the lines of the results text that differ from the displayed report."""
+        lines = report.split("\n")
+        if len(lines) != len(self._report_lines):
+            self.show_report(report)
+            return
+
+        self.results_text.config(state=tk.NORMAL)
+        for number, (old_line, new_line) in enumerate(zip(self._report_lines, lines), start=1):
+            if old_line != new_line:
+                self.results_text.delete(f"{number}.0", f"{number}.end")
+                self.results_text.insert(f"{number}.0", new_line)
+        self.results_text.config(state=tk.DISABLED)
+        self._report_lines = lines
+
+    def toggle_live_update(self):
+        """Start recalculating on every edit when live update is switched on."""
+        if self.live_update_var.get():
+            self.live_update()
+
+    def on_input_changed(self, *args):
+        """Debounce field edits so a live update runs once typing pauses."""
+        # Whatever is being calculated now is for inputs that no longer match the form
+        self.cancel_pending()
+        if not self.live_update_var.get():
+            return
+        if self._pending_update is not None:
+            self.root.after_cancel(self._pending_update)
+        self._pending_update = self.root.after(self.LIVE_UPDATE_DELAY_MS, self.live_update)
+
+    def live_update(self):
+        """
+        Recalculate after an edit, reusing the previous budget.
+
+        Only the tax components whose inputs changed are recomputed, and only the changed report
+        lines are redrawn.
+        """
+        self._pending_update = None
+        # Keep the last good report while the user is mid-edit
+        self.run_in_background(self.build_report, self.read_inputs(), True, on_result=self.patch_report,
+                               on_error=lambda e: self.status_var.set(f"Error: {e}"))
     
     def generate_tax_report(self, budget):
         """Generate a detailed tax report."""
-        report = []
-        report.append("=" * 70)
-        report.append("                    TAX CALCULATION REPORT")
-        report.append("=" * 70)
-        report.append("")
-        
-        # Income Summary
-        report.append("INCOME SUMMARY:")
-        report.append("-" * 50)
-        report.append(f"Person 1 Income:              ${budget.income1:,.2f}")
-        report.append(f"Person 2 Income:              ${budget.income2:,.2f}")
-        report.append(f"Other Income:                 ${budget.other_income:,.2f}")
-        report.append(f"Total Income:                 ${budget.total_income:,.2f}")
-        report.append("")
-        
-        # Deductions
-        report.append("DEDUCTIONS:")
-        report.append("-" * 50)
-        report.append(f"Person 1 401k Contribution:   ${budget.contr401k1:,.2f}")
-        report.append(f"Person 2 401k Contribution:   ${budget.contr401k2:,.2f}")
-        report.append(f"Total 401k Contributions:     ${budget.contr401k1 + budget.contr401k2:,.2f}")
-        report.append("")
-        
-        # Tax Calculations
-        report.append("TAX CALCULATIONS:")
-        report.append("-" * 50)
-        federal_tax = budget.federal_tax()
-        state_tax = budget.state_tax()
-        local_tax = budget.local_tax()
-        ss_tax = budget.social_sec_tax()
-        medicare_tax = budget.medicare_tax()
-        total_tax = budget.total_tax()
-        
-        report.append(f"Federal Tax:                  ${federal_tax:,.2f}")
-        report.append(f"{budget.state} State Tax:                  ${state_tax:,.2f}")
-        report.append(f"Local Tax (PA):               ${local_tax:,.2f}")
-        report.append(f"Social Security Tax:          ${ss_tax:,.2f}")
-        report.append(f"Medicare Tax:                 ${medicare_tax:,.2f}")
-        report.append(f"Total Tax Liability:          ${total_tax:,.2f}")
-        report.append("")
-        
-        # Effective tax rate
-        eff_rate = budget.eff_tax_rate()
-        report.append(f"Effective Tax Rate:           {eff_rate}%")
-        report.append("")
-        
-        # Taxes already paid
-        if any([budget.fed_tax_paid, budget.state_tax_paid, budget.local_tax_paid, 
-                budget.social_sec_tax_paid, budget.medicare_tax_paid]):
-            report.append("TAXES ALREADY PAID:")
-            report.append("-" * 50)
-            report.append(f"Federal Tax Paid:             ${budget.fed_tax_paid:,.2f}")
-            report.append(f"State Tax Paid:               ${budget.state_tax_paid:,.2f}")
-            report.append(f"Local Tax Paid:               ${budget.local_tax_paid:,.2f}")
-            report.append(f"Social Security Tax Paid:     ${budget.social_sec_tax_paid:,.2f}")
-            report.append(f"Medicare Tax Paid:            ${budget.medicare_tax_paid:,.2f}")
-            total_paid = (budget.fed_tax_paid + budget.state_tax_paid + budget.local_tax_paid + 
-                         budget.social_sec_tax_paid + budget.medicare_tax_paid)
-            report.append(f"Total Taxes Paid:             ${total_paid:,.2f}")
-            report.append("")
-            
-            # Amount owed or refund
-            report.append("AMOUNT OWED/REFUND:")
-            report.append("-" * 50)
-            fed_owed = budget.federal_tax_owed()
-            state_owed = budget.state_tax_owed()
-            local_owed = budget.local_tax_owed()
-            
-            report.append(f"Federal Tax Owed:             ${fed_owed:,.2f}")
-            report.append(f"State Tax Owed:               ${state_owed:,.2f}")
-            report.append(f"Local Tax Owed:               ${local_owed:,.2f}")
-            
-            total_owed = fed_owed + state_owed + local_owed
-            report.append(f"Total Amount Owed:            ${total_owed:,.2f}")
-            report.append("")
-            
-            if total_owed < 0:
-                report.append("🎉 REFUND EXPECTED!")
-                report.append(f"*** You may be due a refund of ${abs(total_owed):,.2f} ***")
-            elif total_owed > 0:
-                report.append("💰 AMOUNT OWED:")
-                report.append(f"*** You owe ${total_owed:,.2f} in taxes ***")
-            else:
-                report.append("✅ TAXES FULLY PAID:")
-                report.append("*** Your tax liability is fully paid ***")
-        
-        report.append("")
-        report.append("=" * 70)
-        report.append("Note: This is an estimate. Please consult a tax professional")
-        report.append("for official tax advice.")
-        report.append("=" * 70)
-        
-        return "\n".join(report)
+        return reports.render(budget)
     
     def clear_all(self):
         """Clear all input fields and results."""
@@ -292,6 +335,7 @@ class TaxCalculatorUI:
         self.results_text.delete(1.0, tk.END)
         self.results_text.insert(tk.END, "Enter your income information on the left and click 'Calculate Taxes' to see your detailed tax report here.")
         self.results_text.config(state=tk.DISABLED)
+        self._report_lines = []
 
 
 def main():
@@ -1,176 +1,1459 @@
 
 from __future__ import annotations
 
+import json
+import math
+from bisect import bisect_left
+from collections.abc import Iterable
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+
+def _round_cents(values):
+    """
+    Round a float array to cents exactly the way the builtin ``round(value, 2)`` does.
+
+    ``numpy.round`` scales by 100 before rounding, which occasionally lands on the wrong cent.
+    Here the scaled value is split into its rounded product and exact error term, so half-cent
+    ties are detected on the true binary value and resolved to even like ``round``.
+    """
+    import numpy as np
+
+    values = np.asarray(values, dtype=np.float64)
+    scaled = values * 100
+    # Veltkamp split + Dekker product: scaled + error == values * 100 exactly.
+    split = values * 134217729.0
+    high = split - (split - values)
+    low = values - high
+    error = (high * 100 - scaled) + low * 100
+    cents = np.rint(scaled)
+    distance = scaled - cents
+    cents = np.where((distance == 0.5) & (error > 0), cents + 1, cents)
+    cents = np.where((distance == -0.5) & (error < 0), cents - 1, cents)
+    return np.where(np.isfinite(values), cents / 100, values)
+
+
+CENTS_INFINITY = 2 ** 63 - 1  # stands in for an unbounded bracket in integer-cent tables
+
+
+def to_cents(amount: float) -> int:
+    """
+    Convert a dollar amount to integer cents, rounding half to even.
+    """
+    if amount == float("inf"):
+        return CENTS_INFINITY
+    return round(amount * 100)
+
+
+def to_basis_points(rate: float) -> int:
+    """
+    Convert a decimal tax rate to integer basis points (1 bp = 0.0001).
+    """
+    basis_points = round(rate * 10000)
+    if abs(basis_points - rate * 10000) > 1e-6:
+        raise ValueError(f"Rate {rate} is not a whole number of basis points.")
+    return basis_points
+
+
+def round_units(units: int) -> int:
+    """
+    Round an amount in cents times basis points to whole cents, half to even.
+    """
+    cents, remainder = divmod(units, 10000)
+    if remainder * 2 > 10000 or (remainder * 2 == 10000 and cents % 2):
+        cents += 1
+    return cents
+
+
+def _to_cents_batch(amounts):
+    import numpy as np
+
+    cents = np.rint(np.asarray(amounts, dtype=np.float64) * 100)
+    if np.isposinf(cents).any():
+        cents = np.where(np.isposinf(cents), CENTS_INFINITY, cents)
+    return cents.astype(np.int64)
+
+
+def _to_basis_points_batch(rates):
+    import numpy as np
+
+    rates = np.asarray(rates, dtype=np.float64)
+    basis_points = np.rint(rates * 10000)
+    if (np.abs(basis_points - rates * 10000) > 1e-6).any():
+        raise ValueError("Rates must be whole numbers of basis points.")
+    return basis_points.astype(np.int64)
+
+
+def _round_units_batch(units):
+    import numpy as np
+
+    cents, remainder = np.divmod(units, 10000)
+    return cents + ((remainder * 2 > 10000) | ((remainder * 2 == 10000) & (cents % 2 == 1)))
+
+
+class BracketBreakdown(NamedTuple):
+    """
+    How a taxable income spreads over the brackets of a schedule.
+
+    For a single income ``income`` and ``tax`` are tuples with one unrounded amount per bracket;
+    for a batch they are arrays of shape (households, brackets) and ``top_bracket`` an int array.
+    """
+    income: tuple  # taxable income falling in each bracket
+    tax: tuple  # tax on the income in each bracket
+    top_bracket: int  # index of the highest bracket reached
+
+
+class BracketSchedule:
+    """
+    An immutable, precompiled set of progressive tax brackets.
+
+    The tax owed on every full bracket below each boundary is accumulated once at construction,
+    so a liability query is a binary search plus one multiply-add instead of a walk over all
+    lower brackets.
+    """
+
+    __slots__ = ("brackets", "rates", "lower", "cumulative", "bracket_rates", "_arrays", "_cents", "_cents_arrays")
+
+    def __init__(self, brackets: list[float], rates: list[float]):
+        """
+        Compile a bracket schedule.
+
+        Args:
+            brackets (list[float]): The tax brackets (limits for each tax tier), in ascending order.
+            rates (list[float]): The tax rates (as decimals) for each bracket.
+        """
+        if not brackets or not rates:
+            raise ValueError("Brackets and rates cannot be empty.")
+        if len(brackets) != len(rates):
+            raise ValueError("Brackets and rates must have the same length.")
+        if any(low > high for low, high in zip(brackets, brackets[1:])):
+            raise ValueError("Brackets must be in ascending order.")
+
+        # lower[k], bracket_rates[k] and cumulative[k] describe an income that lands in bracket k;
+        # index len(brackets) is the "income exceeds highest bracket" fallback.
+        lower = [0.0]
+        cumulative = [0.0]
+        tax = 0
+        previous_bracket = 0
+        for bracket, rate in zip(brackets, rates):
+            tax += (bracket - previous_bracket) * rate
+            previous_bracket = bracket
+            lower.append(bracket)
+            cumulative.append(tax)
+
+        set_attribute = super().__setattr__
+        set_attribute("brackets", tuple(brackets))
+        set_attribute("rates", tuple(rates))
+        set_attribute("lower", tuple(lower))
+        set_attribute("cumulative", tuple(cumulative))
+        set_attribute("bracket_rates", tuple(rates) + (rates[-1],))
+        set_attribute("_arrays", None)
+        set_attribute("_cents", None)
+        set_attribute("_cents_arrays", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.__class__.__name__} is immutable.")
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(brackets={self.brackets!r}, rates={self.rates!r})"
+
+    @classmethod
+    def compile(cls, brackets: list[float], rates: list[float]) -> BracketSchedule:
+        """
+        Return the shared compiled schedule for the given brackets and rates.
+
+        Schedules are cached by value, so every tax built from the same brackets reuses one object.
+        """
+        return _compile_schedule(tuple(brackets), tuple(rates))
+
+    def tax(self, taxable_income: float) -> float:
+        """
+        Calculate the unrounded tax on a single taxable income.
+        """
+        index = bisect_left(self.brackets, taxable_income)
+        return self.cumulative[index] + (taxable_income - self.lower[index]) * self.bracket_rates[index]
+
+    def tax_with_rates(self, taxable_income: float) -> tuple[float, float, float]:
+        """
+        Calculate the unrounded tax together with the marginal rates on either side of the income.
+
+        All three come from the same bracket search. At a bracket boundary the rate below is the
+        lower bracket's and the rate above the upper bracket's.
+
+        Returns:
+            tuple: The tax, the rate on the last dollar (0 at zero income) and the rate on the next dollar.
+        """
+        index = bisect_left(self.brackets, taxable_income)
+        tax = self.cumulative[index] + (taxable_income - self.lower[index]) * self.bracket_rates[index]
+        rate_below = self.bracket_rates[index] if taxable_income > 0 else 0.0
+        at_boundary = index < len(self.brackets) and taxable_income == self.brackets[index]
+        rate_above = self.bracket_rates[index + 1] if at_boundary else self.bracket_rates[index]
+        return tax, rate_below, rate_above
+
+    def tax_with_breakdown(self, taxable_income: float) -> tuple[float, BracketBreakdown]:
+        """
+        Calculate the unrounded tax together with its split over the brackets, from the same search.
+
+        Brackets below the one found are full and those above it empty, so only the bracket the
+        income lands in is partial. Income above a finite highest bracket counts toward that bracket.
+        """
+        index = bisect_left(self.brackets, taxable_income)
+        tax = self.cumulative[index] + (taxable_income - self.lower[index]) * self.bracket_rates[index]
+        top = min(index, len(self.brackets) - 1)
+        income = [self.brackets[k] - self.lower[k] for k in range(top)]
+        income.append(taxable_income - self.lower[top])
+        income.extend(0.0 for _ in range(top + 1, len(self.brackets)))
+        return tax, BracketBreakdown(tuple(income), tuple(amount * rate for amount, rate in zip(income, self.rates)),
+                                     top)
+
+    def tax_batch(self, taxable_incomes):
+        """
+        Calculate the unrounded tax on an array of taxable incomes.
+        """
+        import numpy as np
+
+        brackets, lower, cumulative, bracket_rates = self.arrays()
+        index = np.searchsorted(brackets, taxable_incomes, side="left")
+        with np.errstate(invalid="ignore"):
+            return cumulative[index] + (taxable_incomes - lower[index]) * bracket_rates[index]
+
+    def tax_with_rates_batch(self, taxable_incomes):
+        """
+        Vectorized ``tax_with_rates``: unrounded tax, rate below and rate above for each income.
+        """
+        import numpy as np
+
+        brackets, lower, cumulative, bracket_rates = self.arrays()
+        index = np.searchsorted(brackets, taxable_incomes, side="left")
+        with np.errstate(invalid="ignore"):
+            tax = cumulative[index] + (taxable_incomes - lower[index]) * bracket_rates[index]
+        rate_below = np.where(taxable_incomes > 0, bracket_rates[index], 0.0)
+        at_boundary = (index < len(brackets)) & (taxable_incomes == brackets[np.minimum(index, len(brackets) - 1)])
+        rate_above = bracket_rates[index + at_boundary]
+        return tax, rate_below, rate_above
+
+    def tax_with_breakdown_batch(self, taxable_incomes, out=None):
+        """
+        Vectorized ``tax_with_breakdown``: unrounded tax and the per-bracket breakdown of each income.
+
+        Args:
+            taxable_incomes (numpy.ndarray): Taxable incomes.
+            out (tuple, optional): Preallocated arrays for the per-bracket income and tax, shaped
+                ``taxable_incomes.shape + (len(brackets),)``; they are filled in place.
+
+        Returns:
+            tuple: The tax and a ``BracketBreakdown`` of arrays.
+        """
+        import numpy as np
+
+        brackets, lower, cumulative, bracket_rates = self.arrays()
+        index = np.searchsorted(brackets, taxable_incomes, side="left")
+        with np.errstate(invalid="ignore"):
+            tax = cumulative[index] + (taxable_incomes - lower[index]) * bracket_rates[index]
+
+        count = len(self.brackets)
+        if out is None:
+            shape = np.shape(taxable_incomes) + (count,)
+            out = np.empty(shape), np.empty(shape)
+        income, bracket_tax = out
+        # The last bracket is unbounded, since income above it is taxed at its rate.
+        widths = np.append(brackets[:-1] - lower[:count - 1], np.inf)
+        with np.errstate(invalid="ignore"):
+            np.subtract(np.expand_dims(taxable_incomes, -1), lower[:count], out=income)
+        np.clip(income, 0.0, widths, out=income)
+        np.multiply(income, bracket_rates[:count], out=bracket_tax)
+        return tax, BracketBreakdown(income, bracket_tax, np.minimum(index, count - 1))
+
+    def arrays(self):
+        """
+        Return the schedule as NumPy arrays, built once on first use.
+
+        Returns:
+            tuple: brackets, lower bounds, cumulative tax and rates per bracket index.
+        """
+        if self._arrays is None:
+            import numpy as np
+
+            arrays = tuple(np.array(values, dtype=np.float64)
+                           for values in (self.brackets, self.lower, self.cumulative, self.bracket_rates))
+            for array in arrays:
+                array.flags.writeable = False
+            super().__setattr__("_arrays", arrays)
+        return self._arrays
+
+    def cents_tables(self):
+        """
+        Return the schedule in integer cents and basis points, built once on first use.
+
+        Cumulative tax is kept in cents times basis points, so it is exact and only the final
+        liability is rounded.
+
+        Returns:
+            tuple: brackets, lower bounds and cumulative tax in cents, and rates in basis points.
+        """
+        if self._cents is None:
+            brackets = tuple(to_cents(bracket) for bracket in self.brackets)
+            rates = tuple(to_basis_points(rate) for rate in self.bracket_rates)
+            lower = [0]
+            cumulative = [0]
+            units = 0
+            previous_bracket = 0
+            for bracket, rate in zip(brackets, rates):
+                # An unbounded bracket is never completed, so it adds nothing to the running total.
+                if bracket != CENTS_INFINITY:
+                    units += (bracket - previous_bracket) * rate
+                previous_bracket = bracket
+                lower.append(bracket)
+                cumulative.append(units)
+            super().__setattr__("_cents", (brackets, tuple(lower), tuple(cumulative), rates))
+        return self._cents
+
+    def tax_cents(self, taxable_cents: int) -> int:
+        """
+        Calculate the tax in integer cents on a single taxable income in integer cents.
+        """
+        brackets, lower, cumulative, rates = self.cents_tables()
+        index = bisect_left(brackets, taxable_cents)
+        return round_units(cumulative[index] + (taxable_cents - lower[index]) * rates[index])
+
+    def tax_cents_batch(self, taxable_cents):
+        """
+        Calculate the tax in integer cents on an int64 array of taxable incomes in cents.
+        """
+        import numpy as np
+
+        if self._cents_arrays is None:
+            arrays = tuple(np.array(values, dtype=np.int64) for values in self.cents_tables())
+            for array in arrays:
+                array.flags.writeable = False
+            super().__setattr__("_cents_arrays", arrays)
+        brackets, lower, cumulative, rates = self._cents_arrays
+        index = np.searchsorted(brackets, taxable_cents, side="left")
+        return _round_units_batch(cumulative[index] + (taxable_cents - lower[index]) * rates[index])
+
+
+@lru_cache(maxsize=256)
+def _compile_schedule(brackets: tuple[float, ...], rates: tuple[float, ...]) -> BracketSchedule:
+    return BracketSchedule(brackets, rates)
+
+
+INF = float("inf")
+
+DEFAULT_YEAR = 2024
+DEFAULT_FILING_STATUS = "married_jointly"
+FILING_STATUSES = ("single", "married_jointly", "married_separately", "head_of_household")
+DEFAULT_INFLATION = 0.025  # annual rate used to project indexed amounts past the last published year
+SIMULATION_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+RULES_DIR = Path(__file__).with_name("rules")
+
+
+class Jurisdiction(NamedTuple):
+    """
+    The compiled tax rules of one jurisdiction for one year and filing status.
+    """
+    level: str
+    code: str
+    year: int
+    filing_status: str
+    schedule: BracketSchedule
+    std_deduction: float = 0
+    dependent_deduction: float = 0
+    pretax_401k: bool = False
+    contribution_limit: float = INF  # 401k contribution limit per person
+    wage_base: float = INF  # income per person subject to a payroll tax
+    surtax_rate: float = 0
+    surtax_threshold: float = INF
+
+    def deductions(self, contr401k):
+        """
+        Deductions allowed for a 401k contribution, or for an array of them.
+        """
+        deductions = self.std_deduction
+        if self.pretax_401k:
+            deductions = deductions + contr401k
+        if self.dependent_deduction:
+            deductions = deductions + self.dependent_deduction
+        return deductions
+
+
+class JurisdictionRegistry:
+    """
+    Tax rules for federal, state and local jurisdictions, loaded from rule files on demand.
+
+    Each jurisdiction lives in its own ``<level>/<code>.toml`` (or ``.json``) file under the rules
+    directory, with one table per year and filing status. A file is parsed, and its schedule
+    compiled, only the first time that jurisdiction is looked up; after that a lookup is one
+    dict hit keyed by (level, code, year, filing status).
+
+    Years after the last table in a file are projected from it: the amounts named in the file's
+    ``inflation_indexed`` table grow by ``inflation`` a year, rounded down to the given multiple.
+    """
+
+    def __init__(self, directory, inflation: float = DEFAULT_INFLATION):
+        self.directory = Path(directory)
+        self.inflation = inflation
+        self._codes = {}
+        self._files = {}
+        self._compiled = {}
+
+    def codes(self, level: str) -> frozenset[str]:
+        """
+        Codes of every jurisdiction available at the given level, found without parsing any file.
+        """
+        if level not in self._codes:
+            directory = self.directory / level
+            paths = directory.iterdir() if directory.is_dir() else ()
+            self._codes[level] = frozenset(path.stem for path in paths if path.suffix in (".toml", ".json"))
+        return self._codes[level]
+
+    def get(self, level: str, code: str, year: int = DEFAULT_YEAR,
+            filing_status: str = DEFAULT_FILING_STATUS) -> Jurisdiction:
+        """
+        Return the compiled rules of a jurisdiction, loading and compiling them on first use.
+        """
+        key = (level, code, year, filing_status)
+        jurisdiction = self._compiled.get(key)
+        if jurisdiction is None:
+            jurisdiction = self._compiled[key] = self._compile(level, code, year, filing_status)
+        return jurisdiction
+
+    def fingerprint(self) -> str:
+        """
+        A digest of every rule file and the projection rate, which changes whenever any rule does.
+        """
+        import hashlib
+
+        digest = hashlib.sha256(repr(self.inflation).encode())
+        for path in sorted(self.directory.glob("*/*")):
+            if path.suffix in (".toml", ".json"):
+                digest.update(str(path.relative_to(self.directory)).encode() + b"\0" + path.read_bytes())
+        return digest.hexdigest()
+
+    def _compile(self, level, code, year, filing_status) -> Jurisdiction:
+        if code not in self.codes(level):
+            raise ValueError(f"Only {sorted(self.codes(level))} are supported.")
+        rules = self._load(level, code)
+        years = [int(key) for key, tables in rules.items() if key.isdigit() and filing_status in tables]
+        if year in years:
+            rule = rules[str(year)][filing_status]
+        elif years and year > max(years):
+            rule = self._project(rules, max(years), year, filing_status)
+        else:
+            raise ValueError(f"No {level} tax rules for {code} in {year} ({filing_status}).")
+
+        # JSON has no infinity, so an unbounded top bracket may be written as null.
+        brackets = [INF if bracket is None else bracket for bracket in rule["brackets"]]
+        fields = {name: rule[name] for name in Jurisdiction._fields if name in rule}
+        return Jurisdiction(level, code, year, filing_status,
+                            schedule=BracketSchedule.compile(brackets, rule["rates"]), **fields)
+
+    def _project(self, rules, base_year, year, filing_status) -> dict:
+        factor = (1 + self.inflation) ** (year - base_year)
+
+        def index(amount, multiple):
+            if amount is None or amount == INF:
+                return amount
+            return amount * factor // multiple * multiple
+
+        rule = dict(rules[str(base_year)][filing_status])
+        for name, multiple in rules.get("inflation_indexed", {}).items():
+            if name == "brackets":
+                rule[name] = [index(bracket, multiple) for bracket in rule[name]]
+            elif name in rule:
+                rule[name] = index(rule[name], multiple)
+        return rule
+
+    def _load(self, level, code) -> dict:
+        if (level, code) not in self._files:
+            path = self.directory / level / f"{code}.toml"
+            if path.exists():
+                try:
+                    import tomllib
+                except ImportError:  # Python < 3.11
+                    import tomli as tomllib
+                with open(path, "rb") as f:
+                    rules = tomllib.load(f)
+            else:
+                with open(path.with_suffix(".json")) as f:
+                    rules = json.load(f)
+            self._files[(level, code)] = rules
+        return self._files[(level, code)]
+
+
+JURISDICTIONS = JurisdictionRegistry(RULES_DIR)
+
+
+def _groups(*keys):
+    """
+    Split households by the distinct values of one or more key arrays, such as state and year.
+
+    Scalar keys, and keys with a single distinct value, select every household with ``...``
+    rather than a mask, so the common single-group case copies nothing.
+
+    Yields:
+        tuple: The key values of each group and an index selecting its households.
+    """
+    import numpy as np
+
+    if not keys:
+        yield (), ...
+        return
+    first, rest = np.asarray(keys[0]), [np.asarray(key) for key in keys[1:]]
+    if first.ndim == 0:
+        groups = [(first.item(), ...)]
+    else:
+        values = np.unique(first).tolist()
+        groups = [(values[0], ...)] if len(values) == 1 else [(value, first == value) for value in values]
+    for value, index in groups:
+        subkeys = [key if key.ndim == 0 else key[index] for key in rest]
+        for subvalues, subindex in _groups(*subkeys):
+            if index is ...:
+                combined = subindex
+            elif subindex is ...:
+                combined = index
+            else:
+                combined = index.copy()
+                combined[index] = subindex
+            yield (value,) + subvalues, combined
+
+
 class Tax:
     """
-    A simple tax calculator that supports progressive tax brackets and optional deductions.
+    A simple tax calculator that supports progressive tax brackets and optional deductions.
+    """
+
+    __slots__ = ("schedule", "income", "taxable_income", "deductions")
+
+    def __init__(self, income: float, brackets: list[float], rates: list[float], deductions: float = 0.0):
+        """
+        Initialize the TaxCalculator class.
+
+        Args:
+            income (float): The individual's income.
+            brackets (list[float]): The tax brackets (limits for each tax tier).
+            rates (list[float]): The tax rates (as decimals) for each bracket.
+            deductions (float, optional): The deductions to reduce taxable income. Default is 0.0.
+        """
+        self._initialize(income, BracketSchedule.compile(brackets, rates), deductions)
+
+    def _initialize(self, income: float, schedule: BracketSchedule, deductions: float):
+        """
+        Set up the tax against an already compiled schedule, as subclasses with registry rules do.
+        """
+        if income < 0:
+            raise ValueError("Income cannot be negative.")
+        if deductions < 0:
+            raise ValueError("Deductions cannot be negative.")
+
+        self.schedule = schedule
+        self.income = income
+        self.taxable_income = max(income - deductions, 0)  # Adjust income by deductions
+        self.deductions = deductions
+
+    @property
+    def brackets(self) -> tuple[float, ...]:
+        return self.schedule.brackets
+
+    @property
+    def rates(self) -> tuple[float, ...]:
+        return self.schedule.rates
+
+    def calculate_tax(self) -> float:
+        """
+        Calculate the total tax based on taxable income and tax brackets.
+
+        Returns:
+            float: The total tax owed.
+        """
+        return round(self.schedule.tax(self.taxable_income), 2)
+
+    def calculate_tax_with_rates(self) -> tuple[float, float, float]:
+        """
+        Calculate the total tax together with its marginal rates, from a single bracket search.
+
+        Returns:
+            tuple: The tax owed (as ``calculate_tax``), the change in tax per extra dollar of income
+            and the change in tax per extra dollar of deductions.
+        """
+        tax, rate_below, rate_above = self.schedule.tax_with_rates(self.taxable_income)
+        income_rate = rate_above if self.income >= self.deductions else 0.0
+        return round(tax, 2), income_rate, 0.0 - rate_below
+
+    def calculate_tax_with_breakdown(self) -> tuple[float, BracketBreakdown]:
+        """
+        Calculate the total tax together with how the taxable income spreads over the brackets.
+
+        Returns:
+            tuple: The tax owed (as ``calculate_tax``) and a ``BracketBreakdown`` of unrounded amounts.
+        """
+        tax, breakdown = self.schedule.tax_with_breakdown(self.taxable_income)
+        return round(tax, 2), breakdown
+
+    def calculate_tax_cents(self) -> int:
+        """
+        Calculate the total tax in exact integer cents.
+
+        Income and deductions are converted to cents and rates to basis points, so the result is
+        exact and reproducible; the only rounding is to the final cent.
+
+        Returns:
+            int: The total tax owed, in cents.
+        """
+        taxable_cents = max(to_cents(self.income) - to_cents(self.deductions), 0)
+        return self.schedule.tax_cents(taxable_cents)
+
+    @staticmethod
+    def calculate_tax_batch(incomes, brackets: list[float], rates: list[float], deductions=0.0, cents=False,
+                            with_rates=False, with_breakdown=False, out=None):
+        """
+        Calculate the tax for many incomes at once against a single bracket schedule.
+
+        Each income costs one ``searchsorted`` lookup and one multiply-add against the compiled
+        schedule. Results match ``calculate_tax`` to the cent, including the fallback for income
+        above the highest bracket.
+
+        Args:
+            incomes (array-like): Incomes, one per household.
+            brackets (list[float]): The tax brackets (limits for each tax tier).
+            rates (list[float]): The tax rates (as decimals) for each bracket.
+            deductions (array-like or float, optional): Deductions per household. Default is 0.0.
+            cents (bool, optional): Compute in exact integer cents and return int64 cents.
+            with_rates (bool, optional): Also return the marginal rates, as ``calculate_tax_with_rates``.
+            with_breakdown (bool, optional): Also return the per-bracket breakdown, in unrounded dollars.
+            out (tuple, optional): Preallocated per-bracket income and tax arrays for the breakdown,
+                shaped ``incomes.shape + (len(brackets),)``.
+
+        Returns:
+            numpy.ndarray: The tax owed for each income, or a (tax, income rate, deduction rate)
+            tuple of arrays with ``with_rates``. With ``with_breakdown`` this result is returned
+            in a pair with a ``BracketBreakdown`` of arrays.
+        """
+        import numpy as np
+
+        incomes = np.asarray(incomes, dtype=np.float64)
+        deductions = np.asarray(deductions, dtype=np.float64)
+        if (incomes < 0).any():
+            raise ValueError("Income cannot be negative.")
+        if (deductions < 0).any():
+            raise ValueError("Deductions cannot be negative.")
+
+        schedule = BracketSchedule.compile(brackets, rates)
+        taxable_incomes = np.maximum(incomes - deductions, 0)
+        if with_rates:
+            tax, rate_below, rate_above = schedule.tax_with_rates_batch(taxable_incomes)
+            income_rate = np.where(incomes >= deductions, rate_above, 0.0)
+            deduction_rate = 0.0 - rate_below
+        if with_breakdown:
+            tax, breakdown = schedule.tax_with_breakdown_batch(taxable_incomes, out)
+        elif not with_rates:
+            tax = None if cents else schedule.tax_batch(taxable_incomes)
+
+        if cents:
+            tax = schedule.tax_cents_batch(np.maximum(_to_cents_batch(incomes) - _to_cents_batch(deductions), 0))
+        else:
+            tax = _round_cents(tax)
+        result = (tax, income_rate, deduction_rate) if with_rates else tax
+        return (result, breakdown) if with_breakdown else result
+
+    def print_summary(self):
+        tax, breakdown = self.calculate_tax_with_breakdown()
+        print("Tax type: ", self.__class__.__name__)
+        print("Total Income: ", self.income)
+        print("Deductions: ", self.deductions)
+        print("Taxable Income: ", self.taxable_income)
+        for bracket, (income, bracket_tax) in enumerate(zip(breakdown.income, breakdown.tax)):
+            if bracket <= breakdown.top_bracket:
+                print(f"  Bracket {bracket + 1}: {round(income, 2)} taxed {round(bracket_tax, 2)}")
+        print("Tax Liability: ", tax)
+
+
+def _contribution_rates(result, pretax_401k):
+    """
+    Turn the deduction rate of a ``with_rates`` result into the rate per dollar of 401k contribution.
+    """
+    if pretax_401k:
+        return result
+    tax, income_rate, deduction_rate = result
+    if isinstance(deduction_rate, float):
+        return tax, income_rate, 0.0
+    import numpy as np
+
+    return tax, income_rate, np.zeros_like(deduction_rate)
+
+
+class FederalTax(Tax):
+    __slots__ = ("rules",)
+
+    def __init__(self, income, contr401k, year=DEFAULT_YEAR, filing_status=DEFAULT_FILING_STATUS):
+        rules = JURISDICTIONS.get("federal", "US", year, filing_status)
+        self.rules = rules
+        deductions = rules.deductions(contr401k)
+        self._initialize(income, rules.schedule, deductions)
+
+    def calculate_tax_with_rates(self) -> tuple[float, float, float]:
+        """
+        Like ``Tax.calculate_tax_with_rates``, but the last rate is per dollar of 401k contribution.
+        """
+        return _contribution_rates(super().calculate_tax_with_rates(), self.rules.pretax_401k)
+
+    @classmethod
+    def calculate_tax_batch(cls, incomes, contr401k, cents=False, with_rates=False, year=DEFAULT_YEAR,
+                            filing_status=DEFAULT_FILING_STATUS, with_breakdown=False):
+        import numpy as np
+
+        incomes = np.asarray(incomes, dtype=np.float64)
+        contr401k = np.broadcast_to(np.asarray(contr401k, dtype=np.float64), incomes.shape)
+        return _calculate_grouped(incomes, contr401k, "federal", "US", year, filing_status, cents, with_rates,
+                                  with_breakdown)
+
+
+class StateTax(Tax):
+    __slots__ = ("state", "rules")
+
+    def __init__(self, income, contr401k, state, year=DEFAULT_YEAR, filing_status=DEFAULT_FILING_STATUS):
+        rules = JURISDICTIONS.get("state", state, year, filing_status)
+
+        self.state = state
+        self.rules = rules
+        deductions = rules.deductions(contr401k)
+
+        self._initialize(income, rules.schedule, deductions)
+
+    def calculate_tax_with_rates(self) -> tuple[float, float, float]:
+        """
+        Like ``Tax.calculate_tax_with_rates``, but the last rate is per dollar of 401k contribution.
+        """
+        return _contribution_rates(super().calculate_tax_with_rates(), self.rules.pretax_401k)
+
+    @classmethod
+    def calculate_tax_batch(cls, incomes, contr401k, states, cents=False, with_rates=False, year=DEFAULT_YEAR,
+                            filing_status=DEFAULT_FILING_STATUS, with_breakdown=False):
+        import numpy as np
+
+        incomes = np.asarray(incomes, dtype=np.float64)
+        contr401k = np.broadcast_to(np.asarray(contr401k, dtype=np.float64), incomes.shape)
+        return _calculate_grouped(incomes, contr401k, "state", states, year, filing_status, cents, with_rates,
+                                  with_breakdown)
+
+
+class LocalTax(Tax):
+    __slots__ = ("state", "rules")
+
+    def __init__(self, income, state, year=DEFAULT_YEAR, filing_status=DEFAULT_FILING_STATUS):
+        rules = JURISDICTIONS.get("local", state, year, filing_status)
+
+        self.state = state
+        self.rules = rules
+        deductions = rules.deductions(0)
+
+        self._initialize(income, rules.schedule, deductions)
+
+    def calculate_tax_with_rates(self) -> tuple[float, float, float]:
+        """
+        Like ``Tax.calculate_tax_with_rates``, but the last rate is per dollar of 401k contribution (none).
+        """
+        return _contribution_rates(super().calculate_tax_with_rates(), False)
+
+    @classmethod
+    def calculate_tax_batch(cls, incomes, states, cents=False, with_rates=False, year=DEFAULT_YEAR,
+                            filing_status=DEFAULT_FILING_STATUS, with_breakdown=False):
+        import numpy as np
+
+        incomes = np.asarray(incomes, dtype=np.float64)
+        return _calculate_grouped(incomes, None, "local", states, year, filing_status, cents, with_rates,
+                                  with_breakdown)
+
+
+def _calculate_grouped(incomes, contr401k, level, codes, years, filing_statuses, cents, with_rates,
+                       with_breakdown=False):
+    """
+    Batch tax of one level, evaluating each distinct (jurisdiction, year, filing status) group
+    against its own schedule.
+
+    ``contr401k`` is None for levels that ignore contributions; their contribution rate is zero.
+    With ``with_breakdown`` the per-bracket amounts are written into one (households, brackets)
+    array pair sized for the longest schedule; columns past a household's own schedule stay zero.
+    """
+    import numpy as np
+
+    tax = np.empty(incomes.shape, dtype=np.int64 if cents else np.float64)
+    income_rate = np.empty(incomes.shape)
+    second_rate = np.empty(incomes.shape)
+    groups = [(JURISDICTIONS.get(level, *key), index) for key, index in _groups(codes, years, filing_statuses)]
+    if with_breakdown:
+        shape = incomes.shape + (max(len(rules.schedule.brackets) for rules, _ in groups),)
+        breakdown = BracketBreakdown(np.zeros(shape), np.zeros(shape), np.empty(incomes.shape, dtype=np.int64))
+    for rules, index in groups:
+        deductions = rules.deductions(0 if contr401k is None else contr401k[index])
+        count = len(rules.schedule.brackets)
+        # A single group writes straight into the output; masked groups are scattered into it.
+        out = (breakdown.income[..., :count], breakdown.tax[..., :count]) if with_breakdown and \
+            index is Ellipsis else None
+        result = Tax.calculate_tax_batch(incomes[index], rules.schedule.brackets, rules.schedule.rates,
+                                         deductions, cents=cents, with_rates=with_rates,
+                                         with_breakdown=with_breakdown, out=out)
+        if with_breakdown:
+            result, group_breakdown = result
+            if out is None:
+                breakdown.income[index, :count] = group_breakdown.income
+                breakdown.tax[index, :count] = group_breakdown.tax
+            breakdown.top_bracket[index] = group_breakdown.top_bracket
+        if with_rates:
+            pretax_401k = contr401k is not None and rules.pretax_401k
+            tax[index], income_rate[index], second_rate[index] = _contribution_rates(result, pretax_401k)
+        else:
+            tax[index] = result
+    result = (tax, income_rate, second_rate) if with_rates else tax
+    return (result, breakdown) if with_breakdown else result
+
+
+class SocialSecurityTax(Tax):
+    __slots__ = ("base1", "base2", "rules")
+
+    def __init__(self, income1, income2, year=DEFAULT_YEAR, filing_status=DEFAULT_FILING_STATUS):
+        rules = JURISDICTIONS.get("payroll", "social_security", year, filing_status)
+        self.rules = rules
+        self.base1 = min(income1, rules.wage_base)  # per person
+        self.base2 = min(income2, rules.wage_base)
+        income = income1 + income2
+        self._initialize(income, rules.schedule, 0)
+
+    def calculate_tax(self) -> float:
+        return (self.base1 + self.base2) * self.rates[0]
+
+    def calculate_tax_with_rates(self) -> tuple[float, float, float]:
+        """
+        Calculate the tax together with the marginal rate on each person's income.
+
+        Returns:
+            tuple: The tax, the rate per extra dollar of ``income1`` and the rate per extra dollar of
+            ``income2`` (zero once that person's income reaches the wage base).
+        """
+        rate = self.rates[0]
+        return (self.calculate_tax(), rate if self.base1 < self.rules.wage_base else 0.0,
+                rate if self.base2 < self.rules.wage_base else 0.0)
+
+    def calculate_tax_with_breakdown(self) -> tuple[float, BracketBreakdown]:
+        """
+        Calculate the tax together with its breakdown; the single bracket holds the capped wages.
+        """
+        return self.calculate_tax(), self.schedule.tax_with_breakdown(self.base1 + self.base2)[1]
+
+    def calculate_tax_cents(self) -> int:
+        return round_units((to_cents(self.base1) + to_cents(self.base2)) * to_basis_points(self.rates[0]))
+
+    @classmethod
+    def calculate_tax_batch(cls, incomes1, incomes2, cents=False, with_rates=False, year=DEFAULT_YEAR,
+                            filing_status=DEFAULT_FILING_STATUS, with_breakdown=False):
+        import numpy as np
+
+        incomes1 = np.asarray(incomes1, dtype=np.float64)
+        incomes2 = np.asarray(incomes2, dtype=np.float64)
+        if (incomes1 + incomes2 < 0).any():
+            raise ValueError("Income cannot be negative.")
+        wage_base = np.empty(incomes1.shape)
+        rate = np.empty(incomes1.shape)
+        for (year, status), index in _groups(year, filing_status):
+            rules = JURISDICTIONS.get("payroll", "social_security", year, status)
+            wage_base[index] = rules.wage_base
+            rate[index] = rules.schedule.rates[0]
+        if cents:
+            bases = np.minimum(_to_cents_batch(incomes1), _to_cents_batch(wage_base)) + \
+                np.minimum(_to_cents_batch(incomes2), _to_cents_batch(wage_base))
+            tax = _round_units_batch(bases * _to_basis_points_batch(rate))
+        else:
+            tax = (np.minimum(incomes1, wage_base) + np.minimum(incomes2, wage_base)) * rate
+        result = (tax, np.where(incomes1 < wage_base, rate, 0.0), np.where(incomes2 < wage_base, rate, 0.0)) \
+            if with_rates else tax
+        if with_breakdown:
+            income = np.expand_dims(np.minimum(incomes1, wage_base) + np.minimum(incomes2, wage_base), -1)
+            return result, BracketBreakdown(income, income * np.expand_dims(rate, -1),
+                                            np.zeros(tax.shape, dtype=np.int64))
+        return result
+
+
+class MedicareTax(Tax):
+    __slots__ = ("rules",)
+
+    def __init__(self, income, year=DEFAULT_YEAR, filing_status=DEFAULT_FILING_STATUS):
+        rules = JURISDICTIONS.get("payroll", "medicare", year, filing_status)
+        self.rules = rules
+        self._initialize(income, rules.schedule, 0)
+
+    def calculate_tax_with_rates(self) -> tuple[float, float, float]:
+        """
+        Calculate the tax together with its marginal rate, including the surtax above the threshold.
+        """
+        surtax_rate = self.rules.surtax_rate if self.income >= self.rules.surtax_threshold else 0.0
+        return self.calculate_tax(), self.rates[0] + surtax_rate, 0.0
+
+    def calculate_tax(self) -> float:
+        extra_tax = max(0.0, self.income - self.rules.surtax_threshold) * self.rules.surtax_rate
+        return round(self.income * self.rates[0] + extra_tax, 2)
+
+    def calculate_tax_with_breakdown(self) -> tuple[float, BracketBreakdown]:
+        """
+        Calculate the tax together with its breakdown over two brackets: income up to the surtax
+        threshold, and income above it taxed at the rate plus the surtax.
+        """
+        rules = self.rules
+        schedule = BracketSchedule.compile((rules.surtax_threshold, INF),
+                                           (self.rates[0], self.rates[0] + rules.surtax_rate))
+        return self.calculate_tax(), schedule.tax_with_breakdown(self.income)[1]
+
+    def calculate_tax_cents(self) -> int:
+        income = to_cents(self.income)
+        extra_tax = max(0, income - to_cents(self.rules.surtax_threshold)) * to_basis_points(self.rules.surtax_rate)
+        return round_units(income * to_basis_points(self.rates[0]) + extra_tax)
+
+    @classmethod
+    def calculate_tax_batch(cls, incomes, cents=False, with_rates=False, year=DEFAULT_YEAR,
+                            filing_status=DEFAULT_FILING_STATUS, with_breakdown=False):
+        import numpy as np
+
+        incomes = np.asarray(incomes, dtype=np.float64)
+        if (incomes < 0).any():
+            raise ValueError("Income cannot be negative.")
+        rate, surtax_rate, surtax_threshold = (np.empty(incomes.shape) for _ in range(3))
+        for (year, status), index in _groups(year, filing_status):
+            rules = JURISDICTIONS.get("payroll", "medicare", year, status)
+            rate[index] = rules.schedule.rates[0]
+            surtax_rate[index] = rules.surtax_rate
+            surtax_threshold[index] = rules.surtax_threshold
+        if cents:
+            income = _to_cents_batch(incomes)
+            extra_tax = np.maximum(0, income - _to_cents_batch(surtax_threshold)) * _to_basis_points_batch(surtax_rate)
+            tax = _round_units_batch(income * _to_basis_points_batch(rate) + extra_tax)
+        else:
+            extra_tax = np.maximum(0.0, incomes - surtax_threshold) * surtax_rate
+            tax = _round_cents(incomes * rate + extra_tax)
+        result = (tax, rate + np.where(incomes >= surtax_threshold, surtax_rate, 0.0), np.zeros(incomes.shape)) \
+            if with_rates else tax
+        if with_breakdown:
+            above = np.maximum(incomes - surtax_threshold, 0.0)
+            income = np.stack([incomes - above, above], -1)
+            return result, BracketBreakdown(income, income * np.stack([rate, rate + surtax_rate], -1),
+                                            (incomes > surtax_threshold).astype(np.int64))
+        return result
+
+
+_UNSET = object()
+
+
+class CacheStats(NamedTuple):
+    """
+    Counters of a ``ResultCache``.
+    """
+    hits: int  # found in memory
+    disk_hits: int  # found in the on-disk tier
+    misses: int  # calculated
+    size: int
+    maxsize: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / lookups if lookups else 0.0
+
+
+class ResultCache:
+    """
+    A bounded LRU cache of tax component results, keyed by each component's own inputs.
+
+    The key is the tax class and its constructor arguments, e.g. ``FederalTax`` with (income,
+    contr401k, year, filing status), so households differing only in inputs a component ignores
+    share its entry. With ``path``, results are also kept in a SQLite file that every process
+    opening it shares; entries are tagged with ``JURISDICTIONS.fingerprint()`` so edited rules
+    never return stale results.
+
+    Enable it for every ``Budget`` with ``Budget.result_cache = ResultCache(...)``.
+    """
+
+    def __init__(self, maxsize: int = 65536, path=None, registry: JurisdictionRegistry = None):
+        import threading
+
+        if maxsize <= 0:
+            raise ValueError("Cache size must be positive.")
+        self.maxsize = maxsize
+        self.hits = self.disk_hits = self.misses = 0
+        self._entries = {}  # insertion ordered: least recently used first
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            import sqlite3
+
+            self._db = sqlite3.connect(str(path), timeout=30, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS results "
+                             "(rules TEXT NOT NULL, key TEXT NOT NULL, value NOT NULL, PRIMARY KEY (rules, key))")
+            self._rules = (registry or JURISDICTIONS).fingerprint()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.stats()})"
+
+    @staticmethod
+    def disk_key(tax_class, arguments, cents=False) -> str:
+        """
+        The normalized on-disk key of one calculation: amounts as floats, so 100000 and 100000.0
+        share an entry (as they already do in memory, where equal numbers hash alike).
+        """
+        return repr((tax_class.__name__, bool(cents)) + tuple(
+            value if isinstance(value, str) else float(value) for value in arguments))
+
+    def get(self, tax_class, arguments, cents=False):
+        """
+        The tax of ``tax_class(*arguments)``, from memory, disk or a new calculation, in that order.
+        """
+        key = (tax_class, cents) + arguments
+        with self._lock:
+            value = self._entries.pop(key, _UNSET)
+            if value is not _UNSET:
+                self._entries[key] = value
+                self.hits += 1
+                return value
+
+        if self._db is not None:
+            row = self._db.execute("SELECT value FROM results WHERE rules = ? AND key = ?",
+                                   (self._rules, self.disk_key(tax_class, arguments, cents))).fetchone()
+            if row is not None:
+                value = row[0]
+                self._store(key, value)
+                with self._lock:
+                    self.disk_hits += 1
+                return value
+
+        tax = tax_class(*arguments)
+        value = tax.calculate_tax_cents() if cents else tax.calculate_tax()
+        if self._db is not None:
+            self._db.execute("INSERT OR IGNORE INTO results VALUES (?, ?, ?)",
+                             (self._rules, self.disk_key(tax_class, arguments, cents), value))
+        self._store(key, value)
+        with self._lock:
+            self.misses += 1
+        return value
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            if len(self._entries) > self.maxsize:
+                del self._entries[next(iter(self._entries))]
+
+    def stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.disk_hits, self.misses, len(self._entries), self.maxsize)
+
+    def clear(self):
+        """
+        Drop every entry in memory and reset the counters; the on-disk tier is kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class TaxBreakdown(NamedTuple):
+    """
+    The liability of each tax component for one household.
+    """
+    federal: float
+    state: float
+    local: float
+    social_security: float
+    medicare: float
+
+    @property
+    def total(self) -> float:
+        return self.federal + self.state + self.local + self.social_security + self.medicare
+
+
+class Household(NamedTuple):
+    """
+    The inputs of one household budget, in ``Budget`` constructor order.
+    """
+    income1: float
+    income2: float
+    other_income: float
+    contr401k1: float
+    contr401k2: float
+    state: str
+    fed_tax_paid: float = 0
+    state_tax_paid: float = 0
+    local_tax_paid: float = 0
+    social_sec_tax_paid: float = 0
+    medicare_tax_paid: float = 0
+    year: int = DEFAULT_YEAR
+    filing_status: str = DEFAULT_FILING_STATUS
+
+
+class BudgetResult(NamedTuple):
+    """
+    Every ``Budget`` output for one household, named after the matching accessors.
+    """
+    total_income: float
+    federal_tax: float
+    state_tax: float
+    local_tax: float
+    social_sec_tax: float
+    medicare_tax: float
+    total_tax: float
+    federal_tax_owed: float
+    state_tax_owed: float
+    local_tax_owed: float
+    eff_tax_rate: float
+
+
+class ContributionPlan(NamedTuple):
+    """
+    A split of 401k contributions between spouses and its outcome.
+    """
+    contr401k1: float
+    contr401k2: float
+    total_tax: float
+    take_home: float  # total income less taxes and contributions
+
+
+class NormalIncome(NamedTuple):
+    """
+    Income drawn from a normal distribution, such as a bonus around its target.
+    """
+    mean: float
+    std: float
+
+    def sample(self, rng, size: int):
+        return rng.normal(self.mean, self.std, size)
+
+
+class LogNormalIncome(NamedTuple):
+    """
+    Income drawn from a log-normal distribution, such as vesting RSUs valued at an uncertain share price.
+
+    ``median`` is the typical draw and ``sigma`` the standard deviation of its logarithm.
+    """
+    median: float
+    sigma: float
+
+    def sample(self, rng, size: int):
+        return self.median * rng.lognormal(0.0, self.sigma, size)
+
+
+class UniformIncome(NamedTuple):
+    """
+    Income drawn uniformly between two amounts.
+    """
+    low: float
+    high: float
+
+    def sample(self, rng, size: int):
+        return rng.uniform(self.low, self.high, size)
+
+
+def _sample_income(spec, rng, size: int):
+    """
+    Draw ``size`` incomes from a distribution (anything with ``sample(rng, size)``), a fixed amount,
+    or a tuple or list of either whose draws are added; negative draws are floored at 0.
     """
+    import numpy as np
 
-    def __init__(self, income: float, brackets: list[float], rates: list[float], deductions: float = 0.0):
+    if isinstance(spec, (tuple, list)) and not hasattr(spec, "sample"):
+        parts = [_sample_income(part, rng, size) for part in spec]
+        return np.maximum(np.sum(parts, axis=0), 0.0) if parts else np.zeros(size)
+    if hasattr(spec, "sample"):
+        return np.maximum(np.asarray(spec.sample(rng, size), dtype=np.float64), 0.0)
+    return np.full(size, max(float(spec), 0.0))
+
+
+class Budget:
+    # Attributes each tax component depends on; changing one only invalidates the components that use it.
+    COMPONENT_INPUTS = {
+        "federal": frozenset({"income1", "income2", "other_income", "contr401k1", "contr401k2", "year",
+                              "filing_status"}),
+        "state": frozenset({"income1", "income2", "other_income", "contr401k1", "contr401k2", "state", "year",
+                            "filing_status"}),
+        "local": frozenset({"income1", "income2", "other_income", "state", "year", "filing_status"}),
+        "social_security": frozenset({"income1", "income2", "year", "filing_status"}),
+        "medicare": frozenset({"income1", "income2", "other_income", "year", "filing_status"}),
+    }
+    INPUTS = frozenset().union(*COMPONENT_INPUTS.values())
+    PAID = ("fed_tax_paid", "state_tax_paid", "local_tax_paid", "social_sec_tax_paid", "medicare_tax_paid")
+    # Constructor arguments, in order.
+    ARGUMENTS = Household._fields
+    TEXT_INPUTS = frozenset({"state", "filing_status"})
+    # Fields produced for every household by calculate_batch, named after the matching accessors.
+    OUTPUTS = BudgetResult._fields
+    # Inputs marginal rates can be taken with respect to: incomes move the first rate returned by
+    # calculate_tax_with_rates, contributions the second.
+    INCOME_INPUTS = ("income1", "income2", "other_income")
+    CONTRIBUTION_INPUTS = ("contr401k1", "contr401k2")
+    MARGINAL_WRT = frozenset(INCOME_INPUTS + CONTRIBUTION_INPUTS)
+    # Fields added by calculate_batch when marginal rates are requested.
+    MARGINAL_OUTPUTS = ("federal_marginal_rate", "state_marginal_rate", "local_marginal_rate",
+                        "social_sec_marginal_rate", "medicare_marginal_rate", "total_marginal_rate")
+
+    # Opt-in ResultCache shared by every budget; None calculates every component afresh.
+    result_cache = None
+
+    __slots__ = ARGUMENTS + ("_components", "_breakdowns")
+
+    def __init__(self, income1, income2, other_income, contr401k1, contr401k2, state,
+                 fed_tax_paid=0, state_tax_paid=0, local_tax_paid=0, social_sec_tax_paid=0, medicare_tax_paid=0,
+                 year=DEFAULT_YEAR, filing_status=DEFAULT_FILING_STATUS):
+        # Nothing is cached yet, so the inputs are set without going through the invalidating __setattr__.
+        set_attribute = object.__setattr__
+        set_attribute(self, "_components", {})
+        set_attribute(self, "_breakdowns", {})
+        set_attribute(self, "income1", income1)
+        set_attribute(self, "income2", income2)
+        set_attribute(self, "other_income", other_income)
+        set_attribute(self, "contr401k1", contr401k1)
+        set_attribute(self, "contr401k2", contr401k2)
+        set_attribute(self, "state", state)
+
+        set_attribute(self, "fed_tax_paid", fed_tax_paid)
+        set_attribute(self, "state_tax_paid", state_tax_paid)
+        set_attribute(self, "local_tax_paid", local_tax_paid)
+        set_attribute(self, "social_sec_tax_paid", social_sec_tax_paid)
+        set_attribute(self, "medicare_tax_paid", medicare_tax_paid)
+        set_attribute(self, "year", year)
+        set_attribute(self, "filing_status", filing_status)
+
+    def __setattr__(self, name, value):
+        if name in self.INPUTS and getattr(self, name, _UNSET) != value:
+            self.invalidate(name)
+        super().__setattr__(name, value)
+
+    def invalidate(self, name):
         """
-        Initialize the TaxCalculator class.
+        Drop the cached liabilities of every tax component that depends on the given input.
+        """
+        if not self._components:
+            return
+        for component, inputs in self.COMPONENT_INPUTS.items():
+            if name in inputs:
+                self._components.pop((component, False), None)
+                self._components.pop((component, True), None)
+                self._components.pop((component, "rates"), None)
+                self._components.pop((component, "brackets"), None)
+        self._breakdowns.clear()
 
-        Args:
-            income (float): The individual's income.
-            brackets (list[float]): The tax brackets (limits for each tax tier).
-            rates (list[float]): The tax rates (as decimals) for each bracket.
-            deductions (float, optional): The deductions to reduce taxable income. Default is 0.0.
+    @classmethod
+    def from_household(cls, household: Household) -> Budget:
+        return cls(*household)
+
+    def household(self) -> Household:
         """
-        if income < 0:
-            raise ValueError("Income cannot be negative.")
-        if deductions < 0:
-            raise ValueError("Deductions cannot be negative.")
-        if not brackets or not rates:
-            raise ValueError("Brackets and rates cannot be empty.")
-        if len(brackets) != len(rates):
-            raise ValueError("Brackets and rates must have the same length.")
+        The inputs of this budget as an immutable record.
+        """
+        return Household(*(getattr(self, name) for name in self.ARGUMENTS))
 
-        self.income = income
-        self.taxable_income = max(income - deductions, 0)  # Adjust income by deductions
-        self.brackets = brackets
-        self.rates = rates
-        self.deductions = deductions
+    def result(self) -> BudgetResult:
+        """
+        Every output of this budget as an immutable record.
+        """
+        return BudgetResult(*(getattr(self, name) if name == "total_income" else getattr(self, name)()
+                              for name in self.OUTPUTS))
 
-    def calculate_tax(self) -> float:
+    def to_dict(self, brackets=True) -> dict:
         """
-        Calculate the total tax based on taxable income and tax brackets.
+        The inputs and every output of this budget as plain JSON-serializable values.
 
-        Returns:
-            float: The total tax owed.
+        Args:
+            brackets (bool, optional): Also include ``brackets``: for each tax component, one
+                ``bracket_breakdown`` per return as a dict of its fields.
         """
-        tax = 0
-        previous_bracket = 0
-        for i, bracket in enumerate(self.brackets):
-            # print("Bracket: ", bracket)
-            if self.taxable_income > bracket:
-                tax += (bracket - previous_bracket) * self.rates[i]
-                previous_bracket = bracket
-                # print("Rolling sum Tax: ", tax)
-            else:
-                tax += (self.taxable_income - previous_bracket) * self.rates[i]
-                # print("Tax: ", tax)
-                break
-        else:
-            # In case income exceeds the highest bracket
-            tax += (self.taxable_income - previous_bracket) * self.rates[-1]
+        values = {**self.household()._asdict(), **self.result()._asdict()}
+        if brackets:
+            values["brackets"] = {component: [breakdown._asdict() for breakdown in self.bracket_breakdown(component)]
+                                  for component in TaxBreakdown._fields}
+        return values
 
-        return round(tax, 2)
+    @property
+    def total_income(self):
+        return self.income1 + self.income2 + self.other_income
 
-    def print_summary(self):
-        print("Tax type: ", self.__class__.__name__)
-        print("Total Income: ", self.income)
-        print("Deductions: ", self.deductions)
-        print("Taxable Income: ", self.taxable_income)
-        print("Tax Liability: ", self.calculate_tax())
+    def breakdown(self, cents=False) -> TaxBreakdown:
+        """
+        Calculate every tax component once and cache the result until an input changes.
 
+        Only the components whose inputs changed since the last call are recalculated.
 
-class FederalTax(Tax):
-    def __init__(self, income, contr401k):
-        brackets = [23200, 94300, 201050, 383900, 487450, 731200, float("inf")]
-        rates = [.1, .12, .22, .24, .32, .35, .37]
-        std_deduction = 29200
-        deductions = std_deduction + contr401k
-        super().__init__(income, brackets, rates, deductions)
+        Args:
+            cents (bool, optional): Return exact integer cents instead of float dollars.
 
+        Returns:
+            TaxBreakdown: The liability of each tax component.
+        """
+        breakdown = self._breakdowns.get(cents)
+        if breakdown is None:
+            components = self._components
+            liabilities = []
+            for component in TaxBreakdown._fields:
+                key = (component, cents)
+                liability = components.get(key)
+                if liability is None:
+                    liability = components[key] = self._calculate_component(component, cents)
+                liabilities.append(liability)
+            breakdown = self._breakdowns[cents] = TaxBreakdown._make(liabilities)
+        return breakdown
 
-class StateTax(Tax):
-    def __init__(self, income, contr401k, state):
-        if state not in ["PA", "NY"]:
-            raise ValueError("Only [['PA', 'NY']] are supported.")
+    def breakdown_with_rates(self, wrt="income1") -> tuple[TaxBreakdown, TaxBreakdown]:
+        """
+        Calculate every tax component together with its marginal rate with respect to one input.
 
-        self.state = state
-        brackets = []
-        rates = []
-        deductions = 0
-        child_deduction = 1000
+        Each component's liability and rates come from the same bracket search, and are cached like
+        ``breakdown``. At a bracket boundary the rate is the one that applies to the next dollar.
 
-        if self.state == "PA":
-            brackets = [float("inf")]
-            rates = [0.0307]
-        elif self.state == "NY":
-            # Progressive tax for New York (2024 married filing jointly brackets)
-            brackets = [17150, 23600, 27900, 161550, 323200, 2155350, 5000000, 25000000, float("inf")]
-            rates = [0.04, 0.045, 0.0525, 0.055, .06, 0.0685, 0.0965, 0.103, 0.109]
-            ny_std_deduction = 16050
-            deductions = ny_std_deduction + contr401k + child_deduction
+        Args:
+            wrt (str, optional): The input to differentiate by: an income or a 401k contribution.
 
-        super().__init__(income, brackets, rates, deductions)
+        Returns:
+            tuple[TaxBreakdown, TaxBreakdown]: The liability of each component, and the change in
+            each component per extra dollar of ``wrt``; ``total`` of the latter is the combined rate.
+        """
+        self._check_marginal_wrt(wrt)
 
+        marginal_rates = {}
+        for component in TaxBreakdown._fields:
+            key = (component, "rates")
+            if key not in self._components:
+                liability = 0
+                rates = dict.fromkeys(self.MARGINAL_WRT, 0.0)
+                for tax, weights in zip(self._taxes(component), self._return_weights(component)):
+                    amount, first_rate, second_rate = tax.calculate_tax_with_rates()
+                    liability += amount
+                    if weights is None:  # Social Security: one rate per spouse
+                        rates["income1"] += first_rate
+                        rates["income2"] += second_rate
+                        continue
+                    for name, weight in weights.items():
+                        rates[name] += (first_rate if name in self.INCOME_INPUTS else second_rate) * weight
+                self._components[(component, False)] = liability
+                self._components[key] = rates
+            marginal_rates[component] = self._components[key][wrt]
+        return self.breakdown(), TaxBreakdown(**marginal_rates)
 
-class LocalTax(Tax):
-    def __init__(self, income, state):
-        if state not in ["PA", "NY"]:
-            raise ValueError("Only [['PA', 'NY']] are supported.")
+    def marginal_rates(self, wrt="income1") -> TaxBreakdown:
+        """
+        The change in each tax component per extra dollar of ``wrt``; see ``breakdown_with_rates``.
+        """
+        return self.breakdown_with_rates(wrt)[1]
 
-        self.state = state
-        rates = [0.04] if self.state == "NY" else [0.01]
-        brackets = [float("inf")]
-        deductions = 0
+    def bracket_breakdown(self, component) -> list[BracketBreakdown]:
+        """
+        How each return's taxable income spreads over the brackets of one tax component.
 
-        super().__init__(income, brackets, rates, deductions)
+        The breakdown and liability come from the same bracket search, and are cached like
+        ``breakdown``. Couples filing separately get one breakdown per return; Social Security one
+        for the couple.
 
+        Args:
+            component (str): A ``TaxBreakdown`` field, such as ``"federal"``.
 
-class SocialSecurityTax(Tax):
-    def __init__(self, income1, income2):
-        income_cap = 168600  # per person
-        self.base1 = min(income1, income_cap)
-        self.base2 = min(income2, income_cap)
-        income = income1 + income2
-        rates = [0.062]
-        brackets = [float("inf")]
-        super().__init__(income, brackets, rates, deductions=0)
+        Returns:
+            list[BracketBreakdown]: One breakdown per return, in unrounded dollars.
+        """
+        if component not in TaxBreakdown._fields:
+            raise ValueError(f"Unknown tax component {component}; expected any of {', '.join(TaxBreakdown._fields)}.")
+        key = (component, "brackets")
+        if key not in self._components:
+            results = [tax.calculate_tax_with_breakdown() for tax in self._taxes(component)]
+            self._components[(component, False)] = sum(amount for amount, _ in results)
+            self._components[key] = [breakdown for _, breakdown in results]
+        return self._components[key]
 
-    def calculate_tax(self) -> float:
-        return (self.base1 + self.base2) * self.rates[0]
+    @classmethod
+    def _check_marginal_wrt(cls, wrt):
+        if wrt not in cls.MARGINAL_WRT:
+            raise ValueError(f"Cannot calculate marginal rates with respect to {wrt}; "
+                             f"expected any of {', '.join(sorted(cls.MARGINAL_WRT))}.")
 
+    def _check_single_return(self):
+        if self.filing_status == "married_separately":
+            raise ValueError("Couples filing separately file two returns; this is only supported by the "
+                             "breakdown and batch calculations.")
 
-class MedicareTax(Tax):
-    def __init__(self, income):
-        rates = [0.0145]
-        brackets = [float("inf")]
-        self.extra_tax_rate = 0.009
-        self.extra_tax_threshold = 250000
-        super().__init__(income, brackets, rates, deductions=0)
+    def _returns(self) -> list[tuple[float, float]]:
+        """
+        The income tax returns this household files, as (income, 401k contribution).
 
-    def calculate_tax(self) -> float:
-        extra_tax = max(0.0, self.income - self.extra_tax_threshold) * self.extra_tax_rate
-        return round(self.income * self.rates[0] + extra_tax, 2)
+        A married couple filing separately files one return per spouse, splitting other income
+        evenly; every other status files one return for the household's total.
+        """
+        if self.filing_status == "married_separately":
+            half = self.other_income / 2
+            return [(self.income1 + half, self.contr401k1), (self.income2 + half, self.contr401k2)]
+        return [(self.income1 + self.income2 + self.other_income, self.contr401k1 + self.contr401k2)]
 
+    def _return_weights(self, component) -> list[dict]:
+        """
+        The share of each input that lands on each return of one component, matching ``_taxes``;
+        None for Social Security, which has one rate per spouse instead.
+        """
+        if component == "social_security":
+            return [None]
+        if self.filing_status == "married_separately":
+            return [{"income1": 1.0, "other_income": 0.5, "contr401k1": 1.0},
+                    {"income2": 1.0, "other_income": 0.5, "contr401k2": 1.0}]
+        return [dict.fromkeys(self.MARGINAL_WRT, 1.0)]
 
-class Budget:
-    def __init__(self, income1, income2, other_income, contr401k1, contr401k2, state,
-                 fed_tax_paid=0, state_tax_paid=0, local_tax_paid=0, social_sec_tax_paid=0, medicare_tax_paid=0):
-        self.income1 = income1
-        self.income2 = income2
-        self.other_income = other_income
-        self.total_income = income1 + income2 + other_income
-        self.contr401k1 = contr401k1
-        self.contr401k2 = contr401k2
-        self.state = state
+    def _tax_inputs(self, component) -> list[tuple[type, tuple]]:
+        """
+        The tax class and constructor arguments of one component, one per return.
+        """
+        year, filing_status = self.year, self.filing_status
+        if component == "social_security":
+            return [(SocialSecurityTax, (self.income1, self.income2, year, filing_status))]
+        inputs = []
+        for income, contr401k in self._returns():
+            if component == "federal":
+                inputs.append((FederalTax, (income, contr401k, year, filing_status)))
+            elif component == "state":
+                inputs.append((StateTax, (income, contr401k, self.state, year, filing_status)))
+            elif component == "local":
+                inputs.append((LocalTax, (income, self.state, year, filing_status)))
+            else:
+                inputs.append((MedicareTax, (income, year, filing_status)))
+        return inputs
 
-        self.fed_tax_paid = fed_tax_paid
-        self.state_tax_paid = state_tax_paid
-        self.local_tax_paid = local_tax_paid
-        self.social_sec_tax_paid = social_sec_tax_paid
-        self.medicare_tax_paid = medicare_tax_paid
+    def _taxes(self, component) -> list[Tax]:
+        """
+        The tax objects of one component, one per return.
+        """
+        return [tax_class(*arguments) for tax_class, arguments in self._tax_inputs(component)]
+
+    def _calculate_component(self, component, cents):
+        cache = self.result_cache
+        liability = 0
+        for tax_class, arguments in self._tax_inputs(component):
+            if cache is not None:
+                liability += cache.get(tax_class, arguments, cents)
+            else:
+                tax = tax_class(*arguments)
+                liability += tax.calculate_tax_cents() if cents else tax.calculate_tax()
+        return liability
 
     def federal_tax(self):
-        return FederalTax(self.total_income, self.contr401k1 + self.contr401k2).calculate_tax()
+        return self.breakdown().federal
 
     def state_tax(self):
-        return StateTax(self.total_income, self.contr401k1 + self.contr401k2, self.state).calculate_tax()
+        return self.breakdown().state
 
     def local_tax(self):
-        return LocalTax(self.total_income, self.state).calculate_tax()
+        return self.breakdown().local
 
     def social_sec_tax(self):
-        return SocialSecurityTax(self.income1, self.income2).calculate_tax()
+        return self.breakdown().social_security
 
     def medicare_tax(self):
-        return MedicareTax(self.total_income).calculate_tax()
+        return self.breakdown().medicare
 
     def total_tax(self):
-        return self.federal_tax() + self.state_tax() + self.local_tax() + self.social_sec_tax() + self.medicare_tax()
+        return self.breakdown().total
 
     def federal_tax_owed(self):
         return (self.federal_tax() - self.fed_tax_paid) + \
@@ -188,6 +1471,456 @@ class Budget:
             return 0.0
         return round(self.total_tax() / self.total_income * 100, 2)
 
+    @classmethod
+    def calculate_batch(cls, income1, income2, other_income, contr401k1, contr401k2, state,
+                        fed_tax_paid=0, state_tax_paid=0, local_tax_paid=0, social_sec_tax_paid=0, medicare_tax_paid=0,
+                        year=DEFAULT_YEAR, filing_status=DEFAULT_FILING_STATUS, cents=False, marginal_rates=None):
+        """
+        Evaluate many households at once with the vectorized tax engine.
+
+        Takes the same arguments as the constructor, as arrays with one entry per household
+        (scalars are broadcast), and matches the scalar accessors exactly. Households may mix
+        states, years and filing statuses; each distinct (jurisdiction, year, filing status) is
+        evaluated against its own schedule, and the second return of couples filing separately is
+        evaluated for those households only. With ``cents``, every amount is computed and returned
+        as exact int64 cents, matching ``breakdown(cents=True)``; the effective rate stays a float
+        percentage. With ``marginal_rates`` set to an input name, the marginal rates with respect
+        to that input (see ``breakdown_with_rates``) are returned as well, from the same bracket
+        searches.
+
+        Returns:
+            dict[str, numpy.ndarray]: One array per name in ``Budget.OUTPUTS``, plus one per name in
+            ``Budget.MARGINAL_OUTPUTS`` with ``marginal_rates``.
+        """
+        import numpy as np
+
+        if marginal_rates is not None:
+            cls._check_marginal_wrt(marginal_rates)
+        income1 = np.asarray(income1, dtype=np.float64)
+        income2 = np.asarray(income2, dtype=np.float64)
+        other_income = np.asarray(other_income, dtype=np.float64)
+        contr401k1 = np.asarray(contr401k1, dtype=np.float64)
+        contr401k2 = np.asarray(contr401k2, dtype=np.float64)
+        total_income = income1 + income2 + other_income
+        contr401k = contr401k1 + contr401k2
+
+        shape = np.broadcast_shapes(total_income.shape, contr401k.shape, np.shape(state), np.shape(year),
+                                    np.shape(filing_status))
+        income1, income2, other_income, contr401k1, contr401k2, total_income, contr401k = (
+            np.broadcast_to(values, shape) for values in
+            (income1, income2, other_income, contr401k1, contr401k2, total_income, contr401k))
+        state, year, filing_status = (values if np.ndim(values) == 0 else np.broadcast_to(np.asarray(values), shape)
+                                      for values in (state, year, filing_status))
+
+        # Couples filing separately file one return per spouse; everyone else files one return
+        # for the household, so only the separate filers need a second pass.
+        separate = np.broadcast_to(np.asarray(filing_status) == "married_separately", shape)
+        separate = separate if separate.any() else None
+        if separate is None:
+            income, contributions = total_income, contr401k
+        else:
+            income = np.where(separate, income1 + other_income / 2, total_income)
+            contributions = np.where(separate, contr401k1, contr401k)
+
+        components = {
+            "federal": lambda income, contributions, state, **options:
+                FederalTax.calculate_tax_batch(income, contributions, **options),
+            "state": lambda income, contributions, state, **options:
+                StateTax.calculate_tax_batch(income, contributions, state, **options),
+            "local": lambda income, contributions, state, **options:
+                LocalTax.calculate_tax_batch(income, state, **options),
+            "medicare": lambda income, contributions, state, **options:
+                MedicareTax.calculate_tax_batch(income, **options),
+        }
+        with_rates = marginal_rates is not None
+        options = {"cents": cents, "with_rates": with_rates, "year": year, "filing_status": filing_status}
+        results = {component: calculate(income, contributions, state, **options)
+                   for component, calculate in components.items()}
+        results["social_security"] = SocialSecurityTax.calculate_tax_batch(income1, income2, **options)
+        if separate is not None:
+            def spouses(values):
+                return values if np.ndim(values) == 0 else values[separate]
+
+            second_options = {**options, "year": spouses(year), "filing_status": spouses(filing_status)}
+            second_income = income2[separate] + other_income[separate] / 2
+            for component, calculate in components.items():
+                second = calculate(second_income, contr401k2[separate], spouses(state), **second_options)
+                results[component] = cls._add_second_return(results[component], second, separate,
+                                                             marginal_rates)
+
+        rates = {}
+        if with_rates:
+            for component in TaxBreakdown._fields:
+                tax, first_rate, second_rate = results[component]
+                results[component] = tax
+                if component == "social_security":
+                    rate = {"income1": first_rate, "income2": second_rate}.get(marginal_rates)
+                else:
+                    rate = first_rate if marginal_rates in cls.INCOME_INPUTS else second_rate
+                rates[component] = np.zeros(tax.shape) if rate is None else rate
+            rates = TaxBreakdown(**rates)
+            rates = dict(zip(cls.MARGINAL_OUTPUTS, rates + (rates.total,)))
+
+        federal, state_tax, local, social_security, medicare = (results[name] for name in TaxBreakdown._fields)
+        total = federal + state_tax + local + social_security + medicare
+
+        if cents:
+            total_income = _to_cents_batch(total_income)
+            fed_tax_paid, state_tax_paid, local_tax_paid, social_sec_tax_paid, medicare_tax_paid = (
+                _to_cents_batch(paid) for paid in
+                (fed_tax_paid, state_tax_paid, local_tax_paid, social_sec_tax_paid, medicare_tax_paid))
+
+        rate = np.divide(total, total_income, out=np.zeros(total.shape), where=total_income != 0)
+        eff_tax_rate = np.where(total_income == 0, 0.0, _round_cents(rate * 100))
+
+        return {
+            "total_income": total_income,
+            "federal_tax": federal,
+            "state_tax": state_tax,
+            "local_tax": local,
+            "social_sec_tax": social_security,
+            "medicare_tax": medicare,
+            "total_tax": total,
+            "federal_tax_owed": (federal - fed_tax_paid) + (social_security - social_sec_tax_paid) +
+                                (medicare - medicare_tax_paid),
+            "state_tax_owed": state_tax - state_tax_paid,
+            "local_tax_owed": local - local_tax_paid,
+            "eff_tax_rate": eff_tax_rate,
+            **rates,
+        }
+
+    @classmethod
+    def _add_second_return(cls, first, second, separate, wrt):
+        """
+        Add the tax on the second spouse's return to the households filing separately, whose
+        first-return results are in ``first``; with rates, take the rate of the matching return.
+        """
+        import numpy as np
+
+        if wrt is None:
+            first[separate] += second
+            return first
+        tax, first_rate, second_rate = first
+        tax[separate] += second[0]
+        rates = [first_rate, second_rate]
+        for position, rate in enumerate(rates):
+            # The first rate follows incomes, the second contributions (see _returns).
+            names = cls.INCOME_INPUTS if position == 0 else cls.CONTRIBUTION_INPUTS
+            if wrt not in names:
+                continue
+            rate = rates[position] = np.array(rate)
+            if wrt in ("income2", "contr401k2"):
+                rate[separate] = second[position + 1]
+            elif wrt == "other_income":
+                rate[separate] = rate[separate] * 0.5 + second[1] * 0.5
+        return (tax, *rates)
+
+    def sweep(self, **axes):
+        """
+        Evaluate this budget over a grid of what-if values in one vectorized pass.
+
+        Each keyword names an input (e.g. ``state``, ``contr401k1``, ``income2``, ``fed_tax_paid``)
+        and gives the values to try, or a single value; every other input keeps this budget's value.
+        The Cartesian product of all axes is evaluated with ``calculate_batch``.
+
+        Example:
+            budget.sweep(state=["NY", "PA"], contr401k1=range(0, 23001, 1000))
+
+        Returns:
+            numpy.ndarray: A structured array shaped like the grid, one dimension per keyword in the
+            order given, with a field for every input and every name in ``Budget.OUTPUTS``.
+        """
+        import numpy as np
+
+        fields = self.ARGUMENTS
+        shape, grid = self.sweep_grid(**axes)
+        size = math.prod(shape)
+        columns = {name: grid[name] if name in grid else np.broadcast_to(np.asarray(getattr(self, name)), (size,))
+                   for name in fields}
+        results = self.calculate_batch(**columns)
+
+        for name in self.TEXT_INPUTS:
+            columns[name] = columns[name].astype(str)
+        dtype = [(name, columns[name].dtype if name in self.TEXT_INPUTS else np.int64 if name == "year" else
+                  np.float64)
+                 for name in fields + self.OUTPUTS]
+        table = np.empty(size, dtype=dtype)
+        for name in fields:
+            table[name] = columns[name]
+        for name in self.OUTPUTS:
+            table[name] = results[name]
+        return table.reshape(shape)
+
+    @classmethod
+    def sweep_grid(cls, **axes) -> tuple[tuple[int, ...], dict]:
+        """
+        The Cartesian product of sweep axes (as for ``sweep``) as flat input columns, one row per cell.
+
+        Returns:
+            tuple: The grid shape, one dimension per keyword in the order given, and a dict of one
+            flat array per axis, typed like ``calculate_batch`` inputs (str, int64 ``year``, float64).
+        """
+        import numpy as np
+
+        unknown = [name for name in axes if name not in cls.ARGUMENTS]
+        if unknown:
+            raise ValueError(f"Cannot sweep over {', '.join(unknown)}; expected any of {', '.join(cls.ARGUMENTS)}.")
+
+        # A string or any other non-iterable is a single value: an axis of length one.
+        values = [np.atleast_1d(np.asarray(
+            axis if isinstance(axis, (str, np.ndarray)) or not isinstance(axis, Iterable) else list(axis),
+            dtype=str if name in cls.TEXT_INPUTS else np.int64 if name == "year" else np.float64))
+            for name, axis in axes.items()]
+        if any(value.size == 0 for value in values):
+            raise ValueError("Sweep axes cannot be empty.")
+        shape = tuple(len(value) for value in values)
+        return shape, dict(zip(axes, (axis.ravel() for axis in np.meshgrid(*values, indexing="ij"))))
+
+    def compare_filing_statuses(self, statuses=FILING_STATUSES) -> dict[str, BudgetResult]:
+        """
+        Evaluate this household under each filing status in one vectorized pass.
+
+        Returns:
+            dict[str, BudgetResult]: The outputs under each status, in the order given.
+        """
+        import numpy as np
+
+        columns = self.household()._asdict()
+        columns["filing_status"] = np.array(statuses, dtype=str)
+        results = self.calculate_batch(**columns)
+        return {status: BudgetResult(*(results[name][index].item() for name in self.OUTPUTS))
+                for index, status in enumerate(statuses)}
+
+    def cheapest_filing_status(self, statuses=("married_jointly", "married_separately")) -> str:
+        """
+        The filing status with the least total tax; of equally taxed statuses the first given wins.
+        """
+        results = self.compare_filing_statuses(statuses)
+        return min(statuses, key=lambda status: results[status].total_tax)
+
+    @classmethod
+    def compare_filing_statuses_batch(cls, statuses=FILING_STATUSES, **columns) -> dict[str, dict]:
+        """
+        Vectorized ``compare_filing_statuses``: evaluate many households under each filing status.
+
+        ``columns`` are ``calculate_batch`` arguments other than ``filing_status``; every status is
+        evaluated for every household in a single call.
+
+        Returns:
+            dict[str, dict[str, numpy.ndarray]]: The ``calculate_batch`` outputs under each status.
+        """
+        import numpy as np
+
+        if "filing_status" in columns:
+            raise ValueError("Filing statuses are given by the statuses argument.")
+        # One row per status, broadcast against the households.
+        filing_status = np.array(statuses, dtype=str).reshape((len(statuses),) + (1,) * max(
+            (np.ndim(value) for value in columns.values()), default=0))
+        results = cls.calculate_batch(**columns, filing_status=filing_status)
+        return {status: {name: values[index] for name, values in results.items()}
+                for index, status in enumerate(statuses)}
+
+    def simulate(self, draws: int = 10_000, seed=None, quantiles=SIMULATION_QUANTILES,
+                 outputs=("total_tax", "federal_tax_owed"), **incomes) -> dict[str, dict[float, float]]:
+        """
+        Evaluate this budget over random income scenarios in one vectorized pass.
+
+        Each keyword names an income input (``income1``, ``income2`` or ``other_income``) and gives
+        its distribution: a ``NormalIncome``, ``LogNormalIncome`` or ``UniformIncome`` (or anything
+        with a ``sample(rng, size)`` method), or a tuple of such distributions and fixed amounts whose
+        draws are added. Every other input keeps this budget's value, including the taxes paid.
+        Draws are taken in the order of ``INCOME_INPUTS``, so the same seed gives the same scenarios.
+
+        Example:
+            budget.simulate(income1=(180000, NormalIncome(30000, 10000), LogNormalIncome(60000, 0.35)),
+                            draws=100_000, seed=7)
+
+        Returns:
+            dict[str, dict[float, float]]: For each name in ``outputs``, its value at each quantile.
+        """
+        import numpy as np
+
+        unknown = [name for name in incomes if name not in self.INCOME_INPUTS]
+        if unknown:
+            raise ValueError(f"Cannot simulate {', '.join(unknown)}; expected any of {', '.join(self.INCOME_INPUTS)}.")
+        unknown = [name for name in outputs if name not in self.OUTPUTS]
+        if unknown:
+            raise ValueError(f"Unknown outputs {', '.join(unknown)}; expected any of {', '.join(self.OUTPUTS)}.")
+        if draws <= 0:
+            raise ValueError("The number of draws must be positive.")
+
+        rng = np.random.default_rng(seed)
+        columns = self.household()._asdict()
+        for name in self.INCOME_INPUTS:
+            if name in incomes:
+                columns[name] = _sample_income(incomes[name], rng, draws)
+        results = self.calculate_batch(**columns)
+        probabilities = [float(q) for q in quantiles]
+        return {name: dict(zip(probabilities, np.quantile(np.broadcast_to(results[name], (draws,)),
+                                                          probabilities).tolist()))
+                for name in outputs}
+
+    def optimize_contributions(self, limit_per_person=None, min_take_home=None) -> ContributionPlan:
+        """
+        Find the 401k contributions that minimize total tax, optionally keeping a minimum take-home.
+
+        Contributions only change the tax through federal and state deductions, so the total tax is a
+        piecewise-linear, non-increasing function of the combined contribution whose breakpoints are
+        where taxable income crosses a bracket boundary or reaches zero. Only those breakpoints are
+        evaluated; with ``min_take_home`` the segment where take-home falls below it is solved linearly.
+        Of equally taxed plans the one with the smallest contribution is chosen, and the total is
+        split as evenly as each person's limit and income allow. This budget is left unchanged.
+        Couples filing separately are not supported, since their contributions reduce different returns.
+
+        Args:
+            limit_per_person (float, optional): The contribution limit per person. Defaults to the
+                federal limit for this budget's year.
+            min_take_home (float, optional): The least take-home pay (income less taxes and
+                contributions) to keep.
+
+        Returns:
+            ContributionPlan: The best contributions and the resulting total tax and take-home.
+        """
+        self._check_single_return()
+        federal = JURISDICTIONS.get("federal", "US", self.year, self.filing_status)
+        if limit_per_person is None:
+            limit_per_person = federal.contribution_limit
+        if limit_per_person < 0:
+            raise ValueError("Contribution limit cannot be negative.")
+
+        caps = (max(0, min(limit_per_person, self.income1)), max(0, min(limit_per_person, self.income2)))
+        max_total = caps[0] + caps[1]
+        budget = Budget.from_household(self.household())
+
+        def evaluate(total):
+            contr401k1 = round(min(caps[0], max(total / 2, total - caps[1])), 2)
+            budget.contr401k1, budget.contr401k2 = contr401k1, round(total - contr401k1, 2)
+            tax = budget.total_tax()
+            return ContributionPlan(budget.contr401k1, budget.contr401k2, tax, budget.total_income - tax - total)
+
+        totals = {0, max_total}
+        for rules in (federal, JURISDICTIONS.get("state", self.state, self.year, self.filing_status)):
+            if rules.pretax_401k:
+                base = rules.deductions(0)
+                for boundary in (0,) + rules.schedule.brackets[:-1]:
+                    total = round(self.total_income - base - boundary, 2)
+                    if 0 < total < max_total:
+                        totals.add(total)
+        plans = [evaluate(total) for total in sorted(totals)]
+
+        if min_take_home is not None:
+            if plans[0].take_home < min_take_home:
+                raise ValueError(f"Take-home pay is below {min_take_home} even without contributions.")
+            feasible = [plan for plan in plans if plan.take_home >= min_take_home]
+            if len(feasible) < len(plans):
+                # Take-home falls below the minimum within this segment; it is linear there.
+                before, after = feasible[-1], plans[len(feasible)]
+                start, end = before.contr401k1 + before.contr401k2, after.contr401k1 + after.contr401k2
+                fraction = (before.take_home - min_take_home) / (before.take_home - after.take_home)
+                total = int((start + fraction * (end - start)) * 100) / 100
+                plan = evaluate(total)
+                while plan.take_home < min_take_home and total > start:
+                    total = round(total - 0.01, 2)
+                    plan = evaluate(total)
+                feasible.append(plan)
+            plans = feasible
+
+        return min(plans, key=lambda plan: plan.total_tax)
+
+    def required_income(self, target_take_home=None, target_tax=None, wrt="income1") -> float:
+        """
+        Solve for the income that gives a target take-home pay or a target total tax.
+
+        Every other input keeps this budget's value. Total tax is a piecewise-linear, increasing
+        function of any one income, with breakpoints at the bracket boundaries, the Social Security
+        cap and the Medicare surtax threshold, so the answer is read off that function directly
+        instead of by repeated evaluation. The result is rounded to the cent, so the tax of a
+        budget built with it can differ from the target by the rounding of each component.
+
+        Args:
+            target_take_home (float, optional): The total income less taxes and 401k contributions to reach.
+            target_tax (float, optional): The total tax to reach.
+            wrt (str, optional): The income to solve for: ``income1``, ``income2`` or ``other_income``.
+
+        Returns:
+            float: The required value of ``wrt``.
+        """
+        incomes, targets = self._income_table(target_take_home, target_tax, wrt)
+        target = target_tax if target_take_home is None else target_take_home
+        if target < targets[0]:
+            raise ValueError(f"Target {target} cannot be reached with a non-negative {wrt}.")
+        # The segment ending at the first breakpoint at or above the target; past the end, the last one.
+        index = max(bisect_left(targets, target, hi=len(targets) - 1) - 1, 0)
+        slope = (incomes[index + 1] - incomes[index]) / (targets[index + 1] - targets[index])
+        return round(incomes[index] + (target - targets[index]) * slope, 2)
+
+    def required_income_batch(self, target_take_home=None, target_tax=None, wrt="income1"):
+        """
+        Vectorized ``required_income``: solve for many targets of the same kind at once.
+
+        Returns:
+            numpy.ndarray: The required value of ``wrt`` for each target.
+        """
+        import numpy as np
+
+        incomes, targets = (np.array(table) for table in self._income_table(target_take_home, target_tax, wrt))
+        target = np.asarray(target_tax if target_take_home is None else target_take_home, dtype=np.float64)
+        if (target < targets[0]).any():
+            raise ValueError(f"Targets below {targets[0]} cannot be reached with a non-negative {wrt}.")
+        # np.interp clamps at the last breakpoint; beyond it the function continues with the last slope.
+        slope = (incomes[-1] - incomes[-2]) / (targets[-1] - targets[-2])
+        result = np.where(target > targets[-1], incomes[-1] + (target - targets[-1]) * slope,
+                          np.interp(target, targets, incomes))
+        return _round_cents(result)
+
+    def _income_table(self, target_take_home, target_tax, wrt) -> tuple[list, list]:
+        """
+        Tabulate the piecewise-linear take-home or total tax at each breakpoint of one income.
+
+        Returns:
+            tuple[list, list]: Increasing values of ``wrt``, ending one dollar past the last
+            breakpoint, and the unrounded take-home or total tax at each.
+        """
+        if (target_take_home is None) == (target_tax is None):
+            raise ValueError("Give exactly one of target_take_home and target_tax.")
+        if wrt not in ("income1", "income2", "other_income"):
+            raise ValueError(f"Cannot solve for {wrt}; expected any of income1, income2, other_income.")
+        self._check_single_return()
+
+        other_incomes = self.total_income - getattr(self, wrt)
+        contr401k = self.contr401k1 + self.contr401k2
+        schedules = []
+        for level in ("federal", "state", "local"):
+            rules = JURISDICTIONS.get(level, "US" if level == "federal" else self.state, self.year,
+                                      self.filing_status)
+            schedules.append((rules.schedule, rules.deductions(0 if level == "local" else contr401k)))
+
+        social_security = JURISDICTIONS.get("payroll", "social_security", self.year, self.filing_status)
+        medicare = JURISDICTIONS.get("payroll", "medicare", self.year, self.filing_status)
+        breakpoints = {0.0, medicare.surtax_threshold - other_incomes}
+        if wrt != "other_income":
+            breakpoints.add(float(social_security.wage_base))
+        for schedule, deductions in schedules:
+            breakpoints.update(deductions + boundary - other_incomes for boundary in (0,) + schedule.brackets[:-1])
+        incomes = sorted(income for income in breakpoints if 0 <= income < INF)
+        incomes.append(incomes[-1] + 1)
+
+        income1, income2 = self.income1, self.income2
+        wage_base, ss_rate = social_security.wage_base, social_security.schedule.rates[0]
+        targets = []
+        for income in incomes:
+            total_income = other_incomes + income
+            if wrt == "income1":
+                income1 = income
+            elif wrt == "income2":
+                income2 = income
+            tax = sum(schedule.tax(max(total_income - deductions, 0)) for schedule, deductions in schedules)
+            tax += (min(income1, wage_base) + min(income2, wage_base)) * ss_rate
+            tax += total_income * medicare.schedule.rates[0] + \
+                max(0.0, total_income - medicare.surtax_threshold) * medicare.surtax_rate
+            targets.append(tax if target_take_home is None else total_income - tax - contr401k)
+        return incomes, targets
+
     def print_summary(self):
         print("Total Income:", self.total_income)
         print(f"Federal tax (incl. Medicare & SS): {self.federal_tax() + self.social_sec_tax() + self.medicare_tax()}")
@@ -200,56 +1933,281 @@ class Budget:
         print(f"Effective Tax Rate: {self.eff_tax_rate()}%")
 
 
+class BudgetFrame:
+    """
+    Many household budgets stored column by column, as parallel typed NumPy arrays.
+
+    Each input is one read-only array: float64 amounts, int64 ``year``, and one-byte codes for
+    the text inputs (``filing_status`` into ``FILING_STATUSES``, ``state`` into the frame's own
+    table of states), so a household costs 90 bytes instead of a ``Budget`` object. Rows are read
+    back as ``Household`` records, ``budget(i)`` gives a ``Budget`` for drilling into one
+    household, and ``results()`` evaluates every row in one vectorized pass.
+    """
+
+    __slots__ = ("_columns", "_states", "_results")
+
+    def __init__(self, columns: dict):
+        """
+        Args:
+            columns (dict): One sequence per ``Budget`` constructor argument, all the same length;
+                omitted ``*_paid`` columns and scalars are broadcast.
+        """
+        import numpy as np
+
+        missing = [name for name in Household._fields if name not in columns and name not in Household._field_defaults]
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+        unknown = [name for name in columns if name not in Household._fields]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+
+        arrays = {name: np.array(columns.get(name, Household._field_defaults.get(name)),
+                                 dtype=str if name in Budget.TEXT_INPUTS else
+                                 np.int64 if name == "year" else np.float64)
+                  for name in Household._fields}
+        states, codes = np.unique(arrays["state"], return_inverse=True)
+        arrays["state"] = codes.reshape(arrays["state"].shape).astype(np.min_scalar_type(max(len(states) - 1, 0)))
+        statuses, codes = np.unique(arrays["filing_status"], return_inverse=True)
+        unknown = sorted(set(statuses.tolist()) - set(FILING_STATUSES))
+        if unknown:
+            raise ValueError(f"Unknown filing statuses: {', '.join(unknown)}; "
+                             f"expected any of {', '.join(FILING_STATUSES)}.")
+        status_codes = np.array([FILING_STATUSES.index(status) for status in statuses.tolist()], dtype=np.int8)
+        arrays["filing_status"] = status_codes[codes.reshape(arrays["filing_status"].shape)]
+
+        size = max((array.shape[0] for array in arrays.values() if array.ndim), default=1)
+        for name, array in arrays.items():
+            if array.ndim != 1 or array.shape[0] != size:
+                try:
+                    array = np.ascontiguousarray(np.broadcast_to(array, (size,)))
+                except ValueError:
+                    raise ValueError("All columns must have the same length.") from None
+            array.flags.writeable = False
+            arrays[name] = array
+        self._columns = arrays
+        self._states = tuple(states.tolist())
+        self._results = {}
+
+    @classmethod
+    def _wrap(cls, arrays: dict, states: tuple) -> BudgetFrame:
+        frame = cls.__new__(cls)
+        for array in arrays.values():
+            array.flags.writeable = False
+        frame._columns = arrays
+        frame._states = states
+        frame._results = {}
+        return frame
+
+    @classmethod
+    def from_households(cls, households) -> BudgetFrame:
+        """
+        Build a frame from ``Household`` records or tuples in ``Budget`` constructor order.
+        """
+        rows = [Household(*household) for household in households]
+        return cls({name: [getattr(row, name) for row in rows] for name in Household._fields})
+
+    def __len__(self):
+        return self._columns["state"].shape[0]
+
+    def __getitem__(self, index):
+        """
+        A ``Household`` for an integer index, or a frame of the selected rows for a slice, an index
+        array or a boolean mask; slices share memory with this frame.
+        """
+        import numpy as np
+
+        if isinstance(index, (int, np.integer)):
+            values = {name: array[index].item() for name, array in self._columns.items()}
+            values["state"] = self._states[values["state"]]
+            values["filing_status"] = FILING_STATUSES[values["filing_status"]]
+            return Household(**values)
+        return self._wrap({name: array[index] for name, array in self._columns.items()}, self._states)
+
+    def __iter__(self):
+        return map(Household._make, zip(*(self.column(name).tolist() for name in Household._fields)))
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({len(self)} households)"
+
+    def column(self, name: str):
+        """
+        The read-only array of one input; text inputs are decoded from their codes into a new array.
+        """
+        import numpy as np
+
+        array = self._columns[name]
+        if name == "state":
+            array = np.array(self._states, dtype=str)[array]
+        elif name == "filing_status":
+            array = np.array(FILING_STATUSES)[array]
+        else:
+            return array
+        array.flags.writeable = False
+        return array
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self._columns.values())
+
+    def budget(self, index: int) -> Budget:
+        """
+        A ``Budget`` for one household, with the full scalar API.
+        """
+        return Budget.from_household(self[index])
+
+    def results(self, cents: bool = False) -> dict:
+        """
+        Evaluate every household with ``Budget.calculate_batch``, once per ``cents`` mode.
+
+        Returns:
+            dict[str, numpy.ndarray]: One read-only array per name in ``Budget.OUTPUTS``.
+        """
+        if cents not in self._results:
+            results = Budget.calculate_batch(**{name: self.column(name) for name in Household._fields}, cents=cents)
+            for array in results.values():
+                array.flags.writeable = False
+            self._results[cents] = results
+        return self._results[cents]
+
+    def result(self, index: int, cents: bool = False) -> BudgetResult:
+        """
+        The outputs of one household, read from the vectorized ``results``.
+        """
+        results = self.results(cents)
+        return BudgetResult(*(results[name][index].item() for name in BudgetResult._fields))
+
+
+def _household_objects(value, line: int):
+    for item in value if isinstance(value, list) else [value]:
+        if not isinstance(item, dict):
+            raise ValueError(f"line {line}: expected a JSON object of household inputs")
+        yield line, item
+
+
+def read_households(lines):
+    """
+    Parse household JSON objects from lines of text: one object per line (NDJSON), objects spread
+    over several lines, or a JSON array of objects.
+
+    NDJSON is parsed line by line as it streams in. At the first line that does not hold a whole
+    document, the rest of the input is read at once and decoded document by document, so
+    multi-line input is parsed in a single pass.
+
+    Yields:
+        tuple[int, dict]: The line each object starts on and the object.
+    """
+    lines = iter(lines)
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            value = json.loads(line)
+        except json.JSONDecodeError as error:
+            # JSON strings cannot span lines, so a document that is merely unfinished fails at its end.
+            if error.pos < len(line.rstrip()):
+                raise ValueError(f"line {number}: invalid JSON: {error.msg}") from None
+            yield from _read_documents(line + "".join(lines), number)
+            return
+        yield from _household_objects(value, number)
+
+
+def _read_documents(text: str, first_line: int):
+    """
+    Decode consecutive JSON documents from ``text``, which starts on line ``first_line``.
+    """
+    from json.decoder import WHITESPACE
+
+    decoder = json.JSONDecoder()
+    position, line = 0, first_line
+    while True:
+        start = WHITESPACE.match(text, position).end()
+        if start == len(text):
+            return
+        line += text.count("\n", position, start)
+        try:
+            value, position = decoder.raw_decode(text, start)
+        except json.JSONDecodeError as error:
+            if not text[error.pos:].strip():
+                raise ValueError(f"line {line}: invalid JSON: the input ends inside this document") from None
+            raise ValueError(f"line {first_line + error.lineno - 1}: invalid JSON: {error.msg}") from None
+        yield from _household_objects(value, line)
+        line += text.count("\n", start, position)
+
+
+def budget_from_dict(values: dict) -> Budget:
+    """
+    Build a budget from a dict of ``Budget`` constructor arguments, as read from JSON.
+    """
+    unknown = [name for name in values if name not in Budget.ARGUMENTS]
+    if unknown:
+        raise ValueError(f"Unknown inputs {', '.join(unknown)}; expected any of {', '.join(Budget.ARGUMENTS)}.")
+    missing = [name for name in Household._fields if name not in Household._field_defaults and name not in values]
+    if missing:
+        raise ValueError(f"Missing inputs: {', '.join(missing)}")
+    return Budget(**values)
+
+
+def main(argv=None) -> int:
+    """
+    Read households as JSON and write each one's full budget as one JSON object per line.
+
+    ``batch`` as the first argument runs the CSV/Parquet batch mode instead (see ``batch.main``),
+    and ``serve`` the calculation server (see ``server.main``); only those modes import NumPy.
+    """
+    import argparse
+    import sys
+
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["batch"]:
+        import batch
+        return batch.main(argv[1:])
+    if argv[:1] == ["serve"]:
+        import server
+        return server.main(argv[1:])
+
+    parser = argparse.ArgumentParser(prog="python -m taxes",
+                                     description="Evaluate household budgets given as JSON. Use 'batch' as the "
+                                                 "first argument for CSV or Parquet files, 'serve' to run "
+                                                 "the calculation server.")
+    parser.add_argument("input", nargs="?", default="-",
+                        help="JSON file with one household object, one per line, or an array (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="output file of JSON lines (default: stdout)")
+    parser.add_argument("--no-brackets", action="store_true", help="omit the per-bracket breakdowns")
+    parser.add_argument("--cache", metavar="PATH",
+                        help="SQLite file of component results to reuse and extend, shared across runs")
+    args = parser.parse_args(argv)
+    # Bound before the try, so a cache that fails to open is never closed and its error is not masked.
+    cache = ResultCache(path=args.cache) if args.cache else None
+
+    source = target = None
+    previous_cache = Budget.result_cache
+    encoder = json.JSONEncoder(separators=(",", ":"))
+    try:
+        if cache is not None:
+            Budget.result_cache = cache
+        source = sys.stdin if args.input == "-" else open(args.input)
+        target = sys.stdout if args.output == "-" else open(args.output, "w")
+        for number, values in read_households(source):
+            try:
+                budget = budget_from_dict(values)
+                target.write(encoder.encode(budget.to_dict(brackets=not args.no_brackets)) + "\n")
+            except (TypeError, ValueError) as error:
+                raise ValueError(f"line {number}: {error}") from error
+    except ValueError as error:
+        print(f"{parser.prog}: error: {error}", file=sys.stderr)
+        return 1
+    finally:
+        if source not in (None, sys.stdin):
+            source.close()
+        if target not in (None, sys.stdout):
+            target.close()
+        if cache is not None:
+            Budget.result_cache = previous_cache
+            cache.close()
+    return 0
+
+
 if __name__ == "__main__":
-    ivan_w2 = 292060.68
-    olga_w2 = 325953.54
-    other_income = 2178 + 2807 + 2477
-
-    ivan_401k = 23000
-    olga_401k = 23000
-
-    state = "NY"
-    # state = "PA"
-
-    # paid = (63603 + 10453 + 5859 + 26450 + 3028) + (62267 + 10453 + 5063 + 18993)
-
-    fed_paid = 63603 + 62267
-    ss_paid = 10453 + 10453
-    medicare_paid = 5859 + 5063
-    ny_state_paid = 26450 + 18993
-    local_paid = 3028
-
-    budget = Budget(ivan_w2, olga_w2, other_income, ivan_401k, olga_401k, state,
-                    fed_paid, ny_state_paid, local_paid, ss_paid, medicare_paid)
-
-    # budget.print_summary()
-
-    income = ivan_w2 + olga_w2 + other_income
-    contr401k = ivan_401k + olga_401k
-    fed_tax = FederalTax(income, contr401k)
-    state_tax = StateTax(income, contr401k, "NY")
-    local_tax = LocalTax(income, "NY")
-    social_sec_tax = SocialSecurityTax(ivan_w2, olga_w2)
-    medicare_tax = MedicareTax(income)
-
-    budget_pa = Budget(ivan_w2, olga_w2, other_income, ivan_401k, olga_401k, "PA",
-                    fed_paid, ny_state_paid, local_paid, ss_paid, medicare_paid)
-    budget_pa.print_summary()
-    print("===========")
-
-    budget_ny = Budget(ivan_w2, olga_w2, other_income, ivan_401k, olga_401k, "NY",
-                    fed_paid, ny_state_paid, local_paid, ss_paid, medicare_paid)
-    budget_ny.print_summary()
-    print("===========")
-
-    print(f"NY Vs. PA: {budget_ny.total_tax()} - {budget_pa.total_tax()} = {budget_ny.total_tax() - budget_pa.total_tax()}")
-    # print("===========")
-    # fed_tax.print_summary()
-    # print("===========")
-    # state_tax.print_summary()
-    # print("===========")
-    # local_tax.print_summary()
-    # print("===========")
-    # social_sec_tax.print_summary()
-    # print("===========")
-    # medicare_tax.print_summary()
\ No newline at end of file
+    import sys
+
+    sys.exit(main())
\ No newline at end of file
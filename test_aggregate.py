@@ -0,0 +1,162 @@
+import csv
+import sys
+import pytest
+sys.path.append(".")
+np = pytest.importorskip("numpy")
+import aggregate
+import taxes
+
+
+def random_households(size, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "income1": rng.lognormal(11, 0.8, size).round(2),
+        "income2": rng.lognormal(10.5, 1.2, size).round(2) * (rng.random(size) < 0.6),
+        "other_income": rng.exponential(2000, size).round(2),
+        "contr401k1": rng.choice([0.0, 5000.0, 23000.0], size),
+        "contr401k2": np.zeros(size),
+        "state": rng.choice(["NY", "PA"], size),
+    }
+
+
+@pytest.fixture
+def households_csv(tmp_path):
+    columns = random_households(300)
+    path = tmp_path / "households.csv"
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows(zip(*(column.tolist() for column in columns.values())))
+    return str(path)
+
+
+class TestQuantileSketch:
+    """Test cases for the mergeable t-digest."""
+
+    def test_quantiles_close_to_exact(self):
+        """Test that streamed quantiles of a skewed sample are within a fraction of a percent."""
+        values = np.random.default_rng(1).lognormal(11, 1, 200_000)
+        sketch = aggregate.QuantileSketch()
+        for chunk in np.array_split(values, 50):
+            sketch.update(chunk)
+        q = [0.01, 0.1, 0.5, 0.9, 0.99]
+        np.testing.assert_allclose(sketch.quantile(q), np.quantile(values, q), rtol=0.005)
+        assert sketch.quantile(0) == values.min() and sketch.quantile(1) == values.max()
+        assert sketch.count == values.size
+
+    def test_memory_bounded_by_compression(self):
+        """Test that the number of centroids does not grow with the number of values."""
+        sketch = aggregate.QuantileSketch(100)
+        for seed in range(20):
+            sketch.update(np.random.default_rng(seed).random(10_000))
+        assert sketch.means.shape[0] <= 100
+
+    def test_merge_matches_single_pass(self):
+        """Test that merged shard sketches estimate the same quantiles as one sketch."""
+        values = np.random.default_rng(2).normal(size=100_000)
+        single = aggregate.QuantileSketch().update(values)
+        merged = aggregate.QuantileSketch()
+        for shard in np.array_split(values, 4):
+            merged.merge(aggregate.QuantileSketch().update(shard))
+        q = np.linspace(0.05, 0.95, 19)
+        np.testing.assert_allclose(merged.quantile(q), single.quantile(q), atol=0.01)
+        assert merged.count == single.count
+
+    def test_empty_and_invalid(self):
+        """Test that an empty sketch returns NaN and out-of-range quantiles raise an error."""
+        sketch = aggregate.QuantileSketch()
+        assert np.isnan(sketch.quantile(0.5))
+        sketch.update([1.0, np.nan, 3.0])
+        assert sketch.count == 2
+        with pytest.raises(ValueError):
+            sketch.quantile(1.5)
+        with pytest.raises(ValueError):
+            aggregate.QuantileSketch(0)
+
+
+class TestGroupedStats:
+    """Test cases for grouped sums and quantiles."""
+
+    def test_sums_and_means_by_state(self):
+        """Test that grouped sums and means match exact per-group totals."""
+        columns = random_households(5000)
+        values = {**columns, **taxes.Budget.calculate_batch(**columns)}
+        stats = aggregate.GroupedStats(by=("state",))
+        for rows in np.array_split(np.arange(5000), 7):
+            stats.update({name: column[rows] for name, column in values.items()})
+
+        summaries = stats.summaries()
+        assert list(summaries) == [("NY",), ("PA",)]
+        for (state,), summary in summaries.items():
+            rows = values["state"] == state
+            assert summary.count == rows.sum()
+            assert summary.sums["state_tax"] == pytest.approx(values["state_tax"][rows].sum())
+            assert summary.means["total_tax"] == pytest.approx(values["total_tax"][rows].mean())
+            assert summary.quantiles("eff_tax_rate", 0.5) == pytest.approx(
+                np.median(values["eff_tax_rate"][rows]), abs=0.05)
+        assert stats.total().count == 5000
+        assert stats.total().sums["total_tax"] == pytest.approx(values["total_tax"].sum())
+
+    def test_merge_requires_same_configuration(self):
+        """Test that merging differently grouped statistics raises an error."""
+        with pytest.raises(ValueError):
+            aggregate.GroupedStats(by=("state",)).merge(aggregate.GroupedStats())
+
+
+class TestIncomeBins:
+    """Test cases for income quantile groups."""
+
+    def test_deciles_cover_population(self):
+        """Test that deciles partition the households into groups of about equal size, in income order."""
+        columns = random_households(20_000)
+        values = {**columns, **taxes.Budget.calculate_batch(**columns)}
+        deciles = aggregate.IncomeBins().update(values).quantile_groups(10)
+
+        assert len(deciles) == 10
+        assert sum(group.count for group in deciles) == 20_000
+        assert sum(group.sums["total_tax"] for group in deciles) == pytest.approx(values["total_tax"].sum())
+        assert all(abs(group.count - 2000) < 200 for group in deciles)
+        assert all(a.upper <= b.lower for a, b in zip(deciles, deciles[1:]))
+        exact = np.quantile(values["total_income"], 0.5)
+        assert deciles[5].lower == pytest.approx(exact, rel=0.03)
+
+
+class TestSummarizeFile:
+    """Test cases for the one-pass file summary."""
+
+    def test_workers_match_single_process(self, households_csv):
+        """Test that sharded runs produce the same sums as a single pass."""
+        single = aggregate.summarize_file(households_csv, compare_states=("NY", "PA"), chunk_size=40)
+        sharded = aggregate.summarize_file(households_csv, compare_states=("NY", "PA"), chunk_size=40, workers=2)
+
+        for key, summary in single.grouped.summaries().items():
+            other = sharded.grouped.summaries()[key]
+            assert other.count == summary.count
+            assert other.sums == pytest.approx(summary.sums)
+        np.testing.assert_array_equal(single.income_bins.counts, sharded.income_bins.counts)
+        np.testing.assert_allclose(single.income_bins.totals["total_tax_NY"],
+                                   sharded.income_bins.totals["total_tax_NY"])
+
+    def test_compare_states_evaluates_every_household(self, households_csv):
+        """Test that counterfactual state totals match evaluating every household in that state."""
+        columns = random_households(300)
+        stats = aggregate.summarize_file(households_csv, compare_states=("PA",), chunk_size=100)
+        expected = taxes.Budget.calculate_batch(**{**columns, "state": "PA"})["total_tax"].sum()
+        assert stats.income_bins.totals["total_tax_PA"].sum() == pytest.approx(expected)
+
+    def test_empty_input(self, tmp_path):
+        """Test that an input with only a header summarizes to empty groups with n/a rates."""
+        path = tmp_path / "empty.csv"
+        path.write_text(",".join(random_households(1)) + "\n")
+        stats = aggregate.summarize_file(str(path))
+        total = stats.grouped.total()
+        assert total.count == 0
+        assert np.isnan(total.quantiles("eff_tax_rate")).all()
+        assert stats.income_bins.quantile_groups() == []
+        assert aggregate.format_summary(stats).splitlines()[1].split() == ["all", "0", "0"] + ["n/a"] * 7
+
+    def test_main_entry_point(self, households_csv, capsys):
+        """Test that the command line prints group and decile tables."""
+        assert aggregate.main([households_csv, "--compare-states", "NY", "PA"]) == 0
+        output = capsys.readouterr().out
+        assert "NY - PA" in output and "\nNY " in output and "\nall " in output
@@ -0,0 +1,115 @@
+import csv
+import sys
+import pytest
+sys.path.append(".")
+np = pytest.importorskip("numpy")
+import batch
+import taxes
+
+HOUSEHOLDS = [
+    ["income1", "income2", "other_income", "contr401k1", "contr401k2", "state", "fed_tax_paid", "medicare_tax_paid"],
+    ["100000", "80000", "5000", "20000", "15000", "PA", "15000", "2000"],
+    ["292060.68", "325953.54", "7462", "23000", "23000", "NY", "", ""],
+    ["0", "0", "0", "0", "0", "NY", "0", "0"],
+    ["50000", "0", "250", "5000", "0", "PA", "4000", "700"],
+    ["1200000", "400000", "0", "23000", "23000", "NY", "400000", "30000"],
+]
+
+
+@pytest.fixture
+def households_csv(tmp_path):
+    path = tmp_path / "households.csv"
+    with open(path, "w", newline="") as f:
+        csv.writer(f).writerows(HOUSEHOLDS)
+    return str(path)
+
+
+def read_rows(path):
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+class TestRunBatch:
+    """Test cases for the streaming CSV batch runner."""
+
+    def test_results_match_budget(self, households_csv, tmp_path):
+        """Test that every output row matches a scalar Budget for the same household."""
+        output = str(tmp_path / "results.csv")
+        assert batch.run_batch(households_csv, output, chunk_size=2) == 5
+
+        rows = read_rows(output)
+        assert list(rows[0]) == list(batch.OUTPUT_COLUMNS)
+        for row in rows:
+            budget = taxes.Budget(*(float(row[name]) if name not in taxes.Budget.TEXT_INPUTS else row[name] for name in batch.INPUTS))
+            for name in taxes.Budget.OUTPUTS:
+                expected = getattr(budget, name)
+                expected = expected() if callable(expected) else expected
+                assert float(row[name]) == expected, name
+
+    def test_output_independent_of_chunk_size(self, households_csv, tmp_path):
+        """Test that chunking does not change the output bytes."""
+        outputs = []
+        for chunk_size in (1, 3, 100):
+            output = tmp_path / f"results_{chunk_size}.csv"
+            batch.run_batch(households_csv, str(output), chunk_size=chunk_size)
+            outputs.append(output.read_bytes())
+        assert outputs[0] == outputs[1] == outputs[2]
+
+    def test_missing_paid_columns_default_to_zero(self, households_csv, tmp_path):
+        """Test that absent *_paid columns are treated as nothing paid."""
+        output = str(tmp_path / "results.csv")
+        batch.run_batch(households_csv, output)
+        assert all(float(row["state_tax_paid"]) == 0 for row in read_rows(output))
+
+    def test_missing_required_column_raises_error(self, tmp_path):
+        """Test that an input without a required column raises ValueError."""
+        path = tmp_path / "bad.csv"
+        path.write_text("income1,income2\n1,2\n")
+        with pytest.raises(ValueError, match="missing required columns"):
+            batch.run_batch(str(path), str(tmp_path / "out.csv"))
+
+    def test_empty_input_raises_error(self, tmp_path):
+        """Test that an empty input raises ValueError instead of a StopIteration error."""
+        path = tmp_path / "empty.csv"
+        path.write_text("")
+        with pytest.raises(ValueError, match="is empty"):
+            batch.run_batch(str(path), str(tmp_path / "out.csv"))
+
+    def test_ragged_row_raises_error(self, households_csv, tmp_path):
+        """Test that a row with the wrong number of columns raises ValueError naming the row."""
+        with open(households_csv, "a", newline="") as f:
+            f.write("\n1,2,3\n")
+        with pytest.raises(ValueError, match="Row 7 of .* has 3 columns; expected 8"):
+            batch.run_batch(households_csv, str(tmp_path / "out.csv"), chunk_size=4)
+
+    def test_workers_output_identical_to_single_process(self, households_csv, tmp_path):
+        """Test that a sharded multi-process run writes the same bytes as a single-process run."""
+        single = tmp_path / "single.csv"
+        sharded = tmp_path / "sharded.csv"
+        batch.run_batch(households_csv, str(single), chunk_size=2)
+        assert batch.run_batch(households_csv, str(sharded), chunk_size=2, workers=2) == 5
+        assert single.read_bytes() == sharded.read_bytes()
+
+    def test_invalid_workers_raises_error(self, households_csv, tmp_path):
+        """Test that a non-positive worker count raises ValueError."""
+        with pytest.raises(ValueError, match="Workers must be positive"):
+            batch.run_batch(households_csv, str(tmp_path / "out.csv"), workers=0)
+
+    def test_cents_mode_writes_integer_cents(self, households_csv, tmp_path):
+        """Test that --cents writes every amount as integer cents matching the scalar breakdown."""
+        output = str(tmp_path / "results.csv")
+        batch.run_batch(households_csv, output, cents=True)
+        for row in read_rows(output):
+            budget = taxes.Budget(*(float(row[name]) if name not in taxes.Budget.TEXT_INPUTS else row[name] for name in batch.INPUTS))
+            assert int(row["total_tax"]) == budget.breakdown(cents=True).total
+            assert int(row["social_sec_tax"]) == budget.breakdown(cents=True).social_security
+
+    def test_main_entry_point(self, households_csv, tmp_path):
+        """Test the command-line entry point."""
+        output = str(tmp_path / "results.csv")
+        assert batch.main([households_csv, output, "--chunk-size", "4"]) == 0
+        assert len(read_rows(output)) == 5
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,52 @@
+import json
+import sys
+import pytest
+sys.path.append(".")
+pytest.importorskip("numpy")
+import benchmarks
+
+
+def document(**seconds):
+    return {"metadata": {}, "results": {name: {"seconds": value} for name, value in seconds.items()}}
+
+
+class TestBenchmarks:
+    """Test cases for the benchmark runner and regression comparison."""
+
+    def test_compare_flags_regressions_above_threshold(self):
+        """Test that only slowdowns above the threshold are flagged."""
+        baseline = document(fast=1.0, slow=1.0, dropped=1.0)
+        current = document(fast=1.05, slow=1.5, added=1.0)
+        rows = {row[0]: row for row in benchmarks.compare(baseline, current, threshold=0.1)}
+        assert set(rows) == {"fast", "slow"}
+        assert not rows["fast"][-1]
+        assert rows["slow"][-1]
+        assert rows["slow"][3] == pytest.approx(0.5)
+
+    def test_run_records_results_and_environment(self):
+        """Test that a filtered run times the selected benchmarks and records metadata."""
+        results = benchmarks.run(sizes=[10], max_scalar=10, repeat=2, pattern="bracket")
+        assert set(results["results"]) == {"bracket_scalar[10]", "bracket_batch[10]"}
+        assert results["results"]["bracket_batch[10]"]["households"] == 10
+        assert results["metadata"]["python"]
+
+    def test_inputs_built_only_for_selected_benchmarks(self, monkeypatch):
+        """Test that filtered-out benchmarks never build their household arrays."""
+        built = []
+        original = benchmarks.household_arrays
+        monkeypatch.setattr(benchmarks, "household_arrays", lambda n, *args: built.append(n) or original(n, *args))
+        benchmarks.run(sizes=[10, 10 ** 7], max_scalar=10, repeat=1, pattern="bracket_batch[10]")
+        assert built == [10]
+
+    def test_compare_exit_status(self, tmp_path):
+        """Test that the compare command exits with 1 on a regression."""
+        baseline = tmp_path / "baseline.json"
+        current = tmp_path / "current.json"
+        baseline.write_text(json.dumps(document(total=1.0)))
+        current.write_text(json.dumps(document(total=2.0)))
+        assert benchmarks.main(["compare", str(baseline), str(current)]) == 1
+        assert benchmarks.main(["compare", str(baseline), str(baseline)]) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
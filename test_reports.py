@@ -0,0 +1,121 @@
+import json
+import sys
+import pytest
+sys.path.append(".")
+import reports
+import taxes
+
+
+def make_budget(**changes):
+    budget = taxes.Budget(200000, 80000, 5000, 20000, 15000, "NY", 30000, 10000, 5000, 15000, 4000)
+    for name, value in changes.items():
+        setattr(budget, name, value)
+    return budget
+
+
+class TestTemplate:
+    """Test cases for parsed report templates."""
+
+    def test_render_matches_format(self):
+        """Test that a parsed template renders exactly like str.format."""
+        text = '{{literal}} "quoted" \\ {name!r:>10} {amount:,.2f}\n'
+        values = {"name": "a'b", "amount": 1234.5}
+        assert reports.Template(text).render(values) == text.format_map(values)
+
+    def test_rejects_expressions(self):
+        """Test that only plain field names are accepted."""
+        for text in ("{a.b}", "{a[0]}", "{a:{width}}"):
+            with pytest.raises(ValueError, match="Unsupported template field"):
+                reports.Template(text)
+
+
+class TestReportRenderer:
+    """Test cases for rendering reports in each format."""
+
+    def test_text_report_sections(self):
+        """Test the totals, bracket rows and paid section of the text report."""
+        budget = make_budget()
+        report = reports.render(budget)
+        assert f"Total Tax Liability:          ${budget.total_tax():,.2f}\n" in report
+        assert "Federal at 10.00%:            $2,320.00 on $23,200.00\n" in report
+        assert "TAXES ALREADY PAID:" in report and "*** You owe" in report
+        assert f"Local Tax (NY):               ${budget.local_tax():,.2f}\n" in report
+        assert "Local Tax (PA):" in reports.render(make_budget(state="PA"))
+        assert report.endswith("for official tax advice.\n" + "=" * 70)
+        assert "TAXES ALREADY PAID:" not in reports.render(make_budget(fed_tax_paid=0, state_tax_paid=0,
+                                                                        local_tax_paid=0, social_sec_tax_paid=0,
+                                                                        medicare_tax_paid=0))
+
+    def test_refund_and_settled_messages(self):
+        """Test the message for each sign of the total owed."""
+        assert "REFUND EXPECTED" in reports.render(make_budget(fed_tax_paid=200000))
+        taxes_due = make_budget().breakdown()
+        assert "FULLY PAID" in reports.render(make_budget(
+            fed_tax_paid=taxes_due.federal, state_tax_paid=taxes_due.state, local_tax_paid=taxes_due.local,
+            social_sec_tax_paid=taxes_due.social_security, medicare_tax_paid=taxes_due.medicare))
+
+    def test_json_report_matches_budget(self):
+        """Test that the JSON report holds every budget output and the bracket rows."""
+        budget = make_budget(filing_status="married_separately")
+        document = json.loads(reports.render(budget, "json"))
+        result = budget.result()
+        for name in taxes.Budget.OUTPUTS:
+            assert document[name] == getattr(result, name), name
+        assert document["filing_status"] == "married_separately"
+        assert {row["label"] for row in document["brackets"]} >= {"Federal (return 1)", "Federal (return 2)"}
+
+    def test_html_report_is_escaped_document(self):
+        """Test that an HTML report is a whole document with escaped text."""
+        report = reports.ReportRenderer("html").render(make_budget())
+        assert report.startswith("<!DOCTYPE html>") and report.endswith("</html>\n")
+        assert report.count("<section") == 1
+        assert "<tr><th>NY State Tax</th>" in report
+
+    def test_renders_from_cached_breakdown(self, monkeypatch):
+        """Test that rendering a calculated budget calculates no taxes again."""
+        budget = make_budget()
+        reports.render(budget)
+        monkeypatch.setattr(taxes.Tax, "_initialize", lambda *args: pytest.fail("tax recalculated"))
+        assert reports.render(budget) == reports.render(budget)
+
+    def test_each_bracket_walk_once(self, monkeypatch):
+        """Test that a report on a new budget searches the federal and state brackets once each."""
+        calls = []
+        for method in ("tax", "tax_with_rates", "tax_with_breakdown"):
+            original = getattr(taxes.BracketSchedule, method)
+            monkeypatch.setattr(taxes.BracketSchedule, method,
+                                lambda self, *args, original=original: calls.append(self) or original(self, *args))
+        reports.render(make_budget())
+
+        federal = taxes.JURISDICTIONS.get("federal", "US").schedule
+        state = taxes.JURISDICTIONS.get("state", "NY").schedule
+        assert calls.count(federal) == 1
+        assert calls.count(state) == 1
+
+    def test_unknown_format_raises_error(self):
+        """Test that an unknown output format raises ValueError."""
+        with pytest.raises(ValueError, match="Unknown report format"):
+            reports.ReportRenderer("pdf")
+
+
+class TestWriteStatements:
+    """Test cases for batch statement output."""
+
+    def test_json_lines(self, tmp_path):
+        """Test that JSON statements are written one per line."""
+        path = tmp_path / "statements.jsonl"
+        budgets = [make_budget(income1=income) for income in (0, 50000, 500000)]
+        assert reports.write_statements(budgets, str(path), "json") == 3
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line)["total_tax"] for line in lines] == [budget.total_tax() for budget in budgets]
+
+    def test_text_and_html_statements(self, tmp_path):
+        """Test that text statements are separated by form feeds and HTML ones share a document."""
+        budgets = [make_budget(state=state) for state in ("NY", "PA")]
+        text = tmp_path / "statements.txt"
+        reports.write_statements(budgets, str(text))
+        assert text.read_text(encoding="utf-8").split("\n\f\n") == [reports.render(budget) for budget in budgets]
+        document = tmp_path / "statements.html"
+        reports.write_statements(budgets, str(document), "html")
+        content = document.read_text(encoding="utf-8")
+        assert content.count("<!DOCTYPE html>") == 1 and content.count("<section") == 2
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import sys
+import pytest
+sys.path.append(".")
+np = pytest.importorskip("numpy")
+import server
+import taxes
+
+HOUSEHOLD = {"income1": 100000, "income2": 80000, "other_income": 5000, "contr401k1": 20000, "contr401k2": 15000,
+             "state": "PA", "fed_tax_paid": 12000}
+
+
+async def post(port, path, payload, method="POST"):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n"
+                 f"Connection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(content)
+
+
+def run_with_server(scenario, **options):
+    async def main():
+        budget_server = server.BudgetServer(**options)
+        listener = await budget_server.start(port=0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            return await scenario(port, budget_server)
+    return asyncio.run(main())
+
+
+class TestBudgetServer:
+    """Test cases for the batching calculation server."""
+
+    def test_concurrent_requests_are_batched(self):
+        """Test that concurrent requests share one batch and each gets its own household's results."""
+        incomes = [50000 + 10000 * index for index in range(10)]
+
+        async def scenario(port, budget_server):
+            responses = await asyncio.gather(*(post(port, "/budget", {**HOUSEHOLD, "income1": income})
+                                               for income in incomes))
+            return responses, dict(budget_server.batcher.stats)
+
+        responses, stats = run_with_server(scenario, window=0.2)
+        for income, (status, result) in zip(incomes, responses):
+            expected = taxes.Budget(**{**HOUSEHOLD, "income1": income})
+            assert status == 200
+            assert result["total_tax"] == expected.total_tax()
+            assert result["federal_tax_owed"] == expected.federal_tax_owed()
+        assert stats == {"requests": 10, "batches": 1, "rows": 10}
+
+    def test_max_batch_size_flushes_early(self):
+        """Test that reaching the max batch size evaluates without waiting for the window."""
+        async def scenario(port, budget_server):
+            status, result = await asyncio.wait_for(
+                post(port, "/compare-states", {**HOUSEHOLD, "states": ["NY", "PA"]}), timeout=5)
+            return status, result
+
+        status, result = run_with_server(scenario, window=60, max_batch_size=2)
+        assert status == 200
+        assert list(result) == ["NY", "PA"]
+        assert result["NY"]["total_tax"] == taxes.Budget(**{**HOUSEHOLD, "state": "NY"}).total_tax()
+
+    def test_sweep_matches_budget_sweep(self):
+        """Test that a sweep returns one record per grid cell, matching Budget.sweep."""
+        axes = {"state": ["NY", "PA"], "contr401k1": [0, 10000, 23000]}
+
+        async def scenario(port, budget_server):
+            return await post(port, "/sweep", {**HOUSEHOLD, "axes": axes})
+
+        status, result = run_with_server(scenario)
+        expected = taxes.Budget(**HOUSEHOLD).sweep(**axes).ravel()
+        assert status == 200
+        assert result["shape"] == [2, 3]
+        assert [record["state"] for record in result["results"]] == expected["state"].tolist()
+        assert [record["total_tax"] for record in result["results"]] == expected["total_tax"].tolist()
+
+    def test_invalid_request_fails_alone(self):
+        """Test that an invalid household in a batch fails with 400 while the others succeed."""
+        async def scenario(port, budget_server):
+            return await asyncio.gather(post(port, "/budget", HOUSEHOLD),
+                                        post(port, "/compare-states", {**HOUSEHOLD, "states": ["NY", "ZZ"]}),
+                                        post(port, "/budget", {**HOUSEHOLD, "state": "NY"}))
+
+        (ok, _), (bad, error), (other, result) = run_with_server(scenario, window=0.2)
+        assert (ok, bad, other) == (200, 400, 200)
+        assert "supported" in error["error"]
+        assert result["state_tax"] == taxes.Budget(**{**HOUSEHOLD, "state": "NY"}).state_tax()
+
+    @pytest.mark.parametrize("path, payload, method, status", [
+        ("/budget", {"income1": 1}, "POST", 400),
+        ("/budget", b"{not json", "POST", 400),
+        ("/sweep", {**HOUSEHOLD, "axes": {"salary": [1]}}, "POST", 400),
+        ("/sweep", {**HOUSEHOLD, "axes": {"income1": list(range(1000)), "income2": list(range(1000))}}, "POST", 413),
+        ("/budget", {**HOUSEHOLD, "year": 100000}, "POST", 400),
+        ("/budget", {**HOUSEHOLD, "year": 1e30}, "POST", 400),
+        ("/budget", {**HOUSEHOLD, "year": 10 ** 30}, "POST", 400),
+        ("/budget", {**HOUSEHOLD, "income1": None}, "POST", 400),
+        ("/budget", {**HOUSEHOLD, "income1": 10 ** 400}, "POST", 400),
+        ("/budget", b'{"income1": 1e400, "income2": 0, "other_income": 0, "contr401k1": 0, "contr401k2": 0, '
+                    b'"state": "PA"}', "POST", 400),
+        ("/budget", {**HOUSEHOLD, "income2": True}, "POST", 400),
+        ("/compare-states", {**HOUSEHOLD, "states": ["NY", 7]}, "POST", 400),
+        ("/sweep", {**HOUSEHOLD, "axes": {"income1": [1, None]}}, "POST", 400),
+        ("/budget", HOUSEHOLD, "GET", 405),
+        ("/missing", HOUSEHOLD, "POST", 404),
+    ])
+    def test_error_statuses(self, path, payload, method, status):
+        """Test that malformed, oversized and misrouted requests get the matching status and an error."""
+        async def scenario(port, budget_server):
+            return await asyncio.wait_for(post(port, path, payload, method), timeout=5)
+
+        response_status, result = run_with_server(scenario)
+        assert response_status == status
+        assert "error" in result
+
+    def test_unexpected_error_resolves_every_request(self, monkeypatch):
+        """Test that an unexpected calculation error answers every batched request with 500 instead of hanging."""
+        def fail(**columns):
+            raise RuntimeError("engine failure")
+
+        monkeypatch.setattr(taxes.Budget, "calculate_batch", fail)
+
+        async def scenario(port, budget_server):
+            return await asyncio.wait_for(asyncio.gather(post(port, "/budget", HOUSEHOLD),
+                                                         post(port, "/budget", HOUSEHOLD)), timeout=5)
+
+        for status, result in run_with_server(scenario, window=0.05):
+            assert status == 500
+            assert "engine failure" in result["error"]
+
+    def test_invalid_batch_options_raise_error(self):
+        """Test that a negative window or non-positive batch size raises ValueError."""
+        with pytest.raises(ValueError):
+            server.MicroBatcher(window=-1)
+        with pytest.raises(ValueError):
+            server.MicroBatcher(max_batch_size=0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
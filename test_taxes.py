@@ -1,8 +1,11 @@
+import importlib.util
 import sys
 import pytest
 sys.path.append(".")
 import taxes
 
+requires_numpy = pytest.mark.skipif(importlib.util.find_spec("numpy") is None, reason="numpy is not installed")
+
 
 class TestTax:
     """Test cases for the base Tax class."""
@@ -67,6 +70,335 @@ class TestTax:
         assert tax.calculate_tax() == expected
 
 
+class TestBracketSchedule:
+    """Test cases for the compiled BracketSchedule."""
+
+    def test_cumulative_tax_at_boundaries(self):
+        """Test that cumulative tax is precomputed at each bracket boundary."""
+        schedule = taxes.BracketSchedule([50000, 100000, float("inf")], [0.1, 0.2, 0.3])
+        assert schedule.cumulative[:3] == (0.0, 5000.0, 15000.0)
+        assert schedule.tax(120000) == 15000 + 20000 * 0.3
+
+    def test_tax_at_bracket_edge_uses_lower_bracket(self):
+        """Test that income exactly at a boundary is taxed entirely in the lower bracket."""
+        schedule = taxes.BracketSchedule([50000, float("inf")], [0.1, 0.2])
+        assert schedule.tax(50000) == 5000.0
+
+    def test_schedule_is_immutable(self):
+        """Test that a compiled schedule cannot be modified."""
+        schedule = taxes.BracketSchedule([float("inf")], [0.1])
+        with pytest.raises(AttributeError):
+            schedule.rates = (0.2,)
+
+    def test_compile_shares_schedules(self):
+        """Test that equal brackets and rates compile to one shared schedule."""
+        assert taxes.BracketSchedule.compile([1000, float("inf")], [0.1, 0.2]) is \
+            taxes.BracketSchedule.compile((1000, float("inf")), (0.1, 0.2))
+
+    def test_tax_classes_share_registry_schedules(self, monkeypatch):
+        """Test that tax instances reuse the registry's compiled schedules instead of building new ones."""
+        for level, code in (("federal", "US"), ("state", "NY"), ("local", "PA"), ("payroll", "medicare")):
+            taxes.JURISDICTIONS.get(level, code)
+        monkeypatch.setattr(taxes.BracketSchedule, "compile", lambda *args: pytest.fail("schedule recompiled"))
+        assert taxes.FederalTax(100000, 0).schedule is taxes.JURISDICTIONS.get("federal", "US").schedule
+        assert taxes.StateTax(100000, 0, "NY").schedule is taxes.JURISDICTIONS.get("state", "NY").schedule
+        assert taxes.LocalTax(100000, "PA").schedule is taxes.JURISDICTIONS.get("local", "PA").schedule
+        assert taxes.MedicareTax(100000).calculate_tax() == 1450.0
+
+    def test_unsorted_brackets_raise_error(self):
+        """Test that brackets out of ascending order raise ValueError."""
+        with pytest.raises(ValueError, match="ascending order"):
+            taxes.BracketSchedule([100000, 50000], [0.1, 0.2])
+
+
+class TestJurisdictionRegistry:
+    """Test cases for the data-driven JurisdictionRegistry."""
+
+    def write_rules(self, directory):
+        (directory / "state").mkdir()
+        (directory / "state" / "NY.toml").write_text(
+            '[2024.married_jointly]\nbrackets = [10000, inf]\nrates = [0.01, 0.02]\n'
+            'std_deduction = 500\npretax_401k = true\n')
+        (directory / "state" / "TX.json").write_text(
+            '{"2024": {"married_jointly": {"brackets": [null], "rates": [0.0]}}}')
+        (directory / "state" / "CA.toml").write_text("this is not valid toml [")
+
+    def test_bundled_rules_match_known_rates(self):
+        """Test that the bundled rule files describe the supported jurisdictions."""
+        assert {"NY", "PA"} <= taxes.JURISDICTIONS.codes("state")
+        ny = taxes.JURISDICTIONS.get("state", "NY")
+        assert ny.schedule.rates[0] == 0.04
+        assert ny.deductions(10000) == 16050 + 10000 + 1000
+        assert taxes.JURISDICTIONS.get("state", "PA").deductions(10000) == 0
+
+    def test_rules_are_loaded_lazily(self, tmp_path):
+        """Test that only the files of jurisdictions actually looked up are parsed."""
+        self.write_rules(tmp_path)
+        registry = taxes.JurisdictionRegistry(tmp_path)
+        assert registry.codes("state") == {"NY", "TX", "CA"}
+        ny = registry.get("state", "NY")
+        assert ny.schedule.tax(20000) == 10000 * 0.01 + 10000 * 0.02
+        assert ny.deductions(1000) == 1500
+        assert registry.get("state", "NY") is ny
+
+    def test_json_rules_with_unbounded_bracket(self, tmp_path):
+        """Test that JSON rule files can write the unbounded top bracket as null."""
+        self.write_rules(tmp_path)
+        texas = taxes.JurisdictionRegistry(tmp_path).get("state", "TX")
+        assert texas.schedule.brackets == (float("inf"),)
+
+    def test_unknown_jurisdiction_raises_error(self, tmp_path):
+        """Test that unsupported codes and missing years raise ValueError."""
+        self.write_rules(tmp_path)
+        registry = taxes.JurisdictionRegistry(tmp_path)
+        with pytest.raises(ValueError, match="Only.*are supported"):
+            registry.get("state", "WA")
+        with pytest.raises(ValueError, match="No state tax rules for NY in 1999"):
+            registry.get("state", "NY", year=1999)
+
+
+class TestTaxYears:
+    """Test cases for year-indexed tax tables and projection."""
+
+    def test_published_years(self):
+        """Test that each year uses its own brackets, deductions and wage base."""
+        assert taxes.FederalTax(100000, 0, year=2023).calculate_tax() == 8236.0
+        assert taxes.FederalTax(100000, 0).calculate_tax() == 8032.0
+        assert taxes.FederalTax(100000, 0, year=2025).calculate_tax() == 7743.0
+        assert taxes.SocialSecurityTax(200000, 0, year=2023).calculate_tax() == 160200 * 0.062
+        assert taxes.SocialSecurityTax(200000, 0, year=2025).calculate_tax() == 176100 * 0.062
+
+    def test_projected_year(self, tmp_path):
+        """Test that years after the last table grow the indexed amounts by inflation."""
+        (tmp_path / "federal").mkdir()
+        (tmp_path / "federal" / "US.toml").write_text(
+            'inflation_indexed = { brackets = 50, std_deduction = 50 }\n'
+            '[2024.married_jointly]\nbrackets = [10000, inf]\nrates = [0.1, 0.2]\nstd_deduction = 1000\n')
+        registry = taxes.JurisdictionRegistry(tmp_path, inflation=0.1)
+        projected = registry.get("federal", "US", year=2026)
+        assert projected.schedule.brackets == (12100, float("inf"))
+        assert projected.std_deduction == 1200
+        assert projected.schedule.rates == (0.1, 0.2)
+        with pytest.raises(ValueError, match="No federal tax rules for US in 2023"):
+            registry.get("federal", "US", year=2023)
+
+    def test_unindexed_rules_reuse_last_table(self):
+        """Test that jurisdictions without indexed amounts keep their last table."""
+        assert taxes.JURISDICTIONS.get("state", "NY", year=2030).schedule is taxes.JURISDICTIONS.get(
+            "state", "NY", year=2025).schedule
+
+    def test_budget_year_invalidates_cache(self):
+        """Test that changing a budget's year recalculates every component."""
+        budget = taxes.Budget(200000, 180000, 5000, 20000, 15000, "NY")
+        budget.total_tax()
+        budget.year = 2025
+        assert budget.breakdown() == taxes.Budget(200000, 180000, 5000, 20000, 15000, "NY", year=2025).breakdown()
+        assert budget.optimize_contributions().contr401k1 == 23500
+
+    @requires_numpy
+    def test_batch_mixes_years(self):
+        """Test that one batch can mix years and states, matching the scalar budgets."""
+        years = [2023, 2024, 2025, 2027, 2024, 2023]
+        states = ["NY", "PA", "NY", "PA", "NY", "PA"]
+        for cents in (False, True):
+            results = taxes.Budget.calculate_batch(300000, 200000, 5000, 20000, 15000, states, year=years, cents=cents)
+            for i, (state, year) in enumerate(zip(states, years)):
+                expected = taxes.Budget(300000, 200000, 5000, 20000, 15000, state, year=year).breakdown(cents)
+                assert results["total_tax"][i] == expected.total
+                assert results["social_sec_tax"][i] == expected.social_security
+
+
+class TestFilingStatus:
+    """Test cases for per-status rules, separate returns and filing status comparison."""
+
+    def test_per_status_rules(self):
+        """Test that each status uses its own brackets, deductions and surtax threshold."""
+        assert taxes.FederalTax(100000, 0).calculate_tax() == 8032.0
+        assert taxes.FederalTax(100000, 0, filing_status="single").calculate_tax() == 13841.0
+        assert taxes.FederalTax(100000, 0, filing_status="head_of_household").calculate_tax() == 10541.0
+        assert taxes.MedicareTax(220000).calculate_tax() == 220000 * 0.0145
+        assert taxes.MedicareTax(220000, filing_status="single").calculate_tax() == 3370.0
+        with pytest.raises(ValueError, match="No federal tax rules for US in 2024 \\(widowed\\)"):
+            taxes.FederalTax(100000, 0, filing_status="widowed")
+
+    def test_married_separately_files_two_returns(self):
+        """Test that couples filing separately pay the tax of one return per spouse."""
+        budget = taxes.Budget(150000, 40000, 6000, 10000, 2000, "NY", filing_status="married_separately")
+        status = "married_separately"
+        assert budget.federal_tax() == (taxes.FederalTax(153000, 10000, filing_status=status).calculate_tax() +
+                                        taxes.FederalTax(43000, 2000, filing_status=status).calculate_tax())
+        assert budget.local_tax() == (taxes.LocalTax(153000, "NY", filing_status=status).calculate_tax() +
+                                      taxes.LocalTax(43000, "NY", filing_status=status).calculate_tax())
+        assert budget.marginal_rates("other_income").federal == pytest.approx((0.24 + 0.12) / 2)
+        with pytest.raises(ValueError, match="separately"):
+            budget.optimize_contributions()
+
+    def test_filing_status_invalidates_cache(self):
+        """Test that changing the filing status recalculates the income tax components."""
+        budget = taxes.Budget(200000, 180000, 5000, 20000, 15000, "NY")
+        budget.total_tax()
+        budget.filing_status = "married_separately"
+        assert budget.breakdown() == taxes.Budget(200000, 180000, 5000, 20000, 15000, "NY",
+                                                  filing_status="married_separately").breakdown()
+
+    @requires_numpy
+    def test_batch_mixes_statuses(self):
+        """Test that one batch can mix filing statuses, matching the scalar budgets and rates."""
+        statuses = ["married_separately", "single", "married_jointly", "married_separately", "head_of_household"]
+        states = ["NY", "PA", "NY", "PA", "NY"]
+        income1 = [150000, 50000, 300000, 20000, 90000]
+        for wrt in ("income2", "other_income", "contr401k1"):
+            results = taxes.Budget.calculate_batch(income1, 40000, 6000, 10000, 2000, states,
+                                                   filing_status=statuses, marginal_rates=wrt)
+            for i, (status, state) in enumerate(zip(statuses, states)):
+                budget = taxes.Budget(income1[i], 40000, 6000, 10000, 2000, state, filing_status=status)
+                assert results["total_tax"][i] == budget.total_tax()
+                rates = budget.marginal_rates(wrt)
+                assert results["federal_marginal_rate"][i] == pytest.approx(rates.federal)
+                assert results["total_marginal_rate"][i] == pytest.approx(rates.total)
+
+    @requires_numpy
+    def test_compare_filing_statuses(self):
+        """Test that the comparison matches a budget per status and picks the cheapest."""
+        budget = taxes.Budget(150000, 40000, 6000, 10000, 2000, "NY")
+        results = budget.compare_filing_statuses()
+        assert list(results) == list(taxes.FILING_STATUSES)
+        for status, result in results.items():
+            assert result == taxes.Budget(150000, 40000, 6000, 10000, 2000, "NY", filing_status=status).result()
+        assert budget.cheapest_filing_status() == "married_jointly"
+
+    @requires_numpy
+    def test_compare_filing_statuses_batch(self):
+        """Test that every status is evaluated for every household in one call."""
+        results = taxes.Budget.compare_filing_statuses_batch(
+            ("single", "married_separately"), income1=[150000, 50000], income2=[40000, 50000], other_income=6000,
+            contr401k1=10000, contr401k2=2000, state=["NY", "PA"])
+        for status in ("single", "married_separately"):
+            for i, (income1, income2, state) in enumerate([(150000, 40000, "NY"), (50000, 50000, "PA")]):
+                budget = taxes.Budget(income1, income2, 6000, 10000, 2000, state, filing_status=status)
+                assert results[status]["total_tax"][i] == budget.total_tax()
+
+
+@requires_numpy
+class TestTaxBatch:
+    """Test cases for the vectorized Tax.calculate_tax_batch."""
+
+    def test_batch_matches_scalar_federal_brackets(self):
+        """Test that batch results match the scalar path to the cent."""
+        import numpy as np
+        brackets = [23200, 94300, 201050, 383900, 487450, 731200, float("inf")]
+        rates = [.1, .12, .22, .24, .32, .35, .37]
+        incomes = np.random.default_rng(0).uniform(0, 2000000, 5000)
+        incomes = np.concatenate([incomes, [0, 29200, 52400, 123500]])
+        batch = taxes.Tax.calculate_tax_batch(incomes, brackets, rates, 29200)
+        expected = [taxes.Tax(float(income), brackets, rates, 29200).calculate_tax() for income in incomes]
+        assert batch.tolist() == expected
+
+    def test_batch_income_exceeds_highest_bracket(self):
+        """Test the batch fallback for income above a finite highest bracket."""
+        batch = taxes.Tax.calculate_tax_batch([200000, 75000], [50000, 100000], [0.1, 0.2])
+        assert batch.tolist() == [50000 * 0.1 + 50000 * 0.2 + 100000 * 0.2, 50000 * 0.1 + 25000 * 0.2]
+
+    def test_batch_per_household_deductions(self):
+        """Test that deductions can vary per household and never push taxable income below zero."""
+        batch = taxes.Tax.calculate_tax_batch([50000, 30000], [float("inf")], [0.1], [10000, 40000])
+        assert batch.tolist() == [4000.0, 0.0]
+
+    def test_batch_rounds_like_builtin_round(self):
+        """Test that half-cent results round exactly as round(tax, 2) does."""
+        import numpy as np
+        values = np.arange(0, 200000, 5) / 1000
+        assert taxes._round_cents(values).tolist() == [round(value, 2) for value in values.tolist()]
+
+    def test_batch_negative_income_raises_error(self):
+        """Test that a negative income in the batch raises ValueError."""
+        with pytest.raises(ValueError, match="Income cannot be negative"):
+            taxes.Tax.calculate_tax_batch([1000, -1], [float("inf")], [0.1])
+
+    def test_subclass_batches_match_scalar(self):
+        """Test that each tax class's batch method matches its scalar calculation."""
+        incomes = [0, 50000, 185000, 300000, 900000]
+        contr401k = [0, 10000, 35000, 46000, 0]
+        states = ["PA", "NY", "NY", "PA", "NY"]
+        assert taxes.FederalTax.calculate_tax_batch(incomes, contr401k).tolist() == \
+            [taxes.FederalTax(i, c).calculate_tax() for i, c in zip(incomes, contr401k)]
+        assert taxes.StateTax.calculate_tax_batch(incomes, contr401k, states).tolist() == \
+            [taxes.StateTax(i, c, s).calculate_tax() for i, c, s in zip(incomes, contr401k, states)]
+        assert taxes.LocalTax.calculate_tax_batch(incomes, states).tolist() == \
+            [taxes.LocalTax(i, s).calculate_tax() for i, s in zip(incomes, states)]
+        assert taxes.SocialSecurityTax.calculate_tax_batch(incomes, contr401k).tolist() == \
+            [taxes.SocialSecurityTax(i, c).calculate_tax() for i, c in zip(incomes, contr401k)]
+        assert taxes.MedicareTax.calculate_tax_batch(incomes).tolist() == \
+            [taxes.MedicareTax(i).calculate_tax() for i in incomes]
+
+    def test_state_batch_unsupported_state_raises_error(self):
+        """Test that an unsupported state anywhere in the batch raises ValueError."""
+        with pytest.raises(ValueError, match="Only.*are supported"):
+            taxes.StateTax.calculate_tax_batch([1000, 2000], [0, 0], ["PA", "CA"])
+
+
+class TestCentsMode:
+    """Test cases for exact integer-cents computation."""
+
+    def test_conversions(self):
+        """Test dollar to cent and rate to basis point conversion."""
+        assert taxes.to_cents(292060.68) == 29206068
+        assert taxes.to_cents(float("inf")) == taxes.CENTS_INFINITY
+        assert taxes.to_basis_points(0.0525) == 525
+        with pytest.raises(ValueError, match="basis points"):
+            taxes.to_basis_points(0.12345)
+
+    def test_round_units_half_to_even(self):
+        """Test that cents times basis points round to whole cents, half to even."""
+        assert taxes.round_units(15000) == 2
+        assert taxes.round_units(25000) == 2
+        assert taxes.round_units(25001) == 3
+        assert taxes.round_units(14999) == 1
+
+    def test_cents_match_float_path(self):
+        """Test that cents mode agrees with the float path wherever that path is rounded."""
+        fed_tax = taxes.FederalTax(100000, 20000)
+        assert fed_tax.calculate_tax_cents() == round(fed_tax.calculate_tax() * 100)
+        ny_tax = taxes.StateTax(250000.37, 23000, "NY")
+        assert ny_tax.calculate_tax_cents() == round(ny_tax.calculate_tax() * 100)
+        medicare_tax = taxes.MedicareTax(300000)
+        assert medicare_tax.calculate_tax_cents() == round(medicare_tax.calculate_tax() * 100)
+
+    def test_social_security_cents_are_rounded(self):
+        """Test that Social Security tax is rounded to the cent in cents mode."""
+        ss_tax = taxes.SocialSecurityTax(50000.01, 0)
+        assert ss_tax.calculate_tax() != round(ss_tax.calculate_tax(), 2)
+        assert ss_tax.calculate_tax_cents() == 310000
+
+    def test_budget_breakdown_cents(self):
+        """Test that the cents breakdown holds integers that sum exactly."""
+        budget = taxes.Budget(100000.01, 80000.02, 5000, 20000, 15000, "NY")
+        breakdown = budget.breakdown(cents=True)
+        assert all(isinstance(amount, int) for amount in breakdown)
+        assert breakdown.total == sum(breakdown)
+        assert breakdown.federal == round(budget.federal_tax() * 100)
+
+    @requires_numpy
+    def test_batch_cents_match_scalar(self):
+        """Test that batch cents mode returns int64 cents equal to the scalar cents breakdown."""
+        import numpy as np
+        rng = np.random.default_rng(2)
+        n = 500
+        columns = {
+            "income1": rng.uniform(0, 400000, n).round(2), "income2": rng.uniform(0, 400000, n).round(2),
+            "other_income": rng.uniform(0, 10000, n).round(2), "contr401k1": rng.uniform(0, 23000, n).round(2),
+            "contr401k2": rng.uniform(0, 23000, n).round(2), "state": rng.choice(["PA", "NY"], n),
+        }
+        results = taxes.Budget.calculate_batch(**columns, cents=True)
+        assert results["total_tax"].dtype == np.int64
+        for i in range(n):
+            breakdown = taxes.Budget(*(columns[name][i].item() for name in columns)).breakdown(cents=True)
+            assert results["federal_tax"][i] == breakdown.federal
+            assert results["state_tax"][i] == breakdown.state
+            assert results["social_sec_tax"][i] == breakdown.social_security
+            assert results["total_tax"][i] == breakdown.total
+
+
 class TestFederalTax:
     """Test cases for the FederalTax class."""
     
@@ -288,6 +620,683 @@ class TestBudget:
         assert budget.total_tax() == 0
         assert budget.eff_tax_rate() == 0.0  # Should return 0.0, not cause division by zero
 
+    def test_budget_components_computed_once(self, monkeypatch):
+        """Test that every accessor reuses one cached breakdown of the five tax components."""
+        constructed = []
+        original_init = taxes.Tax._initialize
+
+        def counting_init(tax, *args, **kwargs):
+            constructed.append(tax.__class__.__name__)
+            original_init(tax, *args, **kwargs)
+
+        monkeypatch.setattr(taxes.Tax, "_initialize", counting_init)
+        budget = taxes.Budget(100000, 80000, 5000, 20000, 15000, "NY", fed_tax_paid=15000)
+        budget.total_tax()
+        budget.federal_tax_owed()
+        budget.state_tax_owed()
+        budget.local_tax_owed()
+        budget.eff_tax_rate()
+        assert sorted(constructed) == sorted(["FederalTax", "StateTax", "LocalTax", "SocialSecurityTax", "MedicareTax"])
+
+    def test_budget_construction_skips_invalidation(self, monkeypatch):
+        """Test that constructing a budget sets its inputs without invalidating anything."""
+        monkeypatch.setattr(taxes.Budget, "invalidate", lambda *args: pytest.fail("invalidated on construction"))
+        budget = taxes.Budget(100000, 80000, 5000, 20000, 15000, "NY", filing_status="married_separately")
+        assert budget.total_tax() == budget.breakdown().total
+
+    def test_budget_cache_invalidated_on_input_change(self):
+        """Test that changing an input attribute recomputes the affected taxes."""
+        budget = taxes.Budget(100000, 80000, 5000, 20000, 15000, "PA")
+        pa_total = budget.total_tax()
+        budget.state = "NY"
+        assert budget.total_tax() == taxes.Budget(100000, 80000, 5000, 20000, 15000, "NY").total_tax()
+        assert budget.total_tax() != pa_total
+        budget.income1 = 120000
+        assert budget.total_income == 205000
+        assert budget.social_sec_tax() == (120000 + 80000) * 0.062
+
+    def test_budget_input_change_recomputes_only_affected_components(self, monkeypatch):
+        """Test that changing one input recomputes only the components that depend on it."""
+        budget = taxes.Budget(100000, 80000, 5000, 20000, 15000, "NY")
+        budget.breakdown()
+        constructed = []
+        original_init = taxes.Tax._initialize
+
+        def counting_init(tax, *args, **kwargs):
+            constructed.append(tax.__class__.__name__)
+            original_init(tax, *args, **kwargs)
+
+        monkeypatch.setattr(taxes.Tax, "_initialize", counting_init)
+        budget.social_sec_tax_paid = 5000
+        budget.contr401k1 = 20000
+        budget.breakdown()
+        assert constructed == []
+        budget.state = "PA"
+        budget.breakdown()
+        assert sorted(constructed) == ["LocalTax", "StateTax"]
+        expected = taxes.Budget(100000, 80000, 5000, 20000, 0, "PA").total_tax()
+        constructed.clear()
+        budget.contr401k2 = 0
+        assert budget.total_tax() == expected
+        assert sorted(constructed) == ["FederalTax", "StateTax"]
+
+    def test_budget_breakdown_is_immutable(self):
+        """Test that the cached breakdown cannot be modified in place."""
+        breakdown = taxes.Budget(100000, 80000, 5000, 20000, 15000, "PA").breakdown()
+        with pytest.raises(AttributeError):
+            breakdown.federal = 0
+
+
+@requires_numpy
+class TestBudgetBatch:
+    """Test cases for the vectorized Budget.calculate_batch."""
+
+    def test_batch_matches_scalar_budget(self):
+        """Test that every batch output equals the matching Budget accessor."""
+        import numpy as np
+        rng = np.random.default_rng(1)
+        n = 2000
+        columns = {
+            "income1": rng.uniform(0, 400000, n), "income2": rng.uniform(0, 400000, n),
+            "other_income": rng.uniform(0, 10000, n), "contr401k1": rng.uniform(0, 23000, n),
+            "contr401k2": rng.uniform(0, 23000, n), "state": rng.choice(["PA", "NY"], n),
+            "fed_tax_paid": rng.uniform(0, 100000, n), "state_tax_paid": rng.uniform(0, 20000, n),
+            "local_tax_paid": rng.uniform(0, 10000, n), "social_sec_tax_paid": rng.uniform(0, 20000, n),
+            "medicare_tax_paid": rng.uniform(0, 10000, n),
+        }
+        results = taxes.Budget.calculate_batch(**columns)
+        for i in range(n):
+            budget = taxes.Budget(*(columns[name][i].item() for name in columns))
+            for name in taxes.Budget.OUTPUTS:
+                expected = getattr(budget, name)
+                expected = expected() if callable(expected) else expected
+                assert results[name][i] == expected, name
+
+    def test_batch_zero_income(self):
+        """Test that zero-income households get a zero effective rate."""
+        results = taxes.Budget.calculate_batch([0], [0], [0], [0], [0], ["PA"])
+        assert results["total_tax"].tolist() == [0.0]
+        assert results["eff_tax_rate"].tolist() == [0.0]
+
+
+class TestMarginalRates:
+    """Test cases for marginal rates calculated alongside the liability."""
+
+    def test_schedule_rates_at_bracket_edge(self):
+        """Test that the rate below a boundary is the lower bracket's and the rate above the upper's."""
+        schedule = taxes.BracketSchedule([50000, float("inf")], [0.1, 0.2])
+        assert schedule.tax_with_rates(50000) == (5000.0, 0.1, 0.2)
+        assert schedule.tax_with_rates(60000) == (7000.0, 0.2, 0.2)
+        assert schedule.tax_with_rates(0) == (0.0, 0.0, 0.1)
+
+    def test_tax_rates_with_deductions(self):
+        """Test the income and deduction rates, including when deductions exceed income."""
+        assert taxes.Tax(60000, [50000, float("inf")], [0.1, 0.2], 5000).calculate_tax_with_rates() == \
+            (6000.0, 0.2, -0.2)
+        assert taxes.Tax(1000, [50000, float("inf")], [0.1, 0.2], 5000).calculate_tax_with_rates() == \
+            (0.0, 0.0, 0.0)
+
+    def test_contribution_rate_follows_pretax_rules(self):
+        """Test that 401k contributions only lower the tax where the state deducts them."""
+        assert taxes.StateTax(180000, 20000, "NY").calculate_tax_with_rates()[2] < 0
+        assert taxes.StateTax(180000, 20000, "PA").calculate_tax_with_rates()[2] == 0.0
+
+    def test_budget_marginal_rates(self):
+        """Test the per-component rates of a budget for each kind of input."""
+        budget = taxes.Budget(200000, 80000, 5000, 20000, 15000, "PA")
+        breakdown, rates = budget.breakdown_with_rates("income1")
+        assert breakdown == taxes.Budget(200000, 80000, 5000, 20000, 15000, "PA").breakdown()
+        assert rates == (0.24, 0.0307, 0.01, 0.0, 0.0145 + 0.009)
+        assert budget.marginal_rates("income2").social_security == 0.062
+        assert budget.marginal_rates("contr401k1") == (-0.24, 0.0, 0.0, 0.0, 0.0)
+
+    def test_budget_marginal_rates_match_finite_difference(self):
+        """Test that the total rate equals the change in total tax away from bracket edges."""
+        budget = taxes.Budget(100000, 80000, 5000, 20000, 15000, "NY")
+        for wrt in sorted(taxes.Budget.MARGINAL_WRT):
+            changed = taxes.Budget(100000, 80000, 5000, 20000, 15000, "NY")
+            setattr(changed, wrt, getattr(budget, wrt) + 100)
+            assert changed.total_tax() - budget.total_tax() == pytest.approx(100 * budget.marginal_rates(wrt).total)
+
+    def test_budget_rates_invalidated_on_input_change(self):
+        """Test that cached rates are recalculated when an input moves into another bracket."""
+        budget = taxes.Budget(100000, 80000, 5000, 20000, 15000, "PA")
+        assert budget.marginal_rates().federal == 0.22
+        budget.income1 = 400000
+        assert budget.marginal_rates().federal == 0.32
+
+    def test_unknown_input_raises_error(self):
+        """Test that rates with respect to a non-differentiable input raise ValueError."""
+        budget = taxes.Budget(100000, 80000, 5000, 20000, 15000, "PA")
+        with pytest.raises(ValueError, match="Cannot calculate marginal rates"):
+            budget.marginal_rates("state")
+
+    @requires_numpy
+    def test_batch_rates_match_scalar(self):
+        """Test that batch rates equal the scalar rates and leave the other outputs unchanged."""
+        import numpy as np
+        rng = np.random.default_rng(2)
+        n = 500
+        columns = {
+            "income1": rng.uniform(0, 400000, n), "income2": rng.uniform(0, 400000, n),
+            "other_income": rng.uniform(0, 10000, n), "contr401k1": rng.uniform(0, 23000, n),
+            "contr401k2": rng.uniform(0, 23000, n), "state": rng.choice(["PA", "NY"], n),
+        }
+        plain = taxes.Budget.calculate_batch(**columns)
+        for wrt in ("income2", "contr401k1"):
+            results = taxes.Budget.calculate_batch(**columns, marginal_rates=wrt)
+            for name in taxes.Budget.OUTPUTS:
+                assert results[name].tolist() == plain[name].tolist()
+            for i in range(n):
+                rates = taxes.Budget(*(columns[name][i].item() for name in columns)).marginal_rates(wrt)
+                assert [results[name][i] for name in taxes.Budget.MARGINAL_OUTPUTS] == [*rates, rates.total]
+
+
+class TestBracketBreakdown:
+    """Test cases for the per-bracket breakdown calculated alongside the liability."""
+
+    def test_schedule_breakdown(self):
+        """Test full, partial and empty brackets, including income at a boundary."""
+        schedule = taxes.BracketSchedule([50000, 100000, float("inf")], [0.1, 0.2, 0.3])
+        assert schedule.tax_with_breakdown(60000) == (7000.0, taxes.BracketBreakdown(
+            (50000, 10000, 0.0), (5000.0, 2000.0, 0.0), 1))
+        assert schedule.tax_with_breakdown(50000)[1] == ((50000, 0, 0.0), (5000.0, 0.0, 0.0), 0)
+        assert schedule.tax_with_breakdown(0)[1].top_bracket == 0
+
+    def test_breakdown_above_highest_bracket(self):
+        """Test that income above a finite highest bracket counts toward that bracket."""
+        tax, breakdown = taxes.Tax(200000, [50000, 100000], [0.1, 0.2]).calculate_tax_with_breakdown()
+        assert tax == taxes.Tax(200000, [50000, 100000], [0.1, 0.2]).calculate_tax()
+        assert breakdown == ((50000, 150000), (5000.0, 30000.0), 1)
+
+    def test_payroll_breakdowns(self):
+        """Test that Social Security caps its bracket and Medicare splits at the surtax threshold."""
+        assert taxes.SocialSecurityTax(200000, 50000).calculate_tax_with_breakdown()[1].income == (168600 + 50000,)
+        tax, breakdown = taxes.MedicareTax(300000).calculate_tax_with_breakdown()
+        assert tax == 4800.0
+        assert breakdown == ((250000, 50000), (3625.0, 1175.0), 1)
+
+    @requires_numpy
+    def test_batch_matches_scalar(self):
+        """Test that a mixed batch matches the scalar breakdowns, zero-padding shorter schedules."""
+        import numpy as np
+        incomes = [0, 80000, 250000, 1500000]
+        states = ["NY", "PA", "NY", "PA"]
+        (tax, _, _), breakdown = taxes.StateTax.calculate_tax_batch(incomes, 20000, states, with_rates=True,
+                                                                   with_breakdown=True)
+        assert breakdown.income.shape == (4, len(taxes.JURISDICTIONS.get("state", "NY").schedule.brackets))
+        for i, (income, state) in enumerate(zip(incomes, states)):
+            expected_tax, expected = taxes.StateTax(income, 20000, state).calculate_tax_with_breakdown()
+            count = len(expected.income)
+            assert tax[i] == expected_tax
+            assert np.allclose(breakdown.income[i, :count], expected.income)
+            assert np.allclose(breakdown.tax[i, :count], expected.tax)
+            assert not breakdown.income[i, count:].any()
+            assert breakdown.top_bracket[i] == expected.top_bracket
+
+    @requires_numpy
+    def test_batch_fills_preallocated_arrays(self):
+        """Test that the breakdown is written into the arrays passed as out."""
+        import numpy as np
+        income, tax = np.empty((3, 2)), np.empty((3, 2))
+        _, breakdown = taxes.Tax.calculate_tax_batch([0, 60000, 200000], [50000, float("inf")], [0.1, 0.2],
+                                                     with_breakdown=True, out=(income, tax))
+        assert breakdown.income is income and breakdown.tax is tax
+        assert income.tolist() == [[0, 0], [50000, 10000], [50000, 150000]]
+        assert breakdown.top_bracket.tolist() == [0, 1, 1]
+
+    def test_budget_bracket_breakdown(self):
+        """Test one breakdown per return, cached until an input changes."""
+        budget = taxes.Budget(200000, 80000, 5000, 20000, 15000, "NY")
+        (federal,) = budget.bracket_breakdown("federal")
+        assert round(sum(federal.tax), 2) == budget.federal_tax()
+        assert budget.bracket_breakdown("federal") is budget.bracket_breakdown("federal")
+        budget.filing_status = "married_separately"
+        assert len(budget.bracket_breakdown("federal")) == 2
+        assert len(budget.bracket_breakdown("social_security")) == 1
+        with pytest.raises(ValueError, match="Unknown tax component"):
+            budget.bracket_breakdown("city")
+
+
+class TestOptimizeContributions:
+    """Test cases for Budget.optimize_contributions."""
+
+    def test_minimizes_total_tax(self):
+        """Test that the plan is at least as good as every contribution on a grid."""
+        budget = taxes.Budget(150000, 60000, 5000, 0, 0, "NY")
+        plan = budget.optimize_contributions()
+        for contr401k1 in range(0, 23001, 1000):
+            for contr401k2 in range(0, 23001, 1000):
+                assert plan.total_tax <= taxes.Budget(150000, 60000, 5000, contr401k1, contr401k2, "NY").total_tax()
+        assert plan.total_tax == taxes.Budget(150000, 60000, 5000, plan.contr401k1, plan.contr401k2,
+                                              "NY").total_tax()
+
+    def test_stops_once_taxable_income_is_zero(self):
+        """Test that contributions beyond the point where they save tax are not made."""
+        plan = taxes.Budget(30000, 0, 0, 0, 0, "PA").optimize_contributions()
+        assert (plan.contr401k1, plan.contr401k2) == (30000 - 29200, 0)
+
+    def test_respects_limits_and_incomes(self):
+        """Test that each contribution stays within its limit and the person's income."""
+        plan = taxes.Budget(300000, 5000, 0, 0, 0, "PA").optimize_contributions(limit_per_person=10000)
+        assert (plan.contr401k1, plan.contr401k2) == (10000, 5000)
+
+    def test_min_take_home(self):
+        """Test that contributions are reduced just enough to keep the minimum take-home."""
+        budget = taxes.Budget(150000, 60000, 5000, 0, 0, "NY")
+        unconstrained = budget.optimize_contributions()
+        min_take_home = unconstrained.take_home + 10000
+        plan = budget.optimize_contributions(min_take_home=min_take_home)
+        assert min_take_home <= plan.take_home < min_take_home + 0.02
+        assert plan.total_tax > unconstrained.total_tax
+
+    def test_unreachable_take_home_raises_error(self):
+        """Test that a take-home above the no-contribution take-home raises ValueError."""
+        budget = taxes.Budget(150000, 60000, 5000, 0, 0, "NY")
+        with pytest.raises(ValueError, match="even without contributions"):
+            budget.optimize_contributions(min_take_home=budget.total_income)
+
+    def test_budget_is_unchanged(self):
+        """Test that optimizing leaves the budget's own contributions alone."""
+        budget = taxes.Budget(150000, 60000, 5000, 1000, 2000, "NY")
+        budget.optimize_contributions()
+        assert (budget.contr401k1, budget.contr401k2) == (1000, 2000)
+
+
+class TestRequiredIncome:
+    """Test cases for the Budget.required_income inverse solver."""
+
+    def test_target_take_home(self):
+        """Test that the solved income gives the target take-home to within rounding."""
+        for state in ("NY", "PA"):
+            budget = taxes.Budget(100000, 80000, 5000, 20000, 15000, state)
+            budget.income1 = budget.required_income(target_take_home=150000)
+            take_home = budget.total_income - budget.total_tax() - budget.contr401k1 - budget.contr401k2
+            assert take_home == pytest.approx(150000, abs=0.05)
+
+    def test_target_tax(self):
+        """Test solving for other income across the Social Security cap and Medicare threshold."""
+        budget = taxes.Budget(200000, 180000, 0, 0, 0, "NY")
+        budget.other_income = budget.required_income(target_tax=150000, wrt="other_income")
+        assert budget.total_tax() == pytest.approx(150000, abs=0.05)
+
+    def test_round_trip(self):
+        """Test that solving for a budget's own take-home returns its income."""
+        budget = taxes.Budget(250000, 80000, 5000, 20000, 15000, "PA")
+        take_home = budget.total_income - budget.total_tax() - 35000
+        assert budget.required_income(target_take_home=take_home, wrt="income2") == pytest.approx(80000, abs=0.05)
+
+    def test_unreachable_target_raises_error(self):
+        """Test that a target below what zero income gives raises ValueError."""
+        budget = taxes.Budget(100000, 80000, 5000, 20000, 15000, "NY")
+        with pytest.raises(ValueError, match="cannot be reached"):
+            budget.required_income(target_tax=0)
+
+    def test_exactly_one_target(self):
+        """Test that giving both or neither target raises ValueError."""
+        budget = taxes.Budget(100000, 80000, 5000, 20000, 15000, "NY")
+        with pytest.raises(ValueError, match="exactly one"):
+            budget.required_income()
+        with pytest.raises(ValueError, match="exactly one"):
+            budget.required_income(target_take_home=1, target_tax=1)
+
+    @requires_numpy
+    def test_batch_matches_scalar(self):
+        """Test that the vectorized solver matches the scalar one, beyond the last breakpoint too."""
+        budget = taxes.Budget(100000, 80000, 5000, 20000, 15000, "NY")
+        targets = [40000, 120000, 150000, 400000, 2000000]
+        expected = [budget.required_income(target_take_home=target) for target in targets]
+        assert budget.required_income_batch(target_take_home=targets).tolist() == expected
+
+
+class TestCompactRecords:
+    """Test cases for the slotted Tax and Budget representations and their records."""
+
+    def test_tax_and_budget_have_no_instance_dict(self):
+        """Test that tax objects and budgets keep their fields in slots."""
+        assert not hasattr(taxes.StateTax(100000, 0, "NY"), "__dict__")
+        assert not hasattr(taxes.Budget(100000, 80000, 5000, 20000, 15000, "NY"), "__dict__")
+        with pytest.raises(AttributeError):
+            taxes.Budget(100000, 80000, 5000, 20000, 15000, "NY").salary = 1
+
+    def test_tax_shares_schedule_tables(self):
+        """Test that brackets and rates are read from the shared compiled schedule."""
+        first, second = taxes.FederalTax(100000, 0), taxes.FederalTax(200000, 0)
+        assert first.brackets is second.brackets is first.schedule.brackets
+
+    def test_household_and_result_records(self):
+        """Test the immutable input and output records of a budget."""
+        household = taxes.Household(100000, 80000, 5000, 20000, 15000, "NY", fed_tax_paid=15000)
+        budget = taxes.Budget.from_household(household)
+        assert budget.household() == household
+        result = budget.result()
+        assert result.total_tax == budget.total_tax()
+        assert result.federal_tax_owed == budget.federal_tax_owed()
+        with pytest.raises(AttributeError):
+            result.total_tax = 0
+
+
+@requires_numpy
+class TestBudgetFrame:
+    """Test cases for the columnar BudgetFrame."""
+
+    def make_frame(self, n=200):
+        import numpy as np
+        rng = np.random.default_rng(3)
+        return taxes.BudgetFrame({
+            "income1": rng.uniform(0, 400000, n), "income2": rng.uniform(0, 400000, n),
+            "other_income": rng.uniform(0, 10000, n), "contr401k1": rng.uniform(0, 23000, n),
+            "contr401k2": 0, "state": rng.choice(["PA", "NY"], n),
+        })
+
+    def test_rows_and_results_match_budgets(self):
+        """Test that each row view and result equals a Budget built from that row."""
+        frame = self.make_frame()
+        assert len(frame) == 200
+        for i, household in enumerate(frame):
+            assert household == frame[i]
+            assert frame.result(i) == taxes.Budget.from_household(household).result()
+        assert frame.budget(7).total_tax() == frame.results()["total_tax"][7]
+
+    def test_columns_are_typed_and_read_only(self):
+        """Test that columns are compact typed arrays that cannot be modified."""
+        frame = self.make_frame()
+        assert frame.column("income1").dtype == "float64"
+        assert frame.column("fed_tax_paid").tolist() == [0.0] * 200
+        assert frame.column("state").tolist()[:3] == [household.state for household in list(frame)[:3]]
+        assert set(frame.column("filing_status").tolist()) == {taxes.DEFAULT_FILING_STATUS}
+        assert frame.nbytes == 200 * 90  # eleven 8-byte numbers and two one-byte text codes
+        with pytest.raises(ValueError):
+            frame.column("income1")[0] = 1
+        with pytest.raises(ValueError):
+            frame.results()["total_tax"][0] = 1
+
+    def test_selection(self):
+        """Test that slices and masks return frames of the selected rows."""
+        frame = self.make_frame()
+        ny = frame[frame.column("state") == "NY"]
+        assert set(ny.column("state").tolist()) == {"NY"}
+        assert frame[10:20][3] == frame[13]
+        assert taxes.BudgetFrame.from_households(list(frame)[:5])[4] == frame[4]
+
+    def test_mismatched_columns_raise_error(self):
+        """Test that columns of different lengths or missing inputs raise ValueError."""
+        with pytest.raises(ValueError, match="same length"):
+            taxes.BudgetFrame({"income1": [1, 2], "income2": [1, 2, 3], "other_income": 0,
+                               "contr401k1": 0, "contr401k2": 0, "state": "NY"})
+        with pytest.raises(ValueError, match="Unknown filing statuses: joint"):
+            taxes.BudgetFrame({"income1": [1], "income2": [1], "other_income": 0, "contr401k1": 0, "contr401k2": 0,
+                               "state": "NY", "filing_status": "joint"})
+        with pytest.raises(ValueError, match="Missing columns: state"):
+            taxes.BudgetFrame({"income1": [1], "income2": [1], "other_income": 0, "contr401k1": 0, "contr401k2": 0})
+
+
+@requires_numpy
+class TestBudgetSweep:
+    """Test cases for Budget.sweep."""
+
+    def test_sweep_grid_matches_budgets(self):
+        """Test that each grid cell equals a Budget built with the same values."""
+        budget = taxes.Budget(100000, 80000, 5000, 20000, 15000, "PA", fed_tax_paid=12000)
+        results = budget.sweep(state=["NY", "PA"], contr401k1=range(0, 23001, 11500), income2=[0, 80000])
+        assert results.shape == (2, 3, 2)
+        for i, state in enumerate(["NY", "PA"]):
+            for j, contr401k1 in enumerate(range(0, 23001, 11500)):
+                for k, income2 in enumerate([0, 80000]):
+                    expected = taxes.Budget(100000, income2, 5000, contr401k1, 15000, state, fed_tax_paid=12000)
+                    cell = results[i, j, k]
+                    assert cell["state"] == state
+                    assert cell["total_tax"] == expected.total_tax()
+                    assert cell["federal_tax_owed"] == expected.federal_tax_owed()
+                    assert cell["eff_tax_rate"] == expected.eff_tax_rate()
+
+    def test_sweep_state_difference(self):
+        """Test a NY vs PA comparison from a single sweep."""
+        budget = taxes.Budget(100000, 80000, 5000, 20000, 15000, "PA")
+        results = budget.sweep(state=["NY", "PA"])
+        expected = taxes.Budget(100000, 80000, 5000, 20000, 15000, "NY").total_tax() - budget.total_tax()
+        assert results["total_tax"][0] - results["total_tax"][1] == expected
+
+    def test_sweep_single_value_axes(self):
+        """Test that a scalar or string axis is swept as an axis of one value."""
+        budget = taxes.Budget(100000, 80000, 5000, 20000, 15000, "PA")
+        results = budget.sweep(contr401k1=5000, state="NY", income2=iter([0, 80000]))
+        assert results.shape == (1, 1, 2)
+        expected = taxes.Budget(100000, 80000, 5000, 5000, 15000, "NY")
+        assert results[0, 0, 1]["total_tax"] == expected.total_tax()
+
+    def test_sweep_grid_columns(self):
+        """Test that the sweep grid is one typed flat column per axis, in row-major cell order."""
+        shape, grid = taxes.Budget.sweep_grid(year=[2024, 2025], state=["NY", "PA"], income1=[1, 2, 3])
+        assert shape == (2, 2, 3)
+        assert (grid["year"].dtype, grid["state"].dtype.kind, grid["income1"].dtype) == ("int64", "U", "float64")
+        assert grid["year"].tolist() == [2024] * 6 + [2025] * 6
+        assert grid["income1"].tolist()[:4] == [1.0, 2.0, 3.0, 1.0]
+
+    def test_sweep_unknown_field_raises_error(self):
+        """Test that sweeping over an unknown field raises ValueError."""
+        budget = taxes.Budget(100000, 80000, 5000, 20000, 15000, "PA")
+        with pytest.raises(ValueError, match="Cannot sweep over"):
+            budget.sweep(salary=[1, 2])
+
+
+@requires_numpy
+class TestBudgetSimulate:
+    """Test cases for Budget.simulate."""
+
+    def test_seeded_draws_are_reproducible(self):
+        """Test that the same seed gives the same quantiles and a different seed different ones."""
+        budget = taxes.Budget(150000, 90000, 5000, 20000, 10000, "NY", fed_tax_paid=30000)
+        incomes = {"income1": (150000, taxes.NormalIncome(30000, 10000), taxes.LogNormalIncome(50000, 0.4)),
+                   "income2": taxes.UniformIncome(80000, 100000)}
+        first = budget.simulate(draws=2000, seed=3, **incomes)
+        assert first == budget.simulate(draws=2000, seed=3, **incomes)
+        assert first != budget.simulate(draws=2000, seed=4, **incomes)
+        assert list(first) == ["total_tax", "federal_tax_owed"]
+        assert list(first["total_tax"]) == list(taxes.SIMULATION_QUANTILES)
+        assert sorted(first["total_tax"].values()) == list(first["total_tax"].values())
+
+    def test_quantiles_match_scalar_budgets(self):
+        """Test that simulated quantiles equal the quantiles of scalar Budgets over the same draws."""
+        np = pytest.importorskip("numpy")
+        budget = taxes.Budget(100000, 0, 2000, 5000, 0, "PA", fed_tax_paid=9000, filing_status="married_separately")
+        distribution = taxes.LogNormalIncome(250000, 0.6)
+        results = budget.simulate(draws=200, seed=11, quantiles=(0.1, 0.5, 0.9), income2=distribution)
+
+        draws = np.maximum(distribution.sample(np.random.default_rng(11), 200), 0)
+        scalar = [taxes.Budget(100000, income2, 2000, 5000, 0, "PA", fed_tax_paid=9000,
+                               filing_status="married_separately") for income2 in draws.tolist()]
+        for name in ("total_tax", "federal_tax_owed"):
+            expected = np.quantile([getattr(b, name)() for b in scalar], (0.1, 0.5, 0.9))
+            assert list(results[name].values()) == pytest.approx(expected.tolist())
+
+    def test_fixed_incomes_give_point_estimate(self):
+        """Test that without distributions every quantile is this budget's own value."""
+        budget = taxes.Budget(100000, 80000, 5000, 20000, 15000, "PA")
+        results = budget.simulate(draws=5, outputs=("total_tax",))
+        assert set(results["total_tax"].values()) == {budget.total_tax()}
+
+    def test_invalid_arguments_raise_error(self):
+        """Test that unknown inputs or outputs and non-positive draws raise ValueError."""
+        budget = taxes.Budget(100000, 80000, 5000, 20000, 15000, "PA")
+        with pytest.raises(ValueError, match="Cannot simulate"):
+            budget.simulate(contr401k1=taxes.UniformIncome(0, 1000))
+        with pytest.raises(ValueError, match="Unknown outputs"):
+            budget.simulate(outputs=("refund",))
+        with pytest.raises(ValueError):
+            budget.simulate(draws=0)
+
+
+class TestResultCache:
+    """Test cases for the opt-in component result cache."""
+
+    HOUSEHOLDS = [
+        (100000, 80000, 5000, 20000, 15000, "PA"),
+        (80000, 100000, 5000, 15000, 20000, "PA"),
+        (80000, 100000, 5000, 15000, 20000, "NY"),
+        (292060.68, 325953.54, 7462, 23000, 23000, "NY", 0, 0, 0, 0, 0, 2024, "married_separately"),
+    ]
+
+    def test_results_unchanged(self, monkeypatch):
+        """Test that cached budgets give exactly the results of uncached ones, in dollars and cents."""
+        expected = [(taxes.Budget(*household).result(), taxes.Budget(*household).breakdown(cents=True))
+                    for household in self.HOUSEHOLDS]
+        monkeypatch.setattr(taxes.Budget, "result_cache", taxes.ResultCache())
+        for _ in range(2):
+            assert [(taxes.Budget(*household).result(), taxes.Budget(*household).breakdown(cents=True))
+                    for household in self.HOUSEHOLDS] == expected
+
+    def test_keyed_by_component_inputs(self, monkeypatch):
+        """Test that households sharing a component's inputs share its entry, whatever else differs."""
+        cache = taxes.ResultCache()
+        monkeypatch.setattr(taxes.Budget, "result_cache", cache)
+        taxes.Budget(*self.HOUSEHOLDS[0]).total_tax()
+        assert cache.stats()[:3] == (0, 0, 5)
+        # The same totals split differently: only Social Security, which is capped per spouse, differs.
+        taxes.Budget(*self.HOUSEHOLDS[1]).total_tax()
+        assert cache.stats()[:3] == (4, 0, 6)
+        # Moving state changes the state and local taxes only.
+        taxes.Budget(*self.HOUSEHOLDS[2]).total_tax()
+        assert cache.stats()[:3] == (7, 0, 8)
+        assert cache.stats().hit_rate == pytest.approx(7 / 15)
+
+    def test_least_recently_used_evicted(self):
+        """Test that a full cache evicts the entry used least recently."""
+        cache = taxes.ResultCache(maxsize=2)
+        cache.get(taxes.MedicareTax, (100000,))
+        cache.get(taxes.MedicareTax, (200000,))
+        cache.get(taxes.MedicareTax, (100000.0,))
+        cache.get(taxes.MedicareTax, (300000,))
+        assert cache.stats() == (1, 0, 3, 2, 2)
+        cache.get(taxes.MedicareTax, (100000,))
+        cache.get(taxes.MedicareTax, (200000,))
+        assert cache.stats()[:3] == (2, 0, 4)
+        with pytest.raises(ValueError):
+            taxes.ResultCache(maxsize=0)
+
+    def test_disk_tier_shared_and_tied_to_rules(self, tmp_path):
+        """Test that a second cache on the same file reuses results, unless the rules differ."""
+        import shutil
+
+        path = tmp_path / "results.sqlite"
+        first = taxes.ResultCache(path=path)
+        tax = first.get(taxes.FederalTax, (150000, 20000, 2024, "married_jointly"))
+        first.close()
+
+        second = taxes.ResultCache(path=path)
+        assert second.get(taxes.FederalTax, (150000.0, 20000.0, 2024, "married_jointly")) == tax
+        assert second.stats()[:3] == (0, 1, 0)
+        second.close()
+
+        rules = tmp_path / "rules"
+        shutil.copytree(taxes.RULES_DIR, rules)
+        (rules / "state" / "NY.toml").write_text((rules / "state" / "NY.toml").read_text() + "\n# edited\n")
+        edited = taxes.ResultCache(path=path, registry=taxes.JurisdictionRegistry(rules))
+        edited.get(taxes.FederalTax, (150000, 20000, 2024, "married_jointly"))
+        assert edited.stats()[:3] == (0, 0, 1)
+        edited.close()
+
+    def test_command_line_cache(self, tmp_path, capsys):
+        """Test that the command line writes results to the cache file and reads them back."""
+        import json
+
+        path = tmp_path / "households.json"
+        path.write_text(json.dumps(dict(zip(taxes.Budget.ARGUMENTS, self.HOUSEHOLDS[0]))))
+        cache = tmp_path / "results.sqlite"
+        assert taxes.main([str(path), "--cache", str(cache)]) == 0
+        first = capsys.readouterr().out
+        assert taxes.main([str(path), "--cache", str(cache)]) == 0
+        assert capsys.readouterr().out == first
+        assert cache.exists() and taxes.Budget.result_cache is None
+
+    def test_command_line_unopenable_cache(self, tmp_path):
+        """Test that a cache file that cannot be opened raises its own error, not one from closing it."""
+        import sqlite3
+
+        path = tmp_path / "households.json"
+        path.write_text("{}")
+        with pytest.raises(sqlite3.OperationalError):
+            taxes.main([str(path), "--cache", str(tmp_path / "missing" / "results.sqlite")])
+        assert taxes.Budget.result_cache is None
+
+
+class TestCommandLine:
+    """Test cases for the JSON command line."""
+
+    HOUSEHOLD = {"income1": 100000, "income2": 80000, "other_income": 5000, "contr401k1": 20000,
+                 "contr401k2": 15000, "state": "PA", "fed_tax_paid": 12000}
+
+    def test_ndjson_in_json_lines_out(self, tmp_path, capsys):
+        """Test that each input object, on one line or several, gives one line with the full budget."""
+        import json
+
+        path = tmp_path / "households.json"
+        path.write_text(json.dumps(self.HOUSEHOLD) + "\n\n" + json.dumps({**self.HOUSEHOLD, "state": "NY"}, indent=2))
+        assert taxes.main([str(path)]) == 0
+
+        lines = capsys.readouterr().out.splitlines()
+        assert len(lines) == 2
+        for line, state in zip(lines, ["PA", "NY"]):
+            record = json.loads(line)
+            budget = taxes.Budget(**{**self.HOUSEHOLD, "state": state})
+            assert record["state"] == state
+            assert record["total_tax"] == budget.total_tax()
+            assert record["federal_tax_owed"] == budget.federal_tax_owed()
+            assert record["brackets"]["federal"][0]["tax"] == list(budget.bracket_breakdown("federal")[0].tax)
+
+    def test_pretty_printed_array(self, tmp_path, capsys):
+        """Test that an indented array of many households is read in one pass, one output line each."""
+        import json
+
+        path = tmp_path / "households.json"
+        households = [{**self.HOUSEHOLD, "income1": 1000 * index} for index in range(2000)]
+        path.write_text("\n" + json.dumps(households, indent=2) + "\n" + json.dumps(self.HOUSEHOLD, indent=2))
+        assert taxes.main([str(path), "--no-brackets"]) == 0
+
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [record["income1"] for record in records] == [1000 * index for index in range(2000)] + [100000]
+        assert records[1]["total_tax"] == taxes.Budget(**households[1]).total_tax()
+        lines = [line for line, _ in taxes.read_households(path.read_text().splitlines(keepends=True))]
+        assert set(lines[:2000]) == {2} and lines[2000] == 2 + 2000 * 9 + 2
+
+    def test_array_from_stdin(self, monkeypatch, capsys):
+        """Test reading an array of households from stdin, without bracket breakdowns."""
+        import io
+        import json
+
+        monkeypatch.setattr(sys, "stdin", io.StringIO(json.dumps([self.HOUSEHOLD, self.HOUSEHOLD])))
+        assert taxes.main(["--no-brackets"]) == 0
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert len(records) == 2
+        assert "brackets" not in records[0]
+        assert set(records[0]) == set(taxes.Budget.ARGUMENTS + taxes.Budget.OUTPUTS)
+
+    @pytest.mark.parametrize("text, message", [
+        ('{"income1": 1}', "line 1: Missing inputs"),
+        ('{"income1": 1, "salary": 2}', "line 1: Unknown inputs salary"),
+        ('\n{"income1": 1,, "income2": 0}', "line 2: invalid JSON"),
+        ('{"income1": 1,\n', "line 1: invalid JSON"),
+    ])
+    def test_invalid_input_reports_line(self, tmp_path, capsys, text, message):
+        """Test that invalid households exit with status 1 and name the line they start on."""
+        path = tmp_path / "households.json"
+        path.write_text(text)
+        assert taxes.main([str(path)]) == 1
+        assert message in capsys.readouterr().err
+
+    def test_startup_imports_no_numpy_or_gui(self, tmp_path):
+        """Test that evaluating a household from the command line imports neither NumPy nor tkinter."""
+        import json
+        import os
+        import subprocess
+
+        script = ("import io, sys; import taxes; sys.stdin = io.StringIO(sys.argv[1]); taxes.main([]); "
+                  "print([name for name in ('numpy', 'pandas', 'tkinter') if name in sys.modules], file=sys.stderr)")
+        result = subprocess.run([sys.executable, "-c", script, json.dumps(self.HOUSEHOLD)], capture_output=True,
+                                text=True, check=True, cwd=os.path.dirname(os.path.abspath(taxes.__file__)))
+        assert result.stderr.strip() == "[]"
+        assert json.loads(result.stdout)["state"] == "PA"
+
 
 # Run the existing tests for backward compatibility
 def test_zero_income_fed_tax():
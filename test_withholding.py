@@ -0,0 +1,108 @@
+import csv
+import sys
+import pytest
+sys.path.append(".")
+np = pytest.importorskip("numpy")
+import taxes
+import withholding
+
+
+def biweekly(reconciler, periods, employee_id="A", wages=10000, state="NY", **amounts):
+    for period in periods:
+        reconciler.update([employee_id], period, wages, state, **amounts)
+
+
+class TestWithholdingReconciler:
+    """Test cases for the streaming paycheck reconciliation."""
+
+    def test_year_end_matches_budget(self):
+        """Test that a full year of paychecks projects what a Budget of the annual totals owes."""
+        reconciler = withholding.WithholdingReconciler()
+        biweekly(reconciler, range(1, 27), contr401k=500, fed_withheld=1500, state_withheld=500, local_withheld=300,
+                 social_sec_withheld=400, medicare_withheld=150)
+        projection = reconciler.projections()
+        budget = taxes.Budget(260000, 0, 0, 13000, 0, "NY", 39000, 13000, 7800, 10400, 3900)
+        assert projection["federal_tax_owed"][0] == budget.federal_tax_owed()
+        assert projection["state_tax_owed"][0] == budget.state_tax_owed()
+        assert projection["local_tax_owed"][0] == budget.local_tax_owed()
+
+    def test_midyear_projection_annualizes(self):
+        """Test that income tax figures continue at the average rate per period paid."""
+        reconciler = withholding.WithholdingReconciler()
+        biweekly(reconciler, range(1, 14), fed_withheld=1500, state_withheld=500)
+        projection = reconciler.projections()
+        assert projection["projected_wages"][0] == 260000
+        assert projection["state_tax_owed"][0] == taxes.Budget(260000, 0, 0, 0, 0, "NY", 39000, 13000).state_tax_owed()
+
+    def test_thresholds_tracked_by_period(self):
+        """Test the periods in which wages reach the wage base and the surtax threshold."""
+        reconciler = withholding.WithholdingReconciler()
+        reconciler.update(["A"] * 26 + ["B"], list(range(26, 0, -1)) + [1], [10000] * 26 + [300000], "PA",
+                          filing_status=["married_jointly"] * 26 + ["single"])
+        projection = reconciler.projections()
+        assert projection["wage_base_period"].tolist() == [17, 1]  # 168600 of wages in 2024
+        assert projection["surtax_period"].tolist() == [25, 1]
+
+    def test_chunking_does_not_change_projections(self):
+        """Test that one chunk and one paycheck at a time give the same projections."""
+        rng = np.random.default_rng(0)
+        ids = np.repeat(np.arange(50), 26)
+        periods = np.tile(np.arange(1, 27), 50)
+        wages = rng.uniform(0, 20000, ids.size).round(2)
+        withheld = (wages * 0.2).round(2)
+        states = np.where(ids % 2, "NY", "PA")
+
+        whole = withholding.WithholdingReconciler()
+        whole.update(ids, periods, wages, states, fed_withheld=withheld)
+        streamed = withholding.WithholdingReconciler()
+        for period in range(1, 27):
+            index = periods == period
+            streamed.update(ids[index], period, wages[index], states[index], fed_withheld=withheld[index])
+        for name, values in whole.projections().items():
+            assert np.allclose(values, streamed.projections()[name]), name
+
+    def test_invalid_paychecks_raise_error(self):
+        """Test that out-of-range periods and negative wages are rejected."""
+        reconciler = withholding.WithholdingReconciler(periods_per_year=12)
+        with pytest.raises(ValueError, match="between 1 and 12"):
+            reconciler.update(["A"], 13, 1000, "NY")
+        with pytest.raises(ValueError, match="Wages cannot be negative"):
+            reconciler.update(["A"], 1, -1000, "NY")
+
+
+class TestRunReconciliation:
+    """Test cases for the CSV reconciliation runner."""
+
+    def test_writes_one_row_per_employee(self, tmp_path):
+        """Test that paychecks in any chunk size reduce to one projection per employee."""
+        path = tmp_path / "paychecks.csv"
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["employee_id", "period", "wages", "state", "fed_withheld"])
+            for period in range(1, 27):
+                writer.writerow(["e1", period, "5000", "NY", "700"])
+                writer.writerow(["e2", period, "2000", "PA", ""])
+        outputs = []
+        for chunk_size in (1, 7, 1000):
+            output = tmp_path / f"projections_{chunk_size}.csv"
+            assert withholding.run_reconciliation(str(path), str(output), chunk_size=chunk_size) == 2
+            outputs.append(output.read_bytes())
+        assert outputs[0] == outputs[1] == outputs[2]
+
+        with open(tmp_path / "projections_1.csv", newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert [row["employee_id"] for row in rows] == ["e1", "e2"]
+        assert float(rows[0]["federal_tax_owed"]) == taxes.Budget(130000, 0, 0, 0, 0, "NY", 18200).federal_tax_owed()
+
+    def test_read_paycheck_columns(self, tmp_path):
+        """Test that absent and empty amounts read as 0 and required columns are checked."""
+        path = tmp_path / "paychecks.csv"
+        path.write_text("employee_id,period,wages,state,fed_withheld\n e1 ,1, 5000 ,NY,\n")
+        columns = next(withholding.read_paycheck_chunks(str(path)))
+        assert columns["employee_id"].tolist() == ["e1"]
+        assert columns["period"].dtype == np.int64 and columns["wages"].tolist() == [5000.0]
+        assert columns["fed_withheld"].tolist() == [0.0] and columns["medicare_withheld"].tolist() == [0.0]
+        assert columns["filing_status"].tolist() == [taxes.DEFAULT_FILING_STATUS]
+        path.write_text("employee_id,wages,state\ne1,5000,NY\n")
+        with pytest.raises(ValueError, match="missing required columns: period"):
+            next(withholding.read_paycheck_chunks(str(path)))
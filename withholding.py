@@ -0,0 +1,285 @@
+"""
+Streaming withholding reconciliation over paycheck records.
+
+Paychecks are folded into running year-to-date totals per employee as they arrive, in chunks of
+any size, so each chunk costs time proportional to its own length and projections never rescan
+earlier paychecks. The Social Security wage base and the Additional Medicare Tax threshold
+are tracked as the totals cross them. At any point ``projections`` annualizes the totals and
+evaluates every employee with ``taxes.Budget.calculate_batch``.
+
+Usage:
+    python withholding.py paychecks.csv projections.csv [--periods 26] [--year 2024] [--chunk-size N]
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import sys
+
+import batch
+import taxes
+
+DEFAULT_PERIODS = 26  # biweekly pay
+DEFAULT_CHUNK_SIZE = 100_000
+AMOUNTS = ("wages", "contr401k", "fed_withheld", "state_withheld", "local_withheld", "social_sec_withheld",
+           "medicare_withheld")
+# Missing amount columns and empty amounts read as 0.
+PAYCHECK_CSV_COLUMNS = {"employee_id": batch.CsvColumn(str, required=True),
+                        "period": batch.CsvColumn(int, required=True),
+                        **{name: batch.CsvColumn(float, 0.0, required=name == "wages") for name in AMOUNTS},
+                        "state": batch.CsvColumn(str, required=True),
+                        "filing_status": batch.CsvColumn(str, taxes.DEFAULT_FILING_STATUS)}
+PROJECTION_COLUMNS = ("employee_id", "periods", "ytd_wages", "projected_wages", "wage_base_period", "surtax_period",
+                      "federal_tax_owed", "state_tax_owed", "local_tax_owed")
+
+
+class WithholdingReconciler:
+    """
+    Running year-to-date wages and withholding for every employee of one tax year.
+
+    Each employee is evaluated as a household with a single earner, under the filing status and
+    state of their latest paycheck.
+    """
+
+    def __init__(self, periods_per_year: int = DEFAULT_PERIODS, year: int = taxes.DEFAULT_YEAR):
+        """
+        Args:
+            periods_per_year (int, optional): Pay periods in the year; paychecks are numbered from 1.
+            year (int, optional): The tax year whose rules apply.
+        """
+        import numpy as np
+
+        if periods_per_year <= 0:
+            raise ValueError("Pay periods per year must be positive.")
+        self.periods_per_year = periods_per_year
+        self.year = year
+        self._slots = {}  # employee id -> row of the year-to-date arrays
+        self._ids = []
+        self._totals = {name: np.zeros(0) for name in AMOUNTS}
+        self._periods = np.zeros(0, dtype=np.int64)  # latest period paid
+        # First period whose paycheck took year-to-date wages to the wage base / surtax threshold; 0 if none.
+        self._wage_base_period = np.zeros(0, dtype=np.int64)
+        self._surtax_period = np.zeros(0, dtype=np.int64)
+        self._state = np.zeros(0, dtype=object)
+        self._filing_status = np.zeros(0, dtype=object)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _assign_slots(self, employee_ids):
+        """
+        Map employee ids to rows, adding rows for employees not seen before.
+        """
+        import numpy as np
+
+        slots = self._slots
+        for employee_id in employee_ids:
+            if employee_id not in slots:
+                slots[employee_id] = len(self._ids)
+                self._ids.append(employee_id)
+        capacity = self._periods.shape[0]
+        if len(self._ids) > capacity:
+            # Grow geometrically so appending employees stays amortized O(1).
+            capacity = max(len(self._ids), 2 * capacity, 1024)
+            for name, values in self._totals.items():
+                self._totals[name] = np.concatenate([values, np.zeros(capacity - values.shape[0])])
+            for name in ("_periods", "_wage_base_period", "_surtax_period"):
+                values = getattr(self, name)
+                setattr(self, name, np.concatenate([values, np.zeros(capacity - values.shape[0], dtype=np.int64)]))
+            for name in ("_state", "_filing_status"):
+                values = getattr(self, name)
+                setattr(self, name, np.concatenate([values, np.zeros(capacity - values.shape[0], dtype=object)]))
+        return np.fromiter((slots[employee_id] for employee_id in employee_ids), dtype=np.int64,
+                           count=len(employee_ids))
+
+    def update(self, employee_id, period, wages, state, contr401k=0, fed_withheld=0, state_withheld=0,
+               local_withheld=0, social_sec_withheld=0, medicare_withheld=0,
+               filing_status=taxes.DEFAULT_FILING_STATUS):
+        """
+        Add a chunk of paychecks, one entry per paycheck (scalars are broadcast).
+
+        Totals do not depend on how paychecks are ordered or split into chunks. Threshold periods are
+        found in pay period order within a chunk, and assume a chunk holds no period earlier than
+        those already seen for the same employee, as with a feed delivered period by period.
+        """
+        import numpy as np
+
+        employee_id = np.atleast_1d(np.asarray(employee_id))
+        size = employee_id.shape[0]
+        period = np.broadcast_to(np.asarray(period, dtype=np.int64), (size,))
+        if ((period < 1) | (period > self.periods_per_year)).any():
+            raise ValueError(f"Pay periods must be between 1 and {self.periods_per_year}.")
+        amounts = dict(zip(AMOUNTS, (np.broadcast_to(np.asarray(values, dtype=np.float64), (size,)) for values in
+                                     (wages, contr401k, fed_withheld, state_withheld, local_withheld,
+                                      social_sec_withheld, medicare_withheld))))
+        if (amounts["wages"] < 0).any():
+            raise ValueError("Wages cannot be negative.")
+        slots = self._assign_slots(employee_id.tolist())
+
+        # Year-to-date wages after each paycheck, in pay period order within each employee, so a
+        # crossing is attributed to the paycheck that made it even inside one chunk.
+        order = np.lexsort((period, slots))
+        sorted_slots, sorted_periods = slots[order], period[order]
+        wages = amounts["wages"][order]
+        running = np.cumsum(wages)
+        starts = np.flatnonzero(np.r_[True, sorted_slots[1:] != sorted_slots[:-1]])
+        group = np.repeat(np.arange(starts.shape[0]), np.diff(np.r_[starts, size]))
+        after = self._totals["wages"][sorted_slots] + running - (running - wages)[starts][group]
+        before = after - wages
+
+        statuses = np.asarray(filing_status, dtype=str)
+        if statuses.ndim == 0:
+            groups = [(statuses.item(), ...)]
+        else:
+            statuses = np.broadcast_to(statuses, (size,))[order]
+            groups = [(status, statuses == status) for status in np.unique(statuses)]
+        for status, index in groups:
+            social_security = taxes.JURISDICTIONS.get("payroll", "social_security", self.year, status)
+            medicare = taxes.JURISDICTIONS.get("payroll", "medicare", self.year, status)
+            for threshold, crossed in ((social_security.wage_base, self._wage_base_period),
+                                       (medicare.surtax_threshold, self._surtax_period)):
+                crossing = (before[index] < threshold) & (after[index] >= threshold)
+                crossing_slots = sorted_slots[index][crossing]
+                crossed[crossing_slots] = np.where(crossed[crossing_slots] == 0, sorted_periods[index][crossing],
+                                                   crossed[crossing_slots])
+
+        capacity = self._periods.shape[0]
+        for name, values in amounts.items():
+            self._totals[name] += np.bincount(slots, values, minlength=capacity)
+        np.maximum.at(self._periods, slots, period)
+        # The latest paycheck of each employee decides their state and filing status.
+        last = order[np.r_[starts[1:] - 1, size - 1]]
+        self._state[slots[last]] = np.broadcast_to(np.asarray(state, dtype=object), (size,))[last]
+        self._filing_status[slots[last]] = np.broadcast_to(np.asarray(filing_status, dtype=object), (size,))[last]
+
+    def totals(self) -> dict:
+        """
+        The year-to-date totals of every employee, in the order they were first seen.
+
+        Returns:
+            dict[str, numpy.ndarray]: ``employee_id``, ``periods`` and one array per name in ``AMOUNTS``.
+        """
+        import numpy as np
+
+        count = len(self._ids)
+        totals = {"employee_id": np.array(self._ids), "periods": self._periods[:count].copy()}
+        totals.update((name, values[:count].copy()) for name, values in self._totals.items())
+        return totals
+
+    def projections(self, cents: bool = False) -> dict:
+        """
+        Project every employee's year-end liabilities and what they will owe on top of withholding.
+
+        Wages, contributions and income tax withholding continue at each employee's average rate
+        per period paid so far; contributions stop at the federal limit. Social Security and
+        Medicare are assumed to be withheld exactly from here on, so their projected shortfall is
+        what is already missing. Owed amounts follow ``Budget.federal_tax_owed`` and friends;
+        federal includes Social Security and Medicare.
+
+        Returns:
+            dict[str, numpy.ndarray]: One array per name in ``PROJECTION_COLUMNS``.
+        """
+        import numpy as np
+
+        count = len(self._ids)
+        if count == 0:
+            return {name: np.zeros(0) for name in PROJECTION_COLUMNS}
+        totals = {name: values[:count] for name, values in self._totals.items()}
+        periods = self._periods[:count]
+        scale = self.periods_per_year / periods
+        state = self._state[:count].astype(str)
+        filing_status = self._filing_status[:count].astype(str)
+
+        wages = totals["wages"] * scale
+        contr401k = totals["contr401k"] * scale
+        social_sec_withheld = np.empty(count)
+        medicare_withheld = np.empty(count)
+        for status in np.unique(filing_status):
+            index = filing_status == status
+            federal = taxes.JURISDICTIONS.get("federal", "US", self.year, status)
+            social_security = taxes.JURISDICTIONS.get("payroll", "social_security", self.year, status)
+            medicare = taxes.JURISDICTIONS.get("payroll", "medicare", self.year, status)
+            contr401k[index] = np.minimum(contr401k[index], federal.contribution_limit)
+
+            earned, projected = totals["wages"][index], wages[index]
+            future = np.minimum(projected, social_security.wage_base) - np.minimum(earned, social_security.wage_base)
+            social_sec_withheld[index] = totals["social_sec_withheld"][index] + \
+                future * social_security.schedule.rates[0]
+            threshold = medicare.surtax_threshold
+            future_surtax = np.maximum(projected - threshold, 0) - np.maximum(earned - threshold, 0)
+            medicare_withheld[index] = totals["medicare_withheld"][index] + \
+                (projected - earned) * medicare.schedule.rates[0] + future_surtax * medicare.surtax_rate
+
+        results = taxes.Budget.calculate_batch(
+            wages, 0, 0, contr401k, 0, state, totals["fed_withheld"] * scale, totals["state_withheld"] * scale,
+            totals["local_withheld"] * scale, social_sec_withheld, medicare_withheld, year=self.year,
+            filing_status=filing_status, cents=cents)
+        return {
+            "employee_id": np.array(self._ids),
+            "periods": periods.copy(),
+            "ytd_wages": totals["wages"].copy(),
+            "projected_wages": wages,
+            "wage_base_period": self._wage_base_period[:count].copy(),
+            "surtax_period": self._surtax_period[:count].copy(),
+            "federal_tax_owed": results["federal_tax_owed"],
+            "state_tax_owed": results["state_tax_owed"],
+            "local_tax_owed": results["local_tax_owed"],
+        }
+
+
+def read_paycheck_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Yield paycheck columns from a CSV file, ``chunk_size`` rows at a time.
+
+    ``employee_id``, ``period``, ``wages`` and ``state`` are required; missing amount columns and
+    empty cells are read as 0, and a missing ``filing_status`` as ``taxes.DEFAULT_FILING_STATUS``.
+
+    Yields:
+        dict: Keyword arguments for ``WithholdingReconciler.update``.
+    """
+    for chunk in batch.read_csv_rows(path, chunk_size, PAYCHECK_CSV_COLUMNS):
+        yield chunk.columns()
+
+
+def run_reconciliation(input_path: str, output_path: str, periods_per_year: int = DEFAULT_PERIODS,
+                       year: int = taxes.DEFAULT_YEAR, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Reconcile every paycheck in ``input_path`` and write one projection per employee to ``output_path``.
+
+    Returns:
+        int: The number of employees.
+    """
+    if chunk_size <= 0:
+        raise ValueError("Chunk size must be positive.")
+
+    reconciler = WithholdingReconciler(periods_per_year, year)
+    for columns in read_paycheck_chunks(input_path, chunk_size):
+        reconciler.update(**columns)
+
+    projections = reconciler.projections()
+    with open(output_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(PROJECTION_COLUMNS)
+        writer.writerows(zip(*(projections[name].tolist() for name in PROJECTION_COLUMNS)))
+    return len(reconciler)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Project year-end taxes owed from paycheck withholding.")
+    parser.add_argument("input", help="input CSV file of paychecks")
+    parser.add_argument("output", help="output CSV file of projections, one row per employee")
+    parser.add_argument("--periods", type=int, default=DEFAULT_PERIODS,
+                        help=f"pay periods per year (default: {DEFAULT_PERIODS})")
+    parser.add_argument("--year", type=int, default=taxes.DEFAULT_YEAR,
+                        help=f"tax year (default: {taxes.DEFAULT_YEAR})")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"paychecks read per chunk (default: {DEFAULT_CHUNK_SIZE})")
+    args = parser.parse_args(argv)
+
+    count = run_reconciliation(args.input, args.output, args.periods, args.year, args.chunk_size)
+    print(f"Reconciled {count} employees.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())